@@ -0,0 +1,200 @@
+"""
+پردازش دسته‌ای مجموعه فایل‌های صوتی با چند فرآیند
+ورودی یک پوشه (همه فایل‌های WAV/FLAC زیرپوشه‌ها) یا یک فایل فهرست (manifest) با یک مسیر در هر سطر است.
+فایل‌ها بین فرآیندهای یک ProcessPool پخش می‌شوند، نتیجه هر فایل به صورت یک سطر JSON در یک
+فایل خروجی مشترک نوشته می‌شود و در پایان توان عملیاتی کل گزارش می‌شود.
+
+اجرا:
+    python batch_process.py corpus/ --workers 8 --output results.jsonl
+    python batch_process.py manifest.txt --labels
+    python batch_process.py corpus/ --precision int16
+    python batch_process.py corpus/ --segments --min-segment-ms 50 --hangover-ms 100
+    python batch_process.py corpus/ --channels separate
+    python batch_process.py corpus/ --sample-rate 16000
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import soundfile as sf
+
+from classification_rules import COMBINED_RULES, SILENCE, UNVOICED, VOICED, ZCR_ENERGY_RULES
+from feature_engine import CHANNEL_MODES, PRECISIONS, FeatureExtractor
+from segments import Segments
+
+AUDIO_EXTENSIONS = ('.flac', '.wav')
+
+
+def find_audio_files(source):
+    """فهرست فایل‌های صوتی از یک پوشه (بازگشتی) یا فایل manifest"""
+    if os.path.isdir(source):
+        paths = []
+        for root, _, names in os.walk(source):
+            paths.extend(os.path.join(root, name) for name in names
+                         if name.lower().endswith(AUDIO_EXTENSIONS))
+        return sorted(paths)
+
+    base = os.path.dirname(os.path.abspath(source))
+    paths = []
+    with open(source, encoding='utf-8') as manifest:
+        for line in manifest:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                paths.append(line if os.path.isabs(line) else os.path.join(base, line))
+    return paths
+
+
+def label_counts(labels):
+    return {
+        'silence': int(np.sum(labels == SILENCE)),
+        'unvoiced': int(np.sum(labels == UNVOICED)),
+        'voiced': int(np.sum(labels == VOICED)),
+    }
+
+
+def per_channel(values, function):
+    """
+    اعمال function روی برچسب‌ها یا ویژگی‌های هر کانال
+    برای آرایه یک‌بعدی (مونو) یک نتیجه و برای (فریم × کانال) فهرست نتیجه هر کانال
+    """
+    if values.ndim == 1:
+        return function(values)
+    return [function(column) for column in values.T]
+
+
+def mean_or_none(values):
+    return float(np.mean(values)) if len(values) else None
+
+
+def analyze_file(path, extractor_params=(), include_labels=False, segment_options=None):
+    """
+    تحلیل یک فایل در فرآیند کارگر: خواندن، استخراج ویژگی و طبقه‌بندی 2c و 2e
+    segment_options (دیکشنری min_duration و hangover به ثانیه) یعنی بازه‌های طبقه‌بندی ترکیبی
+    هم در نتیجه ذخیره شوند.
+    با channels='separate' در extractor_params هر کانال فایل چندکاناله جداگانه طبقه‌بندی می‌شود و
+    شمارش برچسب‌ها، میانگین F0، برچسب‌ها و بازه‌ها فهرستی با یک عضو برای هر کانال‌اند.
+    با target_rate فایل‌های با نرخ دیگر پیش از تحلیل تبدیل نرخ می‌شوند و analysis_rate ثبت می‌شود.
+    خطای خواندن فایل در نتیجه ثبت می‌شود و اجرای دسته‌ای متوقف نمی‌شود.
+    """
+    start = time.perf_counter()
+    extractor = FeatureExtractor(*extractor_params)
+    try:
+        audio_data, sample_rate = sf.read(path, dtype=np.dtype(extractor.sample_dtype).name)
+    except (RuntimeError, OSError) as error:
+        return {'file': path, 'error': str(error)}
+
+    features = extractor.extract(audio_data, sample_rate, path)
+    table = features.feature_table()
+    classification = ZCR_ENERGY_RULES.classify(table)
+    classification_combined = COMBINED_RULES.classify(table)
+    f0_values = np.where(classification_combined == VOICED, features.f0_values, np.nan)
+
+    result = {
+        'file': path,
+        'sample_rate': sample_rate,
+        'duration_s': len(features.audio_data) / features.sample_rate,
+        'num_frames': features.num_frames,
+        'channels': 1 if classification.ndim == 1 else classification.shape[1],
+        'classification': per_channel(classification, label_counts),
+        'classification_combined': per_channel(classification_combined, label_counts),
+        'mean_voiced_f0': per_channel(f0_values, lambda f0: mean_or_none(f0[~np.isnan(f0)])),
+        'processing_s': time.perf_counter() - start,
+    }
+    if features.sample_rate != sample_rate:
+        result['analysis_rate'] = features.sample_rate
+    if include_labels:
+        result['labels_combined'] = classification_combined.T.tolist()
+    if segment_options is not None:
+        result['segments_combined'] = per_channel(
+            classification_combined,
+            lambda labels: Segments.from_frame_labels(
+                labels, features.frame_length, features.frame_shift, features.sample_rate,
+                num_samples=len(features.audio_data), **segment_options).intervals())
+    return result
+
+
+def run_batch(paths, output, workers=None, extractor_params=(), include_labels=False,
+              segment_options=None):
+    """
+    پردازش همه فایل‌ها با ProcessPoolExecutor و نوشتن نتایج در output (JSON Lines)
+    خروجی: گزارش توان عملیاتی (فایل بر ثانیه، ساعت صوت بر ثانیه و ضریب بلادرنگ)
+    """
+    workers = workers or os.cpu_count()
+    chunksize = max(1, len(paths) // (workers * 4))
+    total_audio = 0.0
+    processed = 0
+    failed = 0
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool, \
+            open(output, 'w', encoding='utf-8') as out:
+        results = pool.map(analyze_file, paths, [extractor_params] * len(paths),
+                           [include_labels] * len(paths), [segment_options] * len(paths),
+                           chunksize=chunksize)
+        for result in results:
+            out.write(json.dumps(result, ensure_ascii=False) + '\n')
+            if 'error' in result:
+                failed += 1
+            else:
+                processed += 1
+                total_audio += result['duration_s']
+    elapsed = time.perf_counter() - start
+
+    return {
+        'files': processed,
+        'failed': failed,
+        'workers': workers,
+        'wall_s': elapsed,
+        'audio_hours': total_audio / 3600,
+        'files_per_s': processed / elapsed if elapsed else 0.0,
+        'audio_hours_per_s': total_audio / 3600 / elapsed if elapsed else 0.0,
+        'real_time_factor': elapsed / total_audio if total_audio else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='پردازش دسته‌ای فایل‌های صوتی')
+    parser.add_argument('source', help='پوشه فایل‌های صوتی یا فایل manifest')
+    parser.add_argument('--workers', type=int, default=None, help='تعداد فرآیندها (پیش‌فرض: تعداد CPU)')
+    parser.add_argument('--output', default='batch_results.jsonl')
+    parser.add_argument('--labels', action='store_true',
+                        help='ذخیره برچسب همه فریم‌ها (طبقه‌بندی ترکیبی) در خروجی')
+    parser.add_argument('--segments', action='store_true',
+                        help='ذخیره بازه‌های طبقه‌بندی ترکیبی (شروع، پایان، برچسب) در خروجی')
+    parser.add_argument('--min-segment-ms', type=float, default=0,
+                        help='حداقل مدت هر بازه؛ بازه‌های کوتاه‌تر با بازه قبلی ادغام می‌شوند')
+    parser.add_argument('--hangover-ms', type=float, default=0,
+                        help='ادامه بخش‌های غیرسکوت در ابتدای سکوت بعدی')
+    parser.add_argument('--precision', choices=PRECISIONS, default='float64',
+                        help='دقت پردازش (int16 برای PCM بدون تبدیل به float)')
+    parser.add_argument('--channels', choices=CHANNEL_MODES, default='mix',
+                        help='فایل‌های چندکاناله: mix میانگین کانال‌ها، separate طبقه‌بندی هر کانال')
+    parser.add_argument('--sample-rate', type=int, default=None,
+                        help='تبدیل نرخ همه فایل‌ها به این نرخ پیش از تحلیل (هندسه فریم یکسان)')
+    args = parser.parse_args()
+
+    paths = find_audio_files(args.source)
+    print(f"تعداد فایل‌ها: {len(paths)}")
+    extractor_params = FeatureExtractor(precision=args.precision, channels=args.channels,
+                                        target_rate=args.sample_rate).params()
+    segment_options = None
+    if args.segments:
+        segment_options = {'min_duration': args.min_segment_ms / 1000,
+                           'hangover': args.hangover_ms / 1000}
+    report = run_batch(paths, args.output, args.workers, extractor_params, args.labels,
+                       segment_options)
+
+    print(f"نتایج در فایل '{args.output}' ذخیره شد.")
+    print(f"فایل‌های پردازش‌شده: {report['files']} (ناموفق: {report['failed']}) "
+          f"با {report['workers']} فرآیند در {report['wall_s']:.2f} ثانیه")
+    print(f"توان عملیاتی: {report['files_per_s']:.2f} فایل/ثانیه، "
+          f"{report['audio_hours_per_s']:.4f} ساعت صوت/ثانیه، "
+          f"ضریب بلادرنگ {report['real_time_factor']:.5f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,302 @@
+"""
+سنجش سرعت محاسبه ویژگی‌ها
+مقایسه حلقه‌های فریم به فریم قبلی با موتورهای برداری feature_engine:
+- انرژی و ZCR: np.sum(frame ** 2) و calculate_zcr برای هر فریم در برابر short_term_features
+- اتوکرولیشن: calculate_autocorrelation برای هر فریم در برابر autocorrelation_peaks (FFT دسته‌ای)
+- F0: قله اتوکرولیشن (حلقه، FFT و جستجوی چندنرخی) در برابر ردیاب YIN با و بدون Viterbi روی سیگنال با F0 معلوم
+- دقت: زمان و اختلاف ویژگی‌ها و برچسب‌های حالت‌های float32 و int16 نسبت به float64
+
+اجرا:
+    python benchmark.py
+    python benchmark.py --durations 10 60 600 --frame-lengths 20 40
+    python benchmark.py --precision-file audio.flac
+    python benchmark.py --pitch --durations 10 60
+    python benchmark.py --pitch --sample-rate 48000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from classification_rules import COMBINED_RULES
+from feature_engine import (PRECISIONS, FeatureExtractor, autocorrelation_peaks,
+                            calculate_autocorrelation, calculate_zcr, frame_signal,
+                            generate_test_signal, lag_to_f0, load_audio,
+                            multirate_autocorrelation_peaks, short_term_features)
+from pitch_tracker import PitchTracker
+
+
+def loop_energy_zcr(audio_data, frame_length, frame_shift):
+    """روش قبلی: فریم‌بندی و محاسبه انرژی، RMS و ZCR با حلقه روی فریم‌ها"""
+    num_frames = int((len(audio_data) - frame_length) / frame_shift) + 1
+    frames = []
+    for i in range(num_frames):
+        start = i * frame_shift
+        end = start + frame_length
+        if end > len(audio_data):
+            frame = np.pad(audio_data[start:], (0, end - len(audio_data)), 'constant')
+        else:
+            frame = audio_data[start:end]
+        frames.append(frame)
+    frames = np.array(frames)
+
+    short_term_energy = np.array([np.sum(frame ** 2) for frame in frames])
+    short_term_amplitude = np.array([np.sqrt(np.mean(frame ** 2)) for frame in frames])
+    zcr_values = np.array([calculate_zcr(frame) for frame in frames])
+    return short_term_energy, short_term_amplitude, zcr_values
+
+
+def loop_autocorrelation_peaks(frames, min_lag, max_lag):
+    """روش قبلی: np.correlate کامل برای هر فریم و جستجوی قله در محدوده F0"""
+    autocorr_strength = []
+    autocorr_peak_lag = []
+    for frame in frames:
+        autocorr = calculate_autocorrelation(frame, max_lag=max_lag*2)
+        search_range = autocorr[min_lag:max_lag+1]
+        if len(search_range) > 0:
+            peak_idx = np.argmax(search_range) + min_lag
+            autocorr_strength.append(autocorr[peak_idx])
+            autocorr_peak_lag.append(peak_idx)
+        else:
+            autocorr_strength.append(0)
+            autocorr_peak_lag.append(0)
+    return np.array(autocorr_strength), np.array(autocorr_peak_lag)
+
+
+def best_time(func, *args, repeat=3):
+    """کمترین زمان اجرای func در چند تکرار (ثانیه) و خروجی آن"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def compare_energy_zcr(durations, frame_lengths_ms, sample_rate=16000, overlap=0.5, repeat=3):
+    """
+    مقایسه حلقه فریم به فریم با موتور جمع تجمعی برای مدت‌زمان‌ها و طول فریم‌های مختلف
+    خروجی: فهرست دیکشنری‌ها شامل زمان‌ها، تسریع و بیشینه اختلاف نتایج
+    """
+    rows = []
+    for duration in durations:
+        audio_data, _ = generate_test_signal(sample_rate, duration)
+        for frame_length_ms in frame_lengths_ms:
+            frame_length = int(sample_rate * frame_length_ms / 1000)
+            frame_shift = max(1, int(frame_length * (1 - overlap)))
+
+            loop_time, (energy_loop, _, zcr_loop) = best_time(
+                loop_energy_zcr, audio_data, frame_length, frame_shift, repeat=repeat)
+            prefix_time, (energy_prefix, _, zcr_prefix) = best_time(
+                short_term_features, audio_data, frame_length, frame_shift, repeat=repeat)
+
+            rows.append({
+                'duration_s': duration,
+                'frame_length_ms': frame_length_ms,
+                'num_frames': len(frame_signal(audio_data, frame_length, frame_shift)),
+                'loop_s': loop_time,
+                'prefix_s': prefix_time,
+                'speedup': loop_time / prefix_time,
+                'energy_max_rel_error': float(np.max(np.abs(energy_prefix - energy_loop)) /
+                                              (np.max(energy_loop) + 1e-12)),
+                'zcr_equal': bool(np.array_equal(zcr_prefix, zcr_loop)),
+            })
+    return rows
+
+
+def compare_autocorrelation(durations, sample_rates, frame_length_ms=20, frame_shift_ms=10,
+                            min_f0=80, max_f0=400, repeat=3):
+    """
+    مقایسه اتوکرولیشن فریم به فریم با نسخه FFT دسته‌ای برای مدت‌زمان‌ها و نرخ‌های نمونه‌برداری مختلف
+    """
+    rows = []
+    for sample_rate in sample_rates:
+        frame_length = int(sample_rate * frame_length_ms / 1000)
+        frame_shift = int(sample_rate * frame_shift_ms / 1000)
+        min_lag = int(sample_rate / max_f0)
+        max_lag = int(sample_rate / min_f0)
+        for duration in durations:
+            audio_data, _ = generate_test_signal(sample_rate, duration)
+            frames = frame_signal(audio_data, frame_length, frame_shift)
+
+            loop_time, (strength_loop, lag_loop) = best_time(
+                loop_autocorrelation_peaks, frames, min_lag, max_lag, repeat=repeat)
+            fft_time, (strength_fft, lag_fft) = best_time(
+                autocorrelation_peaks, frames, min_lag, max_lag, repeat=repeat)
+
+            rows.append({
+                'duration_s': duration,
+                'sample_rate': sample_rate,
+                'num_frames': len(frames),
+                'loop_s': loop_time,
+                'fft_s': fft_time,
+                'speedup': loop_time / fft_time,
+                'strength_max_abs_error': float(np.max(np.abs(strength_fft - strength_loop))),
+                'lag_agreement': float(np.mean(lag_fft == lag_loop)),
+            })
+    return rows
+
+
+def harmonic_test_signal(sample_rate, duration, noise=0.2, seed=0):
+    """
+    سیگنال هارمونیک با F0 متغیر (90 تا 210 هرتز) که هر ثانیه در میان خاموش است، به‌علاوه نویز
+    خروجی: (سیگنال، F0 واقعی هر نمونه، ماسک واکداری هر نمونه)
+    """
+    t = np.arange(int(sample_rate * duration)) / sample_rate
+    f0 = 150 + 60 * np.sin(2 * np.pi * 0.3 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    harmonics = sum(0.8 ** k * np.sin(k * phase) for k in range(1, 10))
+    voiced = np.floor(t) % 2 == 0
+    noise = np.random.default_rng(seed).normal(0, noise, len(t))
+    return harmonics / np.std(harmonics) * voiced + noise, f0, voiced
+
+
+def compare_pitch(durations, sample_rate=16000, frame_length_ms=20, frame_shift_ms=10,
+                  min_f0=80, max_f0=400, repeat=3):
+    """
+    سرعت (فریم بر ثانیه) و دقت F0 روش‌ها روی harmonic_test_signal
+    دقت فقط روی فریم‌های کاملاً واکدار: میانه خطا (سنت)، نسبت خطای بزرگ (بیش از 50 سنت) و
+    نسبت فریم‌هایی که واکدار تشخیص داده شده‌اند.
+    """
+    frame_length = int(sample_rate * frame_length_ms / 1000)
+    frame_shift = int(sample_rate * frame_shift_ms / 1000)
+    min_lag = int(sample_rate / max_f0)
+    max_lag = int(sample_rate / min_f0)
+    methods = {
+        'loop': lambda frames: lag_to_f0(
+            loop_autocorrelation_peaks(frames, min_lag, max_lag)[1], sample_rate),
+        'fft': lambda frames: lag_to_f0(
+            autocorrelation_peaks(frames, min_lag, max_lag)[1], sample_rate),
+        'multirate': lambda frames: lag_to_f0(
+            multirate_autocorrelation_peaks(frames, min_lag, max_lag, sample_rate)[1],
+            sample_rate),
+        'yin': lambda frames: PitchTracker(min_f0, max_f0, smooth=False).track(
+            frames, sample_rate).f0_values,
+        'yin+viterbi': lambda frames: PitchTracker(min_f0, max_f0, smooth=True).track(
+            frames, sample_rate).f0_values,
+    }
+
+    rows = []
+    for duration in durations:
+        audio_data, true_f0, voiced = harmonic_test_signal(sample_rate, duration)
+        frames = frame_signal(audio_data, frame_length, frame_shift)
+        starts = np.arange(len(frames)) * frame_shift
+        centers = np.minimum(starts + frame_length // 2, len(audio_data) - 1)
+        # فریم کاملاً واکدار: هر دو سر فریم در یک ثانیه واکدار
+        fully_voiced = voiced[starts] & voiced[np.minimum(starts + frame_length - 1,
+                                                          len(audio_data) - 1)]
+        for name, method in methods.items():
+            elapsed, f0_values = best_time(method, frames, repeat=repeat)
+            detected = fully_voiced & (f0_values > 0)
+            cents = 1200 * np.abs(np.log2(f0_values[detected] / true_f0[centers][detected]))
+            rows.append({
+                'duration_s': duration,
+                'method': name,
+                'frames_per_s': len(frames) / elapsed,
+                'median_cents': float(np.median(cents)) if len(cents) else float('nan'),
+                'gross_error': float(np.mean(cents > 50)) if len(cents) else float('nan'),
+                'voiced_recall': float(np.sum(detected) / max(1, np.sum(fully_voiced))),
+            })
+    return rows
+
+
+def compare_precision(filename, repeat=3):
+    """
+    مقایسه حالت‌های دقت با float64 روی یک فایل: زمان خواندن و استخراج، حافظه سیگنال،
+    بیشینه اختلاف نسبی انرژی، بیشینه اختلاف ZCR و قدرت اتوکرولیشن و توافق برچسب‌ها و تاخیر قله
+    """
+    reference = None
+    rows = []
+    for precision in PRECISIONS:
+        extractor = FeatureExtractor(precision=precision)
+
+        def read_and_extract():
+            audio_data, sample_rate, _ = load_audio([filename], precision)
+            return extractor.extract(audio_data, sample_rate, filename)
+
+        elapsed, features = best_time(read_and_extract, repeat=repeat)
+        labels = COMBINED_RULES.classify(features.feature_table())
+        if reference is None:
+            reference = (features, labels)
+        ref_features, ref_labels = reference
+
+        rows.append({
+            'precision': precision,
+            'seconds': elapsed,
+            'signal_bytes': features.audio_data.nbytes,
+            'energy_max_rel_error': float(
+                np.max(np.abs(features.short_term_energy - ref_features.short_term_energy)) /
+                (np.max(ref_features.short_term_energy) + 1e-12)),
+            'zcr_max_abs_error': float(np.max(np.abs(features.zcr_values -
+                                                     ref_features.zcr_values))),
+            'autocorr_max_abs_error': float(np.max(np.abs(features.autocorr_strength -
+                                                          ref_features.autocorr_strength))),
+            'lag_agreement': float(np.mean(features.autocorr_peak_lag ==
+                                           ref_features.autocorr_peak_lag)),
+            'label_agreement': float(np.mean(labels == ref_labels)),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='سنجش سرعت محاسبه انرژی، ZCR و اتوکرولیشن')
+    parser.add_argument('--durations', type=float, nargs='+', default=[2, 30, 300],
+                        help='مدت سیگنال‌های آزمایشی به ثانیه')
+    parser.add_argument('--frame-lengths', type=float, nargs='+', default=[10, 20, 50],
+                        help='طول فریم‌ها به میلی‌ثانیه')
+    parser.add_argument('--sample-rate', type=int, default=16000)
+    parser.add_argument('--autocorr-sample-rates', type=int, nargs='+', default=[16000, 48000],
+                        help='نرخ‌های نمونه‌برداری برای سنجش اتوکرولیشن')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--pitch', action='store_true',
+                        help='فقط سنجش روش‌های F0 (اتوکرولیشن در برابر YIN)')
+    parser.add_argument('--precision-file', default=None,
+                        help='فایل صوتی برای مقایسه دقت‌ها (float64/float32/int16)')
+    args = parser.parse_args()
+
+    if args.precision_file:
+        rows = compare_precision(args.precision_file, repeat=args.repeat)
+        print(f"{'precision':>9} {'time (s)':>9} {'signal MB':>10} {'energy err':>11} "
+              f"{'zcr err':>9} {'autocorr err':>13} {'same lag':>8} {'same label':>11}")
+        for row in rows:
+            print(f"{row['precision']:>9} {row['seconds']:>9.4f} "
+                  f"{row['signal_bytes'] / 2**20:>10.2f} {row['energy_max_rel_error']:>11.1e} "
+                  f"{row['zcr_max_abs_error']:>9.1e} {row['autocorr_max_abs_error']:>13.1e} "
+                  f"{row['lag_agreement']*100:>7.2f}% {row['label_agreement']*100:>10.2f}%")
+        return
+
+    if args.pitch:
+        rows = compare_pitch(args.durations, args.sample_rate, repeat=args.repeat)
+        print(f"{'duration':>9} {'method':>12} {'frames/s':>10} {'median':>8} "
+              f"{'gross':>7} {'recall':>7}")
+        for row in rows:
+            print(f"{row['duration_s']:>8g}s {row['method']:>12} {row['frames_per_s']:>10.0f} "
+                  f"{row['median_cents']:>7.1f}c {row['gross_error']*100:>6.1f}% "
+                  f"{row['voiced_recall']*100:>6.1f}%")
+        return
+
+    rows = compare_energy_zcr(args.durations, args.frame_lengths,
+                              sample_rate=args.sample_rate, repeat=args.repeat)
+
+    print(f"{'duration':>9} {'frame':>6} {'frames':>8} {'loop (s)':>10} "
+          f"{'prefix (s)':>11} {'speedup':>8} {'energy err':>11} {'zcr':>5}")
+    for row in rows:
+        print(f"{row['duration_s']:>8g}s {row['frame_length_ms']:>4g}ms {row['num_frames']:>8} "
+              f"{row['loop_s']:>10.4f} {row['prefix_s']:>11.4f} {row['speedup']:>7.1f}x "
+              f"{row['energy_max_rel_error']:>11.1e} {'=' if row['zcr_equal'] else '!=':>5}")
+
+    rows = compare_autocorrelation(args.durations, args.autocorr_sample_rates, repeat=args.repeat)
+
+    print(f"\n{'duration':>9} {'rate':>6} {'frames':>8} {'loop (s)':>10} "
+          f"{'fft (s)':>10} {'speedup':>8} {'strength err':>13} {'same lag':>9}")
+    for row in rows:
+        print(f"{row['duration_s']:>8g}s {row['sample_rate']:>6} {row['num_frames']:>8} "
+              f"{row['loop_s']:>10.4f} {row['fft_s']:>10.4f} {row['speedup']:>7.1f}x "
+              f"{row['strength_max_abs_error']:>13.1e} {row['lag_agreement']*100:>8.1f}%")
+
+
+if __name__ == '__main__':
+    main()
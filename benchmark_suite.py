@@ -0,0 +1,283 @@
+"""
+مجموعه سنجش کارایی همه مراحل برای مدت‌ها و نرخ‌های نمونه‌برداری مختلف
+سیگنال آزمایشی همان سیگنال جایگزین اسکریپت‌ها است (سینوس 440 و 880 هرتز به‌علاوه نویز) که با
+seed ثابت و تکه به تکه ساخته می‌شود، پس ورودی‌های چندساعته هم حافظه محدودی می‌گیرند.
+تکه‌ها با همان تکه‌بندی پردازش جریانی (streaming.frame_blocks) ساخته می‌شوند و هر تکه از
+مراحل زیر می‌گذرد و زمان هر مرحله جدا جمع می‌شود:
+فریم‌بندی، انرژی، ZCR، اتوکرولیشن (FFT دسته‌ای)، طبقه‌بندی برخط و رسم (پوش min/max و ذخیره PNG).
+حلقه‌های مرجع calculate_zcr و calculate_autocorrelation فقط برای مدت‌های کوتاه سنجیده می‌شوند.
+
+نتیجه به صورت JSON ذخیره می‌شود و با --baseline با یک اجرای قبلی مقایسه می‌شود؛ مرحله‌ای که
+بیش از tolerance کندتر شده باشد پسرفت گزارش و کد خروج 1 برگردانده می‌شود.
+
+اجرا:
+    python benchmark_suite.py --output bench.json
+    python benchmark_suite.py --durations 1 60 --sample-rates 16000 --output new.json --baseline bench.json
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from classification_rules import COMBINED_RULES
+from feature_engine import (FeatureExtractor, autocorrelation_peaks, calculate_autocorrelation,
+                            calculate_zcr, frame_energies, frame_signal, prefix_block_length,
+                            zero_crossing_rates)
+from online_stats import OnlineClassifier
+from plot_decimation import DEFAULT_ENVELOPE_BINS, minmax_envelope, plot_curve, plot_waveform
+from streaming import chunk_frames, frame_blocks
+
+DEFAULT_DURATIONS = (1, 60, 600, 3600, 7200)
+DEFAULT_SAMPLE_RATES = (8000, 16000, 44100, 48000)
+
+# مراحل سنجیده‌شده به ترتیب اجرا
+STAGES = ('framing', 'energy', 'zcr', 'autocorrelation', 'classification', 'plotting')
+
+# حلقه‌های مرجع فریم به فریم فقط تا این مدت (ثانیه) اجرا می‌شوند
+DEFAULT_LOOP_MAX_DURATION = 10
+
+# پسرفت: کندتر شدن بیش از این نسبت و بیش از این مقدار مطلق (ثانیه، برای حذف نوسان زمان‌های کوچک)
+DEFAULT_TOLERANCE = 0.2
+MIN_REGRESSION_SECONDS = 0.005
+
+
+def test_signal_pieces(sample_rate, duration, piece_length, seed=0):
+    """
+    سیگنال آزمایشی (مانند generate_test_signal) در تکه‌های پشت سر هم با حداکثر piece_length نمونه
+    برای تکه‌بندی فریمی با streaming.frame_blocks.
+    دامنه به جای بیشینه کل سیگنال با بیشینه نظری (0.5 + 0.3 + 4 × انحراف معیار نویز) نرمال می‌شود.
+    """
+    rng = np.random.default_rng(seed)
+    num_samples = int(sample_rate * duration)
+    peak = 0.5 + 0.3 + 4 * 0.1
+    for position in range(0, num_samples, piece_length):
+        count = min(piece_length, num_samples - position)
+        t = (position + np.arange(count)) / sample_rate
+        yield (np.sin(2 * np.pi * 440 * t) * 0.5 +
+               np.sin(2 * np.pi * 880 * t) * 0.3 +
+               rng.normal(0, 0.1, count)) / peak
+
+
+def test_signal_blocks(sample_rate, duration, frame_length, frame_shift, frames_per_chunk,
+                       seed=0):
+    """سیگنال آزمایشی تکه‌بندی‌شده با همان قرارداد iter_frame_blocks"""
+    pieces = test_signal_pieces(sample_rate, duration, frames_per_chunk * frame_shift, seed)
+    return frame_blocks(pieces, frame_length, frame_shift, frames_per_chunk)
+
+
+def _timed(timings, stage, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+    return result
+
+
+def _render_figure(envelope, frame_times, energy, zcr):
+    """نمودار نمونه (شکل موج، انرژی و ZCR مانند part1b) در حافظه با 150 dpi"""
+    figure = plt.figure(figsize=(14, 8))
+    plot_waveform(*envelope, 'b-', linewidth=0.5, ax=figure.add_subplot(3, 1, 1))
+    plot_curve(frame_times, energy, 'b-', linewidth=1.5, ax=figure.add_subplot(3, 1, 2))
+    plot_curve(frame_times, zcr, 'r-', linewidth=1.5, ax=figure.add_subplot(3, 1, 3))
+    figure.tight_layout()
+    figure.savefig(io.BytesIO(), format='png', dpi=150)
+    plt.close(figure)
+
+
+def loop_stages(sample_rate, duration, extractor, seed=0):
+    """زمان حلقه‌های مرجع calculate_zcr و calculate_autocorrelation روی کل سیگنال (ثانیه)"""
+    frame_length, frame_shift, _, max_lag = extractor.frame_geometry(sample_rate)
+    num_frames = max(1, (int(sample_rate * duration) - frame_length) // frame_shift + 1)
+    blocks = test_signal_blocks(sample_rate, duration, frame_length, frame_shift, num_frames, seed)
+    _, samples = next(blocks)
+    frames = frame_signal(samples, frame_length, frame_shift)
+    timings = {}
+    _timed(timings, 'zcr_loop', lambda: [calculate_zcr(frame) for frame in frames])
+    _timed(timings, 'autocorrelation_loop',
+           lambda: [calculate_autocorrelation(frame, max_lag=max_lag * 2) for frame in frames])
+    return timings
+
+
+def run_case(sample_rate, duration, extractor=None, frames_per_chunk=None, seed=0):
+    """
+    سنجش همه مراحل برای یک مدت و نرخ نمونه‌برداری
+    خروجی: دیکشنری شامل زمان هر مرحله، تعداد فریم‌ها و ضریب بلادرنگ
+    """
+    extractor = extractor or FeatureExtractor()
+    frame_length, frame_shift, min_lag, max_lag = extractor.frame_geometry(sample_rate)
+    frames_per_chunk = chunk_frames(frame_length, frame_shift, frames_per_chunk)
+    block = prefix_block_length(frame_length, frame_shift)
+    num_samples = int(sample_rate * duration)
+    classifier = OnlineClassifier(COMBINED_RULES)
+
+    timings = {stage: 0.0 for stage in STAGES}
+    generate_s = 0.0
+    envelope_x, envelope_y, energies, zcrs = [], [], [], []
+    num_frames = 0
+    blocks = test_signal_blocks(sample_rate, duration, frame_length, frame_shift,
+                                frames_per_chunk, seed)
+    while True:
+        start = time.perf_counter()
+        chunk = next(blocks, None)
+        generate_s += time.perf_counter() - start
+        if chunk is None:
+            break
+        start_frame, samples = chunk
+
+        frames = _timed(timings, 'framing', frame_signal, samples, frame_length, frame_shift)
+        starts = np.arange(len(frames), dtype=np.int64) * frame_shift
+        energy = _timed(timings, 'energy', frame_energies, samples, starts, frame_length, block)
+        zcr = _timed(timings, 'zcr', zero_crossing_rates, samples, starts, frame_length, block)
+        strength, _ = _timed(timings, 'autocorrelation', autocorrelation_peaks, frames,
+                             min_lag, max_lag)
+        _timed(timings, 'classification', classifier.update,
+               {'energy': energy, 'zcr': zcr, 'autocorr': strength})
+
+        # پوش شکل موج هر تکه متناسب با سهم آن از کل سیگنال (بخشی از مرحله رسم)
+        def envelope():
+            bins = max(1, int(np.ceil(DEFAULT_ENVELOPE_BINS * len(samples) / max(num_samples, 1))))
+            time_axis = (start_frame * frame_shift + np.arange(len(samples))) / sample_rate
+            return minmax_envelope(time_axis, samples, bins)
+        x, y = _timed(timings, 'plotting', envelope)
+        envelope_x.append(x)
+        envelope_y.append(y)
+        energies.append(energy)
+        zcrs.append(zcr)
+        num_frames += len(frames)
+
+    frame_times = np.arange(num_frames) * frame_shift / sample_rate
+    _timed(timings, 'plotting', _render_figure,
+           (np.concatenate(envelope_x), np.concatenate(envelope_y)),
+           frame_times, np.concatenate(energies), np.concatenate(zcrs))
+
+    total = sum(timings.values())
+    return {
+        'duration_s': duration,
+        'sample_rate': sample_rate,
+        'num_samples': num_samples,
+        'num_frames': num_frames,
+        'frames_per_chunk': frames_per_chunk,
+        'generate_s': generate_s,
+        'stages': timings,
+        'total_s': total,
+        'frames_per_s': num_frames / total if total else 0.0,
+        'real_time_factor': total / duration if duration else 0.0,
+    }
+
+
+def run_suite(durations=DEFAULT_DURATIONS, sample_rates=DEFAULT_SAMPLE_RATES, repeat=1,
+              loop_max_duration=DEFAULT_LOOP_MAX_DURATION, extractor=None, log=print):
+    """
+    اجرای همه ترکیب‌های مدت و نرخ نمونه‌برداری؛ از چند تکرار کمترین زمان هر مرحله نگه داشته می‌شود
+    خروجی: دیکشنری قابل ذخیره در JSON (مشخصات اجرا و نتیجه هر حالت)
+    """
+    extractor = extractor or FeatureExtractor()
+    cases = []
+    for sample_rate in sample_rates:
+        for duration in durations:
+            runs = [run_case(sample_rate, duration, extractor) for _ in range(repeat)]
+            case = min(runs, key=lambda run: run['total_s'])
+            for stage in STAGES:
+                case['stages'][stage] = min(run['stages'][stage] for run in runs)
+            if duration <= loop_max_duration:
+                loops = [loop_stages(sample_rate, duration, extractor) for _ in range(repeat)]
+                case['loops'] = {name: min(loop[name] for loop in loops) for name in loops[0]}
+            cases.append(case)
+            log(format_case(case))
+
+    return {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+            'repeat': repeat,
+            'extractor': list(extractor.params()),
+        },
+        'cases': cases,
+    }
+
+
+def case_key(case):
+    return (float(case['duration_s']), int(case['sample_rate']))
+
+
+def compare_to_baseline(results, baseline, tolerance=DEFAULT_TOLERANCE,
+                        min_seconds=MIN_REGRESSION_SECONDS):
+    """
+    مقایسه زمان مراحل با یک اجرای قبلی
+    خروجی: فهرست (مدت، نرخ، مرحله، زمان قبلی، زمان فعلی، نسبت، پسرفت؟) برای حالت‌های مشترک
+    """
+    previous = {case_key(case): case for case in baseline['cases']}
+    rows = []
+    for case in results['cases']:
+        old = previous.get(case_key(case))
+        if old is None:
+            continue
+        current_stages = dict(case['stages'], **case.get('loops', {}))
+        old_stages = dict(old['stages'], **old.get('loops', {}))
+        for stage, seconds in current_stages.items():
+            if stage not in old_stages:
+                continue
+            before = old_stages[stage]
+            ratio = seconds / before if before > 0 else float('inf')
+            regression = ratio > 1 + tolerance and seconds - before > min_seconds
+            rows.append((case['duration_s'], case['sample_rate'], stage, before, seconds, ratio,
+                         regression))
+    return rows
+
+
+def format_case(case):
+    stages = ' '.join(f"{stage}={case['stages'][stage]:.4f}" for stage in STAGES)
+    loops = ''.join(f" {name}={seconds:.4f}" for name, seconds in case.get('loops', {}).items())
+    return (f"{case['duration_s']:>7g}s {case['sample_rate']:>6}Hz {case['num_frames']:>8} فریم "
+            f"{stages}{loops} | {case['frames_per_s']:.0f} فریم/ثانیه، "
+            f"ضریب بلادرنگ {case['real_time_factor']:.5f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='سنجش کارایی همه مراحل')
+    parser.add_argument('--durations', type=float, nargs='+', default=list(DEFAULT_DURATIONS),
+                        help='مدت سیگنال‌های آزمایشی به ثانیه')
+    parser.add_argument('--sample-rates', type=int, nargs='+', default=list(DEFAULT_SAMPLE_RATES))
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--loop-max-duration', type=float, default=DEFAULT_LOOP_MAX_DURATION,
+                        help='حداکثر مدت برای سنجش حلقه‌های مرجع فریم به فریم')
+    parser.add_argument('--output', default='benchmark_results.json', help='فایل JSON نتایج')
+    parser.add_argument('--baseline', default=None, help='فایل JSON اجرای مرجع برای مقایسه')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='حداکثر کندشدن مجاز نسبت به مرجع (0.2 یعنی 20%%)')
+    args = parser.parse_args()
+
+    results = run_suite(args.durations, args.sample_rates, args.repeat, args.loop_max_duration)
+    with open(args.output, 'w', encoding='utf-8') as output:
+        json.dump(results, output, ensure_ascii=False, indent=1)
+    print(f"نتایج در فایل '{args.output}' ذخیره شد.")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        rows = compare_to_baseline(results, baseline, args.tolerance)
+        print(f"\n{'duration':>9} {'rate':>6} {'stage':>20} {'baseline':>9} {'current':>9} "
+              f"{'ratio':>6}")
+        for duration, sample_rate, stage, before, seconds, ratio, regression in rows:
+            print(f"{duration:>8g}s {sample_rate:>6} {stage:>20} {before:>9.4f} {seconds:>9.4f} "
+                  f"{ratio:>5.2f}x{'  پسرفت' if regression else ''}")
+        regressions = sum(row[-1] for row in rows)
+        print(f"پسرفت‌ها: {regressions} از {len(rows)} مقایسه")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+موتور قواعد طبقه‌بندی فریم‌ها (سکوت، بی‌واک، واکدار)
+هر طبقه‌بند فهرستی از قواعد (شرط‌ها، برچسب) روی آرایه‌های ویژگی نام‌دار است.
+آستانه‌ها به شکل «میانگین + ضریب × انحراف معیار» یک ویژگی تعریف می‌شوند و
+همه قواعد به صورت عبارت‌های بولی روی کل آرایه ارزیابی می‌شوند (بدون حلقه روی فریم‌ها).
+"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from stage_profiler import profile_stage
+
+# برچسب دسته‌ها
+SILENCE = 0
+UNVOICED = 1
+VOICED = 2
+
+_OPERATORS = {
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+}
+
+
+def feature_stats(features):
+    """
+    میانگین و انحراف معیار هر آرایه ویژگی: {نام: (mean, std)}
+    برای ویژگی‌های چندکاناله (فریم × کانال) آمار هر کانال جدا است.
+    """
+    return {name: (np.mean(values, axis=0), np.std(values, axis=0))
+            for name, values in features.items()}
+
+
+@dataclass
+class RuleSet:
+    """
+    مجموعه قواعد یک طبقه‌بند
+
+    thresholds: {نام آستانه: (نام ویژگی، ضریب)} یعنی آستانه = mean + ضریب × std
+    rules: فهرست (شرط‌ها، برچسب) به ترتیب اولویت؛ هر شرط (نام ویژگی، عملگر، نام آستانه) است
+           و شرط‌های یک قاعده با AND ترکیب می‌شوند. اولین قاعده‌ای که برقرار باشد برچسب را تعیین می‌کند.
+    default: برچسب فریم‌هایی که هیچ قاعده‌ای برایشان برقرار نیست
+    """
+    thresholds: dict
+    rules: list
+    default: int
+    label_names: dict = field(default_factory=dict)
+
+    def compute_thresholds(self, stats):
+        """محاسبه مقدار آستانه‌ها از آمار ویژگی‌ها ({نام: (mean, std)})"""
+        values = {}
+        for name, (feature, coefficient) in self.thresholds.items():
+            mean, std = stats[feature]
+            values[name] = mean + coefficient * std
+        return values
+
+    def classify(self, features, thresholds=None):
+        """
+        طبقه‌بندی همه فریم‌ها
+        features: {نام ویژگی: آرایه}؛ thresholds در صورت عدم ارسال از آمار همین ویژگی‌ها محاسبه می‌شود.
+        ویژگی‌های (فریم × کانال) با آستانه‌های هر کانال برچسب‌های (فریم × کانال) می‌دهند.
+        """
+        shape = np.shape(next(iter(features.values())))
+        with profile_stage('classification', shape[0]):
+            if thresholds is None:
+                thresholds = self.compute_thresholds(feature_stats(features))
+
+            labels = np.full(shape, self.default, dtype=int)
+            undecided = np.ones(shape, dtype=bool)
+
+            for conditions, label in self.rules:
+                mask = undecided.copy()
+                for feature, operator, threshold in conditions:
+                    if operator not in _OPERATORS:
+                        raise ValueError(f"عملگر نامعتبر در قاعده: {operator}")
+                    mask &= _OPERATORS[operator](features[feature], thresholds[threshold])
+                labels[mask] = label
+                undecided &= ~mask
+
+        return labels
+
+
+# بخش 2c: طبقه‌بندی بر اساس ZCR و انرژی
+ZCR_ENERGY_RULES = RuleSet(
+    thresholds={
+        # سکوت: انرژی پایین
+        'silence_energy': ('energy', -0.5),
+        # واکدار: انرژی بالا و ZCR پایین
+        'voiced_energy': ('energy', 0.3),
+        'voiced_zcr': ('zcr', -0.3),
+        # بی‌واک: انرژی متوسط و ZCR بالا
+        'unvoiced_zcr': ('zcr', 0.3),
+    },
+    rules=[
+        ([('energy', '<', 'silence_energy')], SILENCE),
+        ([('energy', '>', 'voiced_energy'), ('zcr', '<', 'voiced_zcr')], VOICED),
+    ],
+    default=UNVOICED,
+    label_names={SILENCE: 'silence', UNVOICED: 'unvoiced', VOICED: 'voiced'},
+)
+
+# بخش 2d: طبقه‌بندی دودویی (واکدار / غیر واکدار) بر اساس قدرت قله اتوکرولیشن
+AUTOCORR_RULES = RuleSet(
+    thresholds={
+        'autocorr': ('autocorr', 0.3),
+    },
+    rules=[
+        ([('autocorr', '>', 'autocorr')], 1),
+    ],
+    default=0,
+    label_names={0: 'not voiced', 1: 'voiced'},
+)
+
+# بخش 2e: طبقه‌بندی ترکیبی ZCR + انرژی + اتوکرولیشن
+COMBINED_RULES = RuleSet(
+    thresholds={
+        'silence_energy': ('energy', -0.5),
+        # واکدار: انرژی بالا، ZCR پایین، و اتوکرولیشن قوی
+        'voiced_energy': ('energy', 0.2),
+        'voiced_zcr': ('zcr', -0.2),
+        'voiced_autocorr': ('autocorr', 0.2),
+        # بی‌واک: انرژی متوسط، ZCR بالا، اتوکرولیشن ضعیف
+        'unvoiced_zcr': ('zcr', 0.2),
+        'unvoiced_autocorr': ('autocorr', -0.2),
+    },
+    rules=[
+        ([('energy', '<', 'silence_energy')], SILENCE),
+        ([('energy', '>', 'voiced_energy'),
+          ('zcr', '<', 'voiced_zcr'),
+          ('autocorr', '>', 'voiced_autocorr')], VOICED),
+    ],
+    default=UNVOICED,
+    label_names={SILENCE: 'silence', UNVOICED: 'unvoiced', VOICED: 'voiced'},
+)
@@ -0,0 +1,260 @@
+"""
+ارزیابی دقت در برابر سرعت روش‌های طبقه‌بندی روی داده برچسب‌دار
+روش‌های بخش 2c (ZCR و انرژی)، 2d (اتوکرولیشن) و 2e (ترکیبی) و نسخه‌های سریع‌تر آن‌ها
+(جستجوی چندنرخی قله، دقت float32) و ردیاب YIN روی فایل‌هایی با برچسب واقعی
+(ساخته‌شده با synthetic_corpus.py) اجرا می‌شوند. برای هر روش دقت و بازیابی هر دسته،
+خطای F0 فریم‌های واکدار و تعداد فریم بر ثانیه کنار هم گزارش می‌شود.
+هزینه هر روش از نمونه‌های خوانده‌شده تا برچسب است (خواندن فایل مشترک است و حساب نمی‌شود)
+و فقط ویژگی‌هایی که همان روش لازم دارد محاسبه می‌شوند.
+
+اجرا:
+    python synthetic_corpus.py corpus/ --files 4 --duration 600
+    python evaluate_classifiers.py corpus/
+    python evaluate_classifiers.py corpus/manifest.txt --methods 2c 2e 2e-float32 2e-multirate-float32 --output eval.json
+    python evaluate_classifiers.py corpus/ --min-voiced-f1 0.9 --max-gross-f0-error 0.05
+"""
+
+import argparse
+import json
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import soundfile as sf
+
+from batch_process import find_audio_files
+from classification_rules import (AUTOCORR_RULES, COMBINED_RULES, SILENCE, UNVOICED, VOICED,
+                                  ZCR_ENERGY_RULES, RuleSet)
+from feature_engine import (FeatureExtractor, convert_samples, frame_signal, short_term_features,
+                            to_mono)
+from pitch_tracker import PitchTracker
+from synthetic_corpus import LABEL_NAMES, load_ground_truth
+
+# خطای F0 بیش از این نسبت خطای فاحش (مثلاً خطای اکتاو) شمرده می‌شود
+GROSS_F0_ERROR = 0.2
+
+
+@dataclass
+class Method:
+    """
+    یک روش طبقه‌بندی
+    rule_set=None یعنی واکداری و F0 از ردیاب YIN؛ energy_zcr_only یعنی اتوکرولیشن لازم نیست.
+    voiced_label برچسب واکدار در خروجی rule_set است و three_class یعنی سکوت و بی‌واک را هم جدا می‌کند.
+    """
+    name: str
+    description: str
+    rule_set: RuleSet = None
+    extractor: FeatureExtractor = None
+    energy_zcr_only: bool = False
+    voiced_label: int = VOICED
+    three_class: bool = True
+
+    def predict(self, audio_data, sample_rate):
+        """
+        برچسب فریم‌ها با همان کدهای دسته‌های برچسب واقعی (برای روش‌های دودویی: VOICED یا -1)
+        خروجی: (برچسب‌ها، F0 هر فریم یا None)
+        """
+        extractor = self.extractor or FeatureExtractor()
+        if self.rule_set is None:
+            audio_data = convert_samples(audio_data, extractor.sample_dtype)
+            frame_length, frame_shift, _, _ = extractor.frame_geometry(sample_rate)
+            frames = frame_signal(audio_data, frame_length, frame_shift)
+            track = PitchTracker(extractor.min_f0, extractor.max_f0, smooth=True).track(frames,
+                                                                                  sample_rate)
+            return np.where(track.voiced, VOICED, -1), track.f0_values
+
+        if self.energy_zcr_only:
+            audio_data = convert_samples(audio_data, extractor.sample_dtype)
+            frame_length, frame_shift, _, _ = extractor.frame_geometry(sample_rate)
+            energy, _, zcr = short_term_features(audio_data, frame_length, frame_shift)
+            labels, f0_values = self.rule_set.classify({'energy': energy, 'zcr': zcr}), None
+        else:
+            features = extractor.extract(audio_data, sample_rate)
+            labels = self.rule_set.classify(features.feature_table())
+            # F0 فقط برای فریم‌هایی که روش واکدار تشخیص داده
+            f0_values = np.where(labels == self.voiced_label, features.f0_values, 0.0)
+
+        if not self.three_class:
+            labels = np.where(labels == self.voiced_label, VOICED, -1)
+        return labels, f0_values
+
+
+METHODS = (
+    Method('2c', 'ZCR و انرژی', ZCR_ENERGY_RULES, energy_zcr_only=True),
+    Method('2c-float32', 'ZCR و انرژی (float32)', ZCR_ENERGY_RULES,
+           FeatureExtractor(precision='float32'), energy_zcr_only=True),
+    Method('2d', 'اتوکرولیشن', AUTOCORR_RULES, voiced_label=1, three_class=False),
+    Method('2d-multirate', 'اتوکرولیشن (چندنرخی)', AUTOCORR_RULES,
+           FeatureExtractor(pitch_search='multirate'), voiced_label=1, three_class=False),
+    Method('2e', 'ترکیبی', COMBINED_RULES),
+    Method('2e-multirate', 'ترکیبی (چندنرخی)', COMBINED_RULES,
+           FeatureExtractor(pitch_search='multirate')),
+    Method('2e-float32', 'ترکیبی (float32)', COMBINED_RULES, FeatureExtractor(precision='float32')),
+    Method('2e-multirate-float32', 'ترکیبی (چندنرخی، float32)', COMBINED_RULES,
+           FeatureExtractor(precision='float32', pitch_search='multirate')),
+    Method('yin', 'ردیاب YIN با Viterbi', three_class=False),
+)
+
+
+class MethodScore:
+    """جمع شمارش‌ها، خطاهای F0 و زمان یک روش روی همه فایل‌ها"""
+
+    def __init__(self, method):
+        self.method = method
+        self.classes = (SILENCE, UNVOICED, VOICED) if method.three_class else (VOICED,)
+        self.counts = {label: [0, 0, 0] for label in self.classes}  # [tp, fp, fn]
+        self.correct = 0
+        self.frames = 0
+        self.seconds = 0.0
+        self.f0_errors = []
+        self.f0_relative_errors = []
+
+    def add(self, truth, predicted, truth_f0, f0_values, seconds):
+        for label in self.classes:
+            is_true, is_predicted = truth == label, predicted == label
+            counts = self.counts[label]
+            counts[0] += int(np.sum(is_true & is_predicted))
+            counts[1] += int(np.sum(~is_true & is_predicted))
+            counts[2] += int(np.sum(is_true & ~is_predicted))
+        self.correct += int(np.sum(truth == predicted))
+        self.frames += len(truth)
+        self.seconds += seconds
+        if f0_values is not None:
+            both = (truth == VOICED) & (truth_f0 > 0) & (f0_values > 0)
+            error = np.abs(f0_values[both] - truth_f0[both])
+            self.f0_errors.append(error)
+            self.f0_relative_errors.append(error / truth_f0[both])
+
+    def result(self):
+        classes = {}
+        for label, (tp, fp, fn) in self.counts.items():
+            precision = tp / (tp + fp) if tp + fp else 0.0
+            recall = tp / (tp + fn) if tp + fn else 0.0
+            f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+            classes[LABEL_NAMES[label]] = {'precision': precision, 'recall': recall, 'f1': f1}
+
+        f0 = None
+        if self.f0_errors:
+            errors = np.concatenate(self.f0_errors)
+            relative = np.concatenate(self.f0_relative_errors)
+            found = len(errors) > 0
+            f0 = {
+                'frames': len(errors),
+                'mean_abs_error_hz': float(np.mean(errors)) if found else None,
+                'median_relative_error': float(np.median(relative)) if found else None,
+                'gross_error_rate': float(np.mean(relative > GROSS_F0_ERROR)) if found else None,
+            }
+        return {
+            'method': self.method.name,
+            'description': self.method.description,
+            'frames': self.frames,
+            'seconds': self.seconds,
+            'frames_per_s': self.frames / self.seconds if self.seconds else 0.0,
+            'accuracy': (self.correct / self.frames
+                         if self.method.three_class and self.frames else None),
+            'classes': classes,
+            'f0': f0,
+        }
+
+
+def evaluate(paths, methods=METHODS, repeat=1, log=print):
+    """
+    اجرای همه روش‌ها روی همه فایل‌ها؛ از چند تکرار کمترین زمان هر روش و فایل نگه داشته می‌شود
+    خروجی: نتیجه هر روش به ترتیب methods
+    """
+    scores = [MethodScore(method) for method in methods]
+    for path in paths:
+        truth, truth_f0, description = load_ground_truth(path)
+        audio_data, sample_rate = sf.read(path, dtype='float64')
+        audio_data = to_mono(audio_data)
+        truth, truth_f0 = np.asarray(truth), np.asarray(truth_f0, dtype=float)
+
+        for score in scores:
+            extractor = score.method.extractor or FeatureExtractor()
+            frame_length, frame_shift, _, _ = extractor.frame_geometry(sample_rate)
+            if (frame_length, frame_shift) != (description['frame_length'],
+                                               description['frame_shift']):
+                raise ValueError(f"هندسه فریم روش {score.method.name} با برچسب‌های {path} "
+                                 f"یکسان نیست")
+            seconds = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                predicted, f0_values = score.method.predict(audio_data, sample_rate)
+                seconds.append(time.perf_counter() - start)
+            score.add(truth, predicted, truth_f0, f0_values, min(seconds))
+        log(f"{path}: {len(truth)} فریم")
+    return [score.result() for score in scores]
+
+
+def choose_method(results, min_voiced_f1=None, max_gross_f0_error=None):
+    """سریع‌ترین روشی که حداقل F1 واکدار و حداکثر خطای فاحش F0 را رعایت کند (یا None)"""
+    eligible = []
+    for result in results:
+        if min_voiced_f1 is not None and result['classes']['voiced']['f1'] < min_voiced_f1:
+            continue
+        if max_gross_f0_error is not None:
+            if result['f0'] is None or result['f0']['gross_error_rate'] is None:
+                continue
+            if result['f0']['gross_error_rate'] > max_gross_f0_error:
+                continue
+        eligible.append(result)
+    return max(eligible, key=lambda result: result['frames_per_s'], default=None)
+
+
+def _cell(values, name, field):
+    return f"{values[name][field]:.3f}" if name in values else '    -'
+
+
+def format_table(results):
+    lines = [f"{'method':<20} {'frames/s':>10} {'acc':>6} "
+             f"{'sil P/R':>13} {'unv P/R':>13} {'voi P/R':>13} {'F0 MAE':>8} {'gross':>6}"]
+    for result in results:
+        classes = result['classes']
+        pairs = ' '.join(f"{_cell(classes, name, 'precision'):>6}/{_cell(classes, name, 'recall'):<6}"
+                         for name in ('silence', 'unvoiced', 'voiced'))
+        accuracy = f"{result['accuracy']:.3f}" if result['accuracy'] is not None else '-'
+        f0 = result['f0']
+        if f0 is not None and f0['mean_abs_error_hz'] is not None:
+            f0_cells = f"{f0['mean_abs_error_hz']:>6.1f}Hz {f0['gross_error_rate'] * 100:>5.1f}%"
+        else:
+            f0_cells = f"{'-':>8} {'-':>6}"
+        lines.append(f"{result['method']:<20} {result['frames_per_s']:>10.0f} {accuracy:>6} "
+                     f"{pairs} {f0_cells}")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ارزیابی دقت و سرعت روش‌های طبقه‌بندی')
+    parser.add_argument('source', help='پوشه یا manifest فایل‌های برچسب‌دار (synthetic_corpus.py)')
+    parser.add_argument('--methods', nargs='+', choices=[method.name for method in METHODS],
+                        default=[method.name for method in METHODS])
+    parser.add_argument('--repeat', type=int, default=1, help='تعداد تکرار برای زمان‌سنجی')
+    parser.add_argument('--output', default=None, help='ذخیره نتایج به صورت JSON')
+    parser.add_argument('--min-voiced-f1', type=float, default=None,
+                        help='حداقل F1 دسته واکدار برای انتخاب روش')
+    parser.add_argument('--max-gross-f0-error', type=float, default=None,
+                        help='حداکثر نسبت خطای فاحش F0 (بیش از 20%%) برای انتخاب روش')
+    args = parser.parse_args()
+
+    paths = find_audio_files(args.source)
+    methods = [method for method in METHODS if method.name in args.methods]
+    results = evaluate(paths, methods, args.repeat)
+    print()
+    print(format_table(results))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump({'files': paths, 'results': results}, output, ensure_ascii=False, indent=1)
+        print(f"\nنتایج در فایل '{args.output}' ذخیره شد.")
+
+    if args.min_voiced_f1 is not None or args.max_gross_f0_error is not None:
+        best = choose_method(results, args.min_voiced_f1, args.max_gross_f0_error)
+        if best is None:
+            print("\nهیچ روشی حد دقت خواسته‌شده را ندارد.")
+        else:
+            print(f"\nسریع‌ترین روش با دقت کافی: {best['method']} ({best['description']}، "
+                  f"{best['frames_per_s']:.0f} فریم/ثانیه)")
+
+
+if __name__ == '__main__':
+    main()
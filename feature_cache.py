@@ -0,0 +1,370 @@
+"""
+حافظه نهان (cache) ویژگی‌ها با کلید محتوای فایل صوتی
+کلید هر مدخل هش SHA-256 محتوای فایل صوتی به همراه پارامترهای پردازش است
+(طول و جابجایی فریم، محدوده F0 و برای برچسب‌ها ضرایب آستانه) و هش کد feature_engine و
+classification_rules است، بنابراین نتیجه قدیمی هرگز برای فایل، پارامتر یا کد تغییرکرده استفاده نمی‌شود و اجرای دوباره بدون خواندن فایل و محاسبه ویژگی انجام می‌شود.
+برای هر مدخل منشأ آن (فایل، هش، پارامترها و زمان ساخت) در index.json ثبت می‌شود.
+حجم کل محدود است و مدخل‌هایی که دیرتر از همه استفاده شده‌اند (LRU) حذف می‌شوند.
+
+مثال:
+    cache = FeatureCache()
+    features = FeatureExtractor().extract_file(cache=cache)
+    labels = cache.classify(features, COMBINED_RULES)
+    cache.stats()
+"""
+
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+import numpy as np
+
+import classification_rules
+import feature_engine
+from feature_engine import DEFAULT_AUDIO_FILES, AudioFeatures, frame_signal, load_audio
+from stage_profiler import profile_stage
+
+DEFAULT_CACHE_DIR = '.feature_cache'
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# قفل index قدیمی‌تر از این (ثانیه) متعلق به فرآیند متوقف‌شده فرض و شکسته می‌شود
+INDEX_LOCK_STALE_S = 30
+
+# آرایه‌های فریمی که برای هر مجموعه پارامتر ذخیره می‌شوند
+CACHED_ARRAYS = ('frame_times', 'short_term_energy', 'short_term_amplitude', 'zcr_values',
+                 'autocorr_strength', 'autocorr_peak_lag', 'f0_values')
+
+# ماژول‌هایی که صوت، ویژگی‌ها و برچسب‌ها را محاسبه می‌کنند؛ هش کد آن‌ها جزء کلید همه مدخل‌هاست
+ENGINE_MODULES = (feature_engine, classification_rules)
+
+
+def file_hash(path, block_size=1 << 20):
+    """هش SHA-256 محتوای فایل"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as audio_file:
+        for block in iter(lambda: audio_file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def engine_code_hash():
+    """
+    هش کد منبع ENGINE_MODULES (یک بار در هر فرآیند)
+    با هر تغییر کد موتور کلیدها عوض می‌شوند و مدخل‌های قدیمی دیگر استفاده نمی‌شوند (و با LRU حذف می‌شوند).
+    """
+    digest = hashlib.sha256()
+    for module in ENGINE_MODULES:
+        digest.update(file_hash(module.__file__).encode('ascii'))
+    return digest.hexdigest()
+
+
+def entry_key(kind, content_hash, params):
+    """کلید مدخل: هش نوع، محتوای صوتی، پارامترها و نسخه کد موتور"""
+    description = json.dumps({'kind': kind, 'content': content_hash, 'params': params,
+                              'code': engine_code_hash()}, sort_keys=True)
+    return hashlib.sha256(description.encode('utf-8')).hexdigest()
+
+
+def feature_params(features):
+    """پارامترهایی که ویژگی‌ها را به طور کامل تعیین می‌کنند (به نمونه)"""
+    params = {
+        'sample_rate': int(features.sample_rate),
+        'frame_length': int(features.frame_length),
+        'frame_shift': int(features.frame_shift),
+        'min_lag': int(features.min_lag),
+        'max_lag': int(features.max_lag),
+    }
+    # ویژگی‌های جدای هر کانال (فقط برای ورودی چندکاناله، تا کلیدهای مونو تغییر نکنند)
+    if np.ndim(features.audio_data) > 1:
+        params['channels'] = int(features.audio_data.shape[1])
+    return params
+
+
+def rule_set_params(rule_set):
+    """ضرایب آستانه و قواعد یک RuleSet به شکل قابل ذخیره در JSON"""
+    return {
+        'thresholds': {name: list(spec) for name, spec in rule_set.thresholds.items()},
+        'rules': [[[list(condition) for condition in conditions], label]
+                  for conditions, label in rule_set.rules],
+        'default': rule_set.default,
+    }
+
+
+class FeatureCache:
+    """حافظه نهان روی دیسک با حذف LRU و شمارنده‌های hit/miss"""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._index_path = os.path.join(directory, 'index.json')
+        self._index = self._read_index()
+        # تغییرات این فرآیند از آخرین نوشتن index (برای ادغام با index فرآیندهای دیگر)
+        self._touched = {}
+        self._stored = set()
+        self._paths = {}
+        self._totals = dict.fromkeys(('hits', 'misses'), 0)
+
+    def _read_index(self):
+        try:
+            with open(self._index_path, encoding='utf-8') as index_file:
+                return json.load(index_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {'entries': {}, 'paths': {}, 'totals': {'hits': 0, 'misses': 0, 'evictions': 0}}
+
+    def _merged_index(self):
+        """
+        index روی دیسک به‌علاوه مدخل‌هایی که این فرآیند ساخته یا استفاده کرده است
+        مدخل‌های فرآیندهای دیگر حفظ و برای هر مدخل مشترک آخرین زمان استفاده نگه داشته می‌شود.
+        """
+        index = self._read_index()
+        entries = index['entries']
+        for key, entry in self._touched.items():
+            existing = entries.get(key)
+            if existing is None:
+                # مدخلی که فرآیند دیگری حذف کرده دوباره ثبت نمی‌شود
+                if key in self._stored or all(os.path.exists(self._path(name))
+                                              for name in entry['files']):
+                    entries[key] = entry
+            elif entry['last_access'] >= existing['last_access']:
+                entries[key] = entry
+        index['paths'].update(self._paths)
+        return index
+
+    @contextmanager
+    def _index_lock(self):
+        """
+        قفل انحصاری index بین فرآیندها با فایل .lock (ساخت اتمی O_EXCL، روی همه سیستم‌عامل‌ها)
+        قفل فرآیندی که پیش از آزاد کردن متوقف شده پس از INDEX_LOCK_STALE_S ثانیه شکسته می‌شود.
+        """
+        lock_path = f"{self._index_path}.lock"
+        while True:
+            try:
+                lock = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(lock_path) > INDEX_LOCK_STALE_S:
+                        os.remove(lock_path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                time.sleep(0.01)
+        try:
+            yield
+        finally:
+            os.close(lock)
+            os.remove(lock_path)
+
+    def _write_index(self):
+        """
+        ادغام تغییرات این فرآیند با index روی دیسک، حذف LRU روی index ادغام‌شده و نوشتن آن
+        زیر قفل، تا فرآیندهای کارگر هم‌زمان مدخل‌ها یا زمان استفاده یکدیگر را پاک نکنند.
+        """
+        with self._index_lock():
+            self._index = self._merged_index()
+            for name, count in self._totals.items():
+                self._index['totals'][name] += count
+            # مدخل‌های ساخته‌شده در این دور (مثلاً صوت و ویژگی‌های همان فایل) حذف نمی‌شوند
+            self._evict(keep=self._stored)
+            # نوشتن اتمی تا فرآیندهای هم‌زمان فایل نیمه‌کاره نبینند
+            temporary = f"{self._index_path}.{os.getpid()}.tmp"
+            with open(temporary, 'w', encoding='utf-8') as index_file:
+                json.dump(self._index, index_file, ensure_ascii=False, indent=1)
+            os.replace(temporary, self._index_path)
+        self._touched = {}
+        self._stored = set()
+        self._paths = {}
+        self._totals = dict.fromkeys(self._totals, 0)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def content_hash(self, path):
+        """هش محتوای فایل؛ اگر زمان تغییر و اندازه فایل عوض نشده باشد از index خوانده می‌شود"""
+        stat = os.stat(path)
+        signature = [stat.st_mtime_ns, stat.st_size]
+        known = self._index['paths'].get(os.path.abspath(path))
+        if known is not None and known[:2] == signature:
+            return known[2]
+        digest = file_hash(path)
+        self._index['paths'][os.path.abspath(path)] = signature + [digest]
+        self._paths[os.path.abspath(path)] = signature + [digest]
+        return digest
+
+    def _lookup(self, key):
+        entry = self._index['entries'].get(key)
+        if entry is None:
+            # مدخل ممکن است پس از باز شدن این نمونه در فرآیند دیگری ساخته شده باشد
+            self._index = self._merged_index()
+            entry = self._index['entries'].get(key)
+        if entry is None or not all(os.path.exists(self._path(name)) for name in entry['files']):
+            self.misses += 1
+            self._totals['misses'] += 1
+            return None
+        self.hits += 1
+        self._totals['hits'] += 1
+        entry['last_access'] = time.time()
+        self._touched[key] = entry
+        return entry
+
+    def _store(self, key, kind, files, provenance):
+        """ثبت مدخل؛ حذف LRU هنگام نوشتن index انجام می‌شود"""
+        now = time.time()
+        entry = {
+            'kind': kind,
+            'files': files,
+            'size': sum(os.path.getsize(self._path(name)) for name in files),
+            'created': now,
+            'last_access': now,
+            'provenance': provenance,
+        }
+        self._index['entries'][key] = entry
+        self._touched[key] = entry
+        self._stored.add(key)
+
+    def _evict(self, keep=()):
+        """حذف مدخل‌های قدیمی‌تر (LRU) تا حجم کل زیر max_bytes برسد (به جز کلیدهای keep)"""
+        entries = self._index['entries']
+        total = sum(entry['size'] for entry in entries.values())
+        for key in sorted(entries, key=lambda k: entries[k]['last_access']):
+            if total <= self.max_bytes:
+                break
+            if key in keep:
+                continue
+            for name in entries[key]['files']:
+                try:
+                    os.remove(self._path(name))
+                except FileNotFoundError:
+                    pass
+            total -= entries.pop(key)['size']
+            self._index['totals']['evictions'] += 1
+
+    def extract_file(self, extractor, filenames=DEFAULT_AUDIO_FILES):
+        """
+        ویژگی‌های اولین فایل موجود از filenames؛ در صورت وجود در حافظه نهان بدون خواندن فایل صوتی
+        سیگنال نمونه (وقتی فایلی پیدا نشود) ذخیره نمی‌شود.
+        """
+        path = next((name for name in filenames if os.path.exists(name)), None)
+        if path is None:
+            audio_data, sample_rate, _ = load_audio(filenames, extractor.precision, extractor.mono,
+                                                    extractor.target_rate)
+            return extractor.extract(audio_data, sample_rate)
+
+        content_hash = self.content_hash(path)
+        params = list(extractor.params())
+        # نمونه‌های چندکاناله کلید جدا دارند؛ کلید حالت مونو مانند قبل است
+        audio_params = {'precision': extractor.precision}
+        if not extractor.mono:
+            audio_params['channels'] = extractor.channels
+        # نمونه‌های تبدیل‌نرخ‌شده هم کلید جدا دارند
+        if extractor.target_rate:
+            audio_params['target_rate'] = extractor.target_rate
+        audio_key = entry_key('audio', content_hash, audio_params)
+        features_key = entry_key('features', content_hash, params)
+
+        audio_entry = self._lookup(audio_key)
+        features_entry = self._lookup(features_key) if audio_entry else None
+        if features_entry is not None:
+            features = self._load_features(audio_entry, features_entry, path)
+        else:
+            features = self._compute_features(extractor, path, content_hash, params,
+                                              audio_key, features_key, audio_entry)
+        features.content_hash = content_hash
+        self._write_index()
+        return features
+
+    def _load_features(self, audio_entry, features_entry, path):
+        geometry = features_entry['provenance']['feature_params']
+        with profile_stage('cache_load') as stage:
+            audio_data = np.load(self._path(audio_entry['files'][0]), mmap_mode='r')
+            with np.load(self._path(features_entry['files'][0])) as stored:
+                arrays = {name: stored[name] for name in CACHED_ARRAYS}
+            frames = frame_signal(audio_data, geometry['frame_length'], geometry['frame_shift'])
+            stage.frames = len(frames)
+            stage.audio_s = len(audio_data) / geometry['sample_rate']
+        return AudioFeatures(
+            audio_data=audio_data,
+            sample_rate=geometry['sample_rate'],
+            audio_file=path,
+            frame_length=geometry['frame_length'],
+            frame_shift=geometry['frame_shift'],
+            min_lag=geometry['min_lag'],
+            max_lag=geometry['max_lag'],
+            frames=frames,
+            **arrays,
+        )
+
+    def _compute_features(self, extractor, path, content_hash, params, audio_key, features_key,
+                          audio_entry):
+        if audio_entry is not None:
+            audio_data = np.load(self._path(audio_entry['files'][0]), mmap_mode='r')
+            sample_rate = self._index['entries'][audio_key]['provenance']['sample_rate']
+        else:
+            audio_data, sample_rate, _ = load_audio([path], extractor.precision, extractor.mono,
+                                                    extractor.target_rate)
+            audio_name = f"audio-{audio_key}.npy"
+            np.save(self._path(audio_name), audio_data)
+            self._store(audio_key, 'audio', [audio_name], {
+                'source': os.path.abspath(path),
+                'content_hash': content_hash,
+                'sample_rate': int(sample_rate),
+                'dtype': str(audio_data.dtype),
+            })
+
+        features = extractor.extract(audio_data, sample_rate, path)
+        features_name = f"features-{features_key}.npz"
+        np.savez(self._path(features_name),
+                 **{name: getattr(features, name) for name in CACHED_ARRAYS})
+        self._store(features_key, 'features', [features_name], {
+            'source': os.path.abspath(path),
+            'content_hash': content_hash,
+            'params': dict(zip(('frame_length_ms', 'frame_shift_ms', 'min_f0', 'max_f0',
+                                'precision', 'pitch_search', 'channels', 'target_rate'), params)),
+            'feature_params': feature_params(features),
+        })
+        return features
+
+    def classify(self, features, rule_set):
+        """
+        برچسب فریم‌ها با rule_set؛ کلید شامل ضرایب آستانه است
+        برای ویژگی‌هایی که از حافظه نهان نیامده‌اند (بدون content_hash) فقط محاسبه می‌شود.
+        """
+        if getattr(features, 'content_hash', None) is None:
+            return rule_set.classify(features.feature_table())
+
+        params = {'features': feature_params(features), 'rules': rule_set_params(rule_set)}
+        key = entry_key('labels', features.content_hash, params)
+        entry = self._lookup(key)
+        if entry is not None:
+            labels = np.load(self._path(entry['files'][0]))
+        else:
+            labels = rule_set.classify(features.feature_table())
+            labels_name = f"labels-{key}.npy"
+            np.save(self._path(labels_name), labels)
+            self._store(key, 'labels', [labels_name], {
+                'source': features.audio_file and os.path.abspath(features.audio_file),
+                'content_hash': features.content_hash,
+                'params': params,
+            })
+        self._write_index()
+        return labels
+
+    def stats(self):
+        """شمارنده‌های hit/miss این نمونه و کل، تعداد مدخل‌ها و حجم"""
+        entries = self._index['entries']
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'total_hits': self._index['totals']['hits'] + self._totals['hits'],
+            'total_misses': self._index['totals']['misses'] + self._totals['misses'],
+            'evictions': self._index['totals']['evictions'],
+            'entries': len(entries),
+            'bytes': sum(entry['size'] for entry in entries.values()),
+        }
@@ -0,0 +1,726 @@
+"""
+موتور مشترک استخراج ویژگی
+این فایل خواندن فایل صوتی، تقسیم به فریم و محاسبه ویژگی‌های انرژی، RMS، ZCR،
+اتوکرولیشن و فرکانس پایه (F0) را یک‌جا انجام می‌دهد تا اسکریپت‌های هر بخش
+فقط از نتایج آن استفاده کنند.
+"""
+
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from math import gcd
+
+import numpy as np
+import soundfile as sf
+from scipy import fft as sp_fft
+from scipy import signal
+
+from stage_profiler import profile_stage
+
+# فایل‌های صوتی پیش‌فرض به ترتیب اولویت
+DEFAULT_AUDIO_FILES = ('audio.flac', 'audio.wav')
+
+# طول بلوک جمع تجمعی در windowed_sums (نمونه)
+PREFIX_BLOCK = 1 << 16
+
+# تعداد فریم‌های هر دسته در batch_autocorrelation
+AUTOCORR_BATCH = 4096
+
+# جستجوی چندنرخی تاخیر F0: نرخ نمونه‌برداری مرحله درشت، تعداد قله‌های نامزد هر فریم و
+# تعداد فریم‌های هر دسته (دسته کوچک‌تر تا فریم‌های صفرپرشده مرحله پالایش در cache بمانند)
+COARSE_PITCH_RATE = 4000
+PITCH_CANDIDATES = 2
+PITCH_REFINE_BATCH = 512
+
+# روش‌های جستجوی قله اتوکرولیشن در FeatureExtractor
+PITCH_SEARCHES = ('full', 'multirate')
+
+# پردازش کانال‌ها در FeatureExtractor: mix میانگین کانال‌ها (مونو)، separate ویژگی‌های هر کانال
+CHANNEL_MODES = ('mix', 'separate')
+
+# پنجره فیلتر پایین‌گذر تبدیل نرخ نمونه‌برداری (همان پیش‌فرض scipy.signal.resample_poly)
+RESAMPLE_WINDOW = ('kaiser', 5.0)
+
+# دقت‌های پشتیبانی‌شده: (نوع داده سیگنال و فریم‌ها، نوع داده ویژگی‌های خروجی)
+# int16 نمونه‌های PCM را بدون تبدیل به float نگه می‌دارد؛ انرژی با انباشتگر int64 و ZCR از علامت
+# صحیح نمونه‌ها محاسبه می‌شود و ویژگی‌ها به مقیاس float (تقسیم بر 32768) برگردانده می‌شوند.
+PRECISIONS = {
+    'float64': (np.float64, np.float64),
+    'float32': (np.float32, np.float32),
+    'int16': (np.int16, np.float64),
+}
+
+# حافظه داخلی برای جلوگیری از خواندن و فریم‌بندی دوباره یک فایل در یک اجرا
+_extracted_features = {}
+
+
+def generate_test_signal(sample_rate=16000, duration=2):
+    """ایجاد سیگنال نمونه (ترکیب سینوس و نویز) وقتی فایل صوتی موجود نیست"""
+    t = np.linspace(0, duration, int(sample_rate * duration))
+    audio_data = (np.sin(2 * np.pi * 440 * t) * 0.5 +  # نت A4
+                  np.sin(2 * np.pi * 880 * t) * 0.3 +  # نت A5
+                  np.random.normal(0, 0.1, len(t)))    # نویز
+    # نرمال‌سازی
+    audio_data = audio_data / np.max(np.abs(audio_data))
+    return audio_data, sample_rate
+
+
+def to_mono(audio_data):
+    """تبدیل به مونو در صورت استریو (برای نمونه‌های صحیح با میانگین صحیح، بدون تبدیل به float)"""
+    if len(audio_data.shape) > 1:
+        if np.issubdtype(audio_data.dtype, np.integer):
+            channels = audio_data.shape[1]
+            audio_data = (audio_data.sum(axis=1, dtype=np.int64) // channels).astype(audio_data.dtype)
+        else:
+            audio_data = np.mean(audio_data, axis=1)
+    return audio_data
+
+
+def convert_samples(audio_data, dtype):
+    """
+    تبدیل نمونه‌ها به نوع داده dtype با مقیاس soundfile (PCM_16 برابر 32768 × float)
+    اگر نوع داده همان باشد کپی ساخته نمی‌شود.
+    """
+    audio_data = np.asarray(audio_data)
+    dtype = np.dtype(dtype)
+    if audio_data.dtype == dtype:
+        return audio_data
+    if np.issubdtype(dtype, np.integer):
+        if np.issubdtype(audio_data.dtype, np.integer):
+            return audio_data.astype(dtype)
+        scale = np.iinfo(dtype).max + 1
+        return np.clip(np.round(audio_data * scale), -scale, scale - 1).astype(dtype)
+    if np.issubdtype(audio_data.dtype, np.integer):
+        return (audio_data / (np.iinfo(audio_data.dtype).max + 1)).astype(dtype)
+    return audio_data.astype(dtype)
+
+
+@lru_cache(maxsize=None)
+def resampling_plan(source_rate, target_rate):
+    """
+    ضرایب تبدیل نرخ source_rate به target_rate: (up, down, فیلتر FIR)
+    فیلتر همان طراحی پیش‌فرض resample_poly است و برای هر جفت نرخ فقط یک بار ساخته می‌شود.
+    """
+    divisor = gcd(int(source_rate), int(target_rate))
+    up, down = int(target_rate) // divisor, int(source_rate) // divisor
+    max_rate = max(up, down)
+    taps = signal.firwin(2 * 10 * max_rate + 1, 1 / max_rate, window=RESAMPLE_WINDOW)
+    taps.setflags(write=False)
+    return up, down, taps
+
+
+def resample_audio(audio_data, source_rate, target_rate):
+    """
+    تبدیل نرخ نمونه‌برداری با فیلتر چندفازی (resample_poly) روی محور زمان
+    نوع داده حفظ می‌شود (نمونه‌های صحیح گرد و محدود می‌شوند)؛ با نرخ برابر کپی ساخته نمی‌شود.
+    """
+    if source_rate == target_rate:
+        return audio_data
+    up, down, taps = resampling_plan(source_rate, target_rate)
+    with profile_stage('resample') as stage:
+        dtype = audio_data.dtype
+        samples = audio_data.astype(np.float64) if np.issubdtype(dtype, np.integer) else audio_data
+        resampled = signal.resample_poly(samples, up, down, axis=0, window=taps)
+        if np.issubdtype(dtype, np.integer):
+            info = np.iinfo(dtype)
+            resampled = np.clip(np.round(resampled), info.min, info.max)
+        stage.audio_s = len(audio_data) / source_rate
+    return resampled.astype(dtype, copy=False)
+
+
+def load_audio(filenames=DEFAULT_AUDIO_FILES, precision='float64', mono=True, target_rate=None):
+    """
+    خواندن اولین فایل صوتی موجود از فهرست filenames
+    خروجی: (audio_data, sample_rate, audio_file)
+    نمونه‌ها مستقیماً با نوع داده precision خوانده می‌شوند (int16 برای PCM بدون گذر از float).
+    mono=False یعنی فایل چندکاناله به صورت (نمونه × کانال) و بدون میانگین‌گیری برگردانده می‌شود.
+    با target_rate نمونه‌ها به آن نرخ تبدیل می‌شوند و sample_rate خروجی همان target_rate است.
+    اگر هیچ فایلی پیدا نشود سیگنال نمونه برگردانده می‌شود و audio_file برابر None است.
+    """
+    dtype = PRECISIONS[precision][0]
+    for filename in filenames:
+        # soundfile برای فایل ناموجود LibsndfileError می‌دهد، نه FileNotFoundError؛ خطای فایل
+        # موجود ولی خراب باید دیده شود، پس فقط وجود فایل بررسی می‌شود
+        if not os.path.exists(filename):
+            continue
+        with profile_stage('read') as stage:
+            audio_data, sample_rate = sf.read(filename, dtype=np.dtype(dtype).name)
+            if mono:
+                audio_data = to_mono(audio_data)
+            stage.audio_s = len(audio_data) / sample_rate
+        if target_rate:
+            audio_data, sample_rate = resample_audio(audio_data, sample_rate, target_rate), target_rate
+        return audio_data, sample_rate, filename
+
+    audio_data, sample_rate = generate_test_signal()
+    audio_data = convert_samples(audio_data, dtype)
+    if target_rate:
+        audio_data, sample_rate = resample_audio(audio_data, sample_rate, target_rate), target_rate
+    return audio_data, sample_rate, None
+
+
+def frame_count(num_samples, frame_length, frame_shift, pad_tail=False):
+    """
+    تعداد فریم‌ها برای سیگنالی با num_samples نمونه
+    pad_tail=False: فقط فریم‌های کامل (مانند قبل؛ سیگنال کوتاه‌تر از یک فریم یک فریم صفرپرشده دارد)
+    pad_tail=True: فریم‌ها تا انتهای سیگنال ادامه می‌یابند و آخرین فریم با صفر پر می‌شود
+    """
+    if pad_tail and num_samples > 0:
+        return max(0, -(-(num_samples - frame_length) // frame_shift)) + 1
+    return max(0, int((num_samples - frame_length) / frame_shift) + 1)
+
+
+def pad_for_framing(audio_data, frame_length, frame_shift, pad_tail=False):
+    """
+    سیگنال لازم برای فریم‌بندی و تعداد فریم‌ها
+    فقط وقتی فریم آخر از انتهای سیگنال بیرون بزند یک نسخه صفرپرشده ساخته می‌شود.
+    """
+    audio_data = np.asarray(audio_data)
+    num_frames = frame_count(len(audio_data), frame_length, frame_shift, pad_tail)
+    needed = (num_frames - 1) * frame_shift + frame_length
+    if needed > len(audio_data):
+        # padding برای آخرین فریم (فقط روی محور زمان)
+        padding = ((0, needed - len(audio_data)),) + ((0, 0),) * (audio_data.ndim - 1)
+        audio_data = np.pad(audio_data, padding, 'constant')
+    return audio_data, num_frames
+
+
+def strided_frames(samples, num_frames, frame_length, frame_shift):
+    """view فقط‌خواندنی (تعداد فریم × طول فریم × ...) روی samples با محور اول زمان"""
+    stride = samples.strides[0]
+    return np.lib.stride_tricks.as_strided(
+        samples,
+        shape=(num_frames, frame_length) + samples.shape[1:],
+        strides=(frame_shift * stride, stride) + samples.strides[1:],
+        writeable=False,
+    )
+
+
+def frame_signal(audio_data, frame_length, frame_shift, pad_tail=False):
+    """
+    تقسیم سیگنال به فریم‌های هم‌پوشان به صورت یک view فقط‌خواندنی (بدون کپی)
+    خروجی آرایه‌ای به ابعاد (تعداد فریم × طول فریم) است که روی همان حافظه audio_data قرار دارد.
+    برای سیگنال چندکاناله (نمونه × کانال) ابعاد (تعداد فریم × طول فریم × کانال) است.
+    """
+    samples, num_frames = pad_for_framing(audio_data, frame_length, frame_shift, pad_tail)
+    return strided_frames(samples, num_frames, frame_length, frame_shift)
+
+
+def frame_energy(frames):
+    """انرژی کوتاه‌مدت هر فریم (مجموع مربع نمونه‌ها) بدون ساخت آرایه میانی frames ** 2"""
+    return np.einsum('ij,ij->i', frames, frames)
+
+
+def windowed_sums(values, starts, length, block=PREFIX_BLOCK):
+    """
+    مجموع values[s:s+length] برای هر s در starts با جمع تجمعی (prefix sum)
+    هزینه O(N + تعداد فریم) است و به طول فریم و میزان همپوشانی بستگی ندارد.
+    جمع تجمعی در بلوک‌هایی به طول block از نو شروع می‌شود تا خطای گرد کردن
+    در فایل‌های طولانی به اندازه یک بلوک محدود بماند (هر فریم حداکثر دو بلوک را می‌پوشاند).
+    values با ابعاد (نمونه × کانال) همه کانال‌ها را یک‌جا جمع می‌زند و خروجی (فریم × کانال) است.
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    values = np.asarray(values)
+    channels = values.shape[1:]
+    if len(starts) == 0 or length <= 0:
+        return np.zeros((len(starts),) + channels, dtype=np.result_type(values, np.int64))
+
+    # سیگنال کوتاه‌تر از یک بلوک همان یک بلوک است (بدون صفرپر کردن تا طول بلوک)
+    block = min(max(block, length), len(values))
+    num_blocks = -(-len(values) // block)
+    blocked = np.zeros((num_blocks * block,) + channels, dtype=np.result_type(values, np.int64))
+    blocked[:len(values)] = values
+    prefix = np.cumsum(blocked.reshape((num_blocks, block) + channels), axis=1)
+    block_totals = prefix[:, -1]
+    prefix = prefix.reshape((-1,) + channels)
+
+    last = starts + length - 1
+    # شرط‌های هر فریم روی محور کانال‌ها پخش می‌شوند
+    expand = (slice(None),) + (None,) * len(channels)
+    # مجموع از ابتدای بلوک تا قبل از start (برای start اول بلوک صفر است)
+    before_start = np.where((starts % block > 0)[expand], prefix[starts - 1], 0)
+    up_to_last = prefix[last]
+    same_block = ((starts // block) == (last // block))[expand]
+    return np.where(same_block,
+                    up_to_last - before_start,
+                    block_totals[starts // block] - before_start + up_to_last)
+
+
+def prefix_block_length(frame_length, frame_shift):
+    """
+    طول بلوک جمع تجمعی برای فریم‌بندی مشخص: مضربی از frame_shift و حداقل PREFIX_BLOCK
+    چون مرز بلوک‌ها روی شروع فریم‌ها می‌افتد، پردازش تکه‌ای (streaming) با تکه‌هایی به طول
+    مضربی از این مقدار دقیقاً همان نتیجه پردازش کل سیگنال را می‌دهد.
+    """
+    return frame_shift * -(-max(PREFIX_BLOCK, frame_length) // frame_shift)
+
+
+def frame_energies(samples, starts, frame_length, block=PREFIX_BLOCK):
+    """
+    انرژی کوتاه‌مدت فریم‌هایی که از starts شروع می‌شوند با جمع تجمعی مربع نمونه‌ها
+    برای نمونه‌های PCM صحیح جمع دقیق با انباشتگر int64 و سپس مقیاس float است.
+    """
+    if np.issubdtype(samples.dtype, np.integer):
+        squares = np.square(samples, dtype=np.int64)
+        scale = float(np.iinfo(samples.dtype).max + 1) ** 2
+        short_term_energy = windowed_sums(squares, starts, frame_length, block) / scale
+    else:
+        short_term_energy = windowed_sums(samples * samples, starts, frame_length, block)
+    # مقادیر منفی ناشی از خطای گرد کردن در فریم‌های کاملاً ساکت
+    return np.maximum(short_term_energy, 0)
+
+
+def zero_crossing_rates(samples, starts, frame_length, block=PREFIX_BLOCK):
+    """ZCR فریم‌هایی که از starts شروع می‌شوند با شمارش تجمعی تغییرات علامت"""
+    # تغییر علامت بین نمونه i و i+1؛ هر فریم frame_length - 1 جفت نمونه دارد
+    signs = np.sign(samples)
+    sign_changes = signs[1:] != signs[:-1]
+    return windowed_sums(sign_changes, starts, frame_length - 1, block) / frame_length
+
+
+def short_term_features(audio_data, frame_length, frame_shift, pad_tail=False):
+    """
+    انرژی، دامنه RMS و ZCR همه فریم‌ها از یک جمع تجمعی مربع نمونه‌ها و
+    یک شمارش تجمعی تغییرات علامت روی کل سیگنال (بدون پیمایش فریم به فریم)
+    خروجی: (short_term_energy, short_term_amplitude, zcr_values)
+    """
+    samples, num_frames = pad_for_framing(audio_data, frame_length, frame_shift, pad_tail)
+    starts = np.arange(num_frames, dtype=np.int64) * frame_shift
+    block = prefix_block_length(frame_length, frame_shift)
+
+    short_term_energy = frame_energies(samples, starts, frame_length, block)
+    short_term_amplitude = np.sqrt(short_term_energy / frame_length)
+    zcr_values = zero_crossing_rates(samples, starts, frame_length, block)
+
+    return short_term_energy, short_term_amplitude, zcr_values
+
+
+def calculate_zcr(frame):
+    """
+    محاسبه نرخ عبور از صفر (Zero Crossing Rate)
+    ZCR = تعداد تغییرات علامت / طول فریم
+    """
+    signs = np.sign(frame)
+    zero_crossings = np.where(np.diff(signs) != 0)[0]
+    zcr = len(zero_crossings) / len(frame)
+    return zcr
+
+
+def calculate_autocorrelation(frame, max_lag=None):
+    """
+    محاسبه اتوکرولیشن نرمال‌شده برای یک فریم
+    """
+    if max_lag is None:
+        max_lag = len(frame) // 2
+
+    # حذف مقدار میانگین فریم
+    frame_normalized = frame - np.mean(frame)
+
+    autocorr = np.correlate(frame_normalized, frame_normalized, mode='full')
+    autocorr = autocorr[len(autocorr)//2:]
+    autocorr = autocorr[:max_lag+1]
+
+    # نرمال‌سازی بر اساس تاخیر صفر
+    if autocorr[0] > 0:
+        autocorr = autocorr / autocorr[0]
+
+    return autocorr
+
+
+def autocorrelation_fft_length(frame_length, max_lag):
+    """طول FFT اتوکرولیشن خطی فریم‌هایی به طول frame_length تا تاخیر max_lag"""
+    max_lag = min(max_lag, frame_length - 1)
+    return sp_fft.next_fast_len(max(1, frame_length + max_lag), real=True)
+
+
+def batch_autocorrelation(frames, min_lag, max_lag, batch_size=AUTOCORR_BATCH, n_fft=None):
+    """
+    اتوکرولیشن نرمال‌شده همه فریم‌ها با FFT حقیقی، فقط برای تاخیرهای min_lag..max_lag
+    معادل calculate_autocorrelation برای هر فریم است: میانگین هر فریم حذف و نتیجه بر
+    مقدار تاخیر صفر تقسیم می‌شود. طول FFT حداقل frame_length + max_lag است تا
+    اتوکرولیشن خطی (نه دایره‌ای) به دست آید. فریم‌ها در دسته‌های batch_size پردازش
+    می‌شوند تا حافظه محدود بماند. n_fft (از AnalysisPlan) محاسبه دوباره طول FFT را حذف می‌کند.
+    خروجی آرایه‌ای به ابعاد (تعداد فریم × (max_lag - min_lag + 1)) است؛ برای فریم‌های چندکاناله
+    (فریم × طول فریم × کانال) همه کانال‌ها در همان FFT ها محاسبه می‌شوند و خروجی
+    (فریم × کانال × تاخیر) است.
+    """
+    num_frames, frame_length = frames.shape[:2]
+    channels = frames.shape[2:]
+    # تاخیرهای بزرگ‌تر از طول فریم در اتوکرولیشن وجود ندارند
+    max_lag = min(max_lag, frame_length - 1)
+    num_lags = max(0, max_lag - min_lag + 1)
+    # فریم‌های float32 (و صحیح) با FFT تک‌دقتی، بقیه با float64
+    dtype = np.result_type(frames.dtype, np.float32)
+    autocorr = np.zeros((num_frames,) + channels + (num_lags,), dtype=dtype)
+    if num_lags == 0:
+        return autocorr
+
+    # حافظه هر دسته با تعداد کانال‌ها ثابت می‌ماند
+    batch_size = max(1, batch_size // int(np.prod(channels, dtype=int)))
+    if n_fft is None:
+        n_fft = autocorrelation_fft_length(frame_length, max_lag)
+    for start in range(0, num_frames, batch_size):
+        batch = frames[start:start + batch_size].astype(dtype, copy=False)
+        if channels:
+            # یک کپی پیوسته با محور زمان آخر (فریم × کانال × طول فریم) تا میانگین و FFT هر کانال
+            # روی حافظه پیوسته انجام شود؛ کاهش روی محور گام‌دار درهم‌تنیده بسیار کندتر است
+            batch = np.ascontiguousarray(np.moveaxis(batch, 1, -1))
+            batch -= batch.mean(axis=-1, keepdims=True)
+        else:
+            batch = batch - batch.mean(axis=-1, keepdims=True)
+        spectrum = sp_fft.rfft(batch, n=n_fft, axis=-1)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        lags = sp_fft.irfft(power, n=n_fft, axis=-1)[..., :max_lag + 1]
+
+        # نرمال‌سازی بر اساس تاخیر صفر (فریم‌های بدون انرژی بدون تغییر می‌مانند)
+        energy = lags[..., :1]
+        lags = lags[..., min_lag:]
+        np.divide(lags, energy, out=lags, where=energy > 0)
+        autocorr[start:start + batch_size] = lags
+
+    return autocorr
+
+
+def autocorrelation_peaks(frames, min_lag, max_lag, n_fft=None):
+    """
+    جستجوی قله اتوکرولیشن در محدوده min_lag..max_lag برای همه فریم‌ها به صورت یک‌جا
+    خروجی: (قدرت قله، تاخیر قله)؛ برای فریم بدون محدوده جستجو هر دو صفر است.
+    """
+    autocorr = batch_autocorrelation(frames, min_lag, max_lag, n_fft=n_fft)
+    if autocorr.shape[-1] == 0:
+        return np.zeros(autocorr.shape[:-1]), np.zeros(autocorr.shape[:-1], dtype=int)
+
+    peak_idx = np.argmax(autocorr, axis=-1)
+    autocorr_strength = np.take_along_axis(autocorr, peak_idx[..., None], axis=-1)[..., 0]
+    autocorr_peak_lag = peak_idx + min_lag
+    return autocorr_strength, autocorr_peak_lag
+
+
+def autocorrelation_lag_bands(frames, band_starts, band_width):
+    """
+    اتوکرولیشن نرمال‌شده هر فریم فقط در چند باند تاخیر پیوسته (ضرب داخلی مستقیم)
+    band_starts آرایه‌ای به ابعاد (تعداد فریم × تعداد باند) از اولین تاخیر هر باند است و هر باند
+    band_width تاخیر دارد. تعریف همان calculate_autocorrelation است (حذف میانگین فریم، جمع روی
+    L - τ جفت نمونه و تقسیم بر مقدار تاخیر صفر).
+    خروجی آرایه‌ای به ابعاد (تعداد فریم × تعداد باند × band_width)
+    """
+    num_frames, frame_length = frames.shape
+    dtype = np.result_type(frames.dtype, np.float32)
+    frames = frames.astype(dtype, copy=False)
+    centered = frames - frames.mean(axis=1, keepdims=True)
+    energy = np.einsum('ij,ij->i', centered, centered)
+
+    # فریم صفرپرشده؛ برای هر باند فقط یک برش پیوسته کپی و تاخیرهای باند view روی آن هستند
+    slab_length = frame_length + band_width - 1
+    padded = np.zeros((num_frames, int(np.max(band_starts, initial=0)) + slab_length), dtype=dtype)
+    padded[:, :frame_length] = centered
+    slabs = np.lib.stride_tricks.sliding_window_view(padded, slab_length, axis=1)
+    rows = np.arange(num_frames)
+
+    autocorr = np.zeros(band_starts.shape + (band_width,), dtype=dtype)
+    for band in range(band_starts.shape[1]):
+        slab = slabs[rows, band_starts[:, band]]
+        shifted = np.lib.stride_tricks.sliding_window_view(slab, frame_length, axis=1)
+        autocorr[:, band] = np.einsum('ij,ikj->ik', centered, shifted)
+    np.divide(autocorr, energy[:, None, None], out=autocorr, where=energy[:, None, None] > 0)
+    return autocorr
+
+
+def multirate_autocorrelation_peaks(frames, min_lag, max_lag, sample_rate,
+                                    coarse_rate=COARSE_PITCH_RATE,
+                                    num_candidates=PITCH_CANDIDATES,
+                                    batch_size=PITCH_REFINE_BATCH):
+    """
+    جستجوی درشت به ریز قله اتوکرولیشن
+    هر فریم با میانگین‌گیری به حدود coarse_rate کاهش نرخ داده می‌شود، num_candidates قله بزرگ
+    اتوکرولیشن در آن نرخ پیدا می‌شود و فقط چند تاخیر اطراف هر نامزد با نرخ کامل محاسبه می‌شود.
+    کاهش نرخ فریم به فریم است، پس نتیجه هر فریم به فریم‌های دیگر (و تکه‌بندی جریانی) بستگی ندارد.
+    خروجی مانند autocorrelation_peaks: (قدرت قله، تاخیر قله)
+    فریم‌های چندکاناله کانال به کانال (هر کانال یک view بدون کپی) جستجو می‌شوند.
+    """
+    if frames.ndim > 2:
+        peaks = [multirate_autocorrelation_peaks(frames[:, :, channel], min_lag, max_lag,
+                                                 sample_rate, coarse_rate, num_candidates,
+                                                 batch_size)
+                 for channel in range(frames.shape[2])]
+        return (np.stack([strength for strength, _ in peaks], axis=-1),
+                np.stack([lag for _, lag in peaks], axis=-1))
+
+    num_frames, frame_length = frames.shape
+    factor = int(sample_rate // coarse_rate)
+    max_lag = min(max_lag, frame_length - 1)
+    coarse_length = frame_length // max(1, factor)
+    coarse_min = max(1, min_lag // max(1, factor))
+    coarse_max = min(-(-max_lag // max(1, factor)), coarse_length - 1)
+    # نرخ ورودی نزدیک نرخ درشت یا محدوده تاخیر خالی: جستجوی کامل
+    if factor < 2 or max_lag < min_lag or coarse_max < coarse_min:
+        return autocorrelation_peaks(frames, min_lag, max_lag)
+
+    # شعاع پالایش اطراف مرکز درون‌یابی‌شده هر نامزد (یک چهارم فاصله دو تاخیر درشت به‌علاوه یک نمونه)
+    radius = factor // 4 + 1
+    band_width = min(2 * radius + 1, max_lag - min_lag + 1)
+
+    autocorr_strength = np.zeros(num_frames, dtype=np.result_type(frames.dtype, np.float32))
+    autocorr_peak_lag = np.zeros(num_frames, dtype=int)
+    for start in range(0, num_frames, batch_size):
+        batch = frames[start:start + batch_size]
+        # کاهش نرخ با میانگین هر factor نمونه (فیلتر پایین‌گذر جعبه‌ای؛ برای یافتن نامزدها کافی است)
+        coarse = batch[:, :coarse_length * factor].reshape(len(batch), coarse_length, factor)
+        coarse = coarse.mean(axis=2, dtype=autocorr_strength.dtype)
+        coarse_autocorr = batch_autocorrelation(coarse, coarse_min, coarse_max)
+
+        # نامزدها: بزرگ‌ترین قله‌های محلی اتوکرولیشن درشت
+        padded = np.pad(coarse_autocorr, ((0, 0), (1, 1)), constant_values=-np.inf)
+        is_peak = ((coarse_autocorr >= padded[:, :-2]) & (coarse_autocorr >= padded[:, 2:]))
+        scores = np.where(is_peak, coarse_autocorr, -np.inf)
+        count = min(num_candidates, scores.shape[1])
+        candidates = np.argpartition(-scores, count - 1, axis=1)[:, :count]
+
+        # مرکز هر نامزد با درون‌یابی سهمی‌وار قله درشت و باند تاخیرهای نرخ کامل اطراف آن
+        rows = np.arange(len(batch))[:, None]
+        before = padded[rows, candidates]
+        centre = padded[rows, candidates + 1]
+        after = padded[rows, candidates + 2]
+        curvature = before - 2 * centre + after
+        shift = np.zeros(candidates.shape)
+        np.divide(before - after, 2 * curvature, out=shift,
+                  where=np.isfinite(curvature) & (curvature < 0))
+        centres = (candidates + coarse_min + np.clip(shift, -0.5, 0.5)) * factor
+        band_starts = np.clip(np.rint(centres).astype(int) - radius,
+                              min_lag, max_lag - band_width + 1)
+        autocorr = autocorrelation_lag_bands(batch, band_starts, band_width)
+        autocorr = autocorr.reshape(len(batch), -1)
+        best = np.argmax(autocorr, axis=1)
+        rows = np.arange(len(batch))
+        autocorr_strength[start:start + batch_size] = autocorr[rows, best]
+        autocorr_peak_lag[start:start + batch_size] = (band_starts[rows, best // band_width] +
+                                                       best % band_width)
+
+    return autocorr_strength, autocorr_peak_lag
+
+
+def lag_to_f0(peak_lag, sample_rate):
+    """تبدیل تاخیر قله به فرکانس پایه؛ تاخیر صفر یعنی F0 نامشخص (صفر)"""
+    f0_values = np.zeros_like(peak_lag, dtype=float)
+    f0_values[peak_lag > 0] = sample_rate / peak_lag[peak_lag > 0]
+    return f0_values
+
+
+@dataclass(frozen=True)
+class AnalysisPlan:
+    """
+    هندسه تحلیل برای یک نرخ نمونه‌برداری (به نمونه): فریم‌بندی، محدوده تاخیر F0، طول FFT
+    اتوکرولیشن و طول بلوک جمع تجمعی؛ با analysis_plan برای هر نرخ فقط یک بار ساخته می‌شود.
+    """
+    sample_rate: int
+    frame_length: int
+    frame_shift: int
+    min_lag: int
+    max_lag: int
+    n_fft: int
+    prefix_block: int
+
+    @property
+    def geometry(self):
+        """(طول فریم، جابجایی فریم، حداقل تاخیر، حداکثر تاخیر) مانند frame_geometry"""
+        return self.frame_length, self.frame_shift, self.min_lag, self.max_lag
+
+
+@lru_cache(maxsize=None)
+def analysis_plan(sample_rate, frame_length_ms=20, frame_shift_ms=10, min_f0=80, max_f0=400):
+    """
+    AnalysisPlan نرخ sample_rate (در حافظه فرآیند نگه داشته می‌شود)
+    مقادیر با همان گرد کردن int() همیشگی محاسبه می‌شوند تا نتایج تغییر نکنند.
+    """
+    frame_length = int(sample_rate * frame_length_ms / 1000)
+    frame_shift = int(sample_rate * frame_shift_ms / 1000)
+    min_lag = int(sample_rate / max_f0)  # تاخیر حداقل (حداکثر F0)
+    max_lag = int(sample_rate / min_f0)  # تاخیر حداکثر (حداقل F0)
+    return AnalysisPlan(
+        sample_rate=sample_rate,
+        frame_length=frame_length,
+        frame_shift=frame_shift,
+        min_lag=min_lag,
+        max_lag=max_lag,
+        n_fft=autocorrelation_fft_length(frame_length, max_lag),
+        prefix_block=prefix_block_length(frame_length, frame_shift) if frame_shift > 0 else 0,
+    )
+
+
+@dataclass
+class AudioFeatures:
+    """نتیجه استخراج ویژگی برای یک سیگنال"""
+    audio_data: np.ndarray
+    sample_rate: int
+    audio_file: str
+    frame_length: int
+    frame_shift: int
+    min_lag: int
+    max_lag: int
+    frames: np.ndarray
+    frame_times: np.ndarray
+    short_term_energy: np.ndarray
+    short_term_amplitude: np.ndarray
+    zcr_values: np.ndarray
+    autocorr_strength: np.ndarray
+    autocorr_peak_lag: np.ndarray
+    f0_values: np.ndarray
+    start_frame: int = 0
+    # هش محتوای فایل صوتی وقتی ویژگی‌ها از طریق FeatureCache به دست آمده‌اند
+    content_hash: str = None
+
+    @property
+    def num_frames(self):
+        return len(self.frames)
+
+    def feature_table(self):
+        """آرایه‌های ویژگی نام‌دار برای موتور قواعد طبقه‌بندی"""
+        return {
+            'energy': self.short_term_energy,
+            'zcr': self.zcr_values,
+            'autocorr': self.autocorr_strength,
+        }
+
+
+class FeatureExtractor:
+    """
+    استخراج همه ویژگی‌های فریم با یک بار خواندن و یک بار فریم‌بندی
+
+    مثال:
+        features = FeatureExtractor().extract_file()
+        features.zcr_values, features.f0_values, ...
+    """
+
+    def __init__(self, frame_length_ms=20, frame_shift_ms=10, min_f0=80, max_f0=400,
+                 precision='float64', pitch_search='full', channels='mix', target_rate=None):
+        if precision not in PRECISIONS:
+            raise ValueError(f"دقت نامعتبر: {precision} (مقادیر مجاز: {', '.join(PRECISIONS)})")
+        if pitch_search not in PITCH_SEARCHES:
+            raise ValueError(f"روش جستجوی نامعتبر: {pitch_search} "
+                             f"(مقادیر مجاز: {', '.join(PITCH_SEARCHES)})")
+        if channels not in CHANNEL_MODES:
+            raise ValueError(f"حالت کانال نامعتبر: {channels} "
+                             f"(مقادیر مجاز: {', '.join(CHANNEL_MODES)})")
+        self.frame_length_ms = frame_length_ms
+        self.frame_shift_ms = frame_shift_ms
+        self.min_f0 = min_f0
+        self.max_f0 = max_f0
+        self.precision = precision
+        self.pitch_search = pitch_search
+        self.channels = channels
+        self.target_rate = target_rate
+        self.sample_dtype, self.feature_dtype = PRECISIONS[precision]
+
+    def params(self):
+        """پارامترهای استخراج به صورت tuple (برای کلید حافظه)"""
+        return (self.frame_length_ms, self.frame_shift_ms, self.min_f0, self.max_f0,
+                self.precision, self.pitch_search, self.channels, self.target_rate)
+
+    @property
+    def mono(self):
+        """آیا کانال‌ها پیش از استخراج میانگین گرفته می‌شوند"""
+        return self.channels == 'mix'
+
+    def plan(self, sample_rate):
+        """AnalysisPlan این پارامترها برای نرخ sample_rate"""
+        return analysis_plan(sample_rate, self.frame_length_ms, self.frame_shift_ms,
+                             self.min_f0, self.max_f0)
+
+    def frame_geometry(self, sample_rate):
+        """طول فریم، جابجایی فریم و محدوده تاخیر F0 به نمونه"""
+        return self.plan(sample_rate).geometry
+
+    def extract(self, audio_data, sample_rate, audio_file=None, start_frame=0):
+        """
+        محاسبه همه ویژگی‌ها برای سیگنال audio_data
+        start_frame شماره اولین فریم در کل فایل است (برای تکه‌های پردازش جریانی).
+        با channels='separate' ورودی (نمونه × کانال) بدون میانگین‌گیری پردازش می‌شود و همه
+        ویژگی‌ها ابعاد (فریم × کانال) دارند؛ frames یک view (فریم × طول فریم × کانال) است.
+        با target_rate سیگنال پیش از فریم‌بندی به آن نرخ تبدیل می‌شود و sample_rate ویژگی‌ها
+        همان target_rate است.
+        """
+        if self.mono:
+            audio_data = to_mono(audio_data)
+        audio_data = convert_samples(audio_data, self.sample_dtype)
+        if self.target_rate:
+            audio_data = resample_audio(audio_data, sample_rate, self.target_rate)
+            sample_rate = self.target_rate
+        plan = self.plan(sample_rate)
+        frame_length, frame_shift, min_lag, max_lag = plan.geometry
+
+        # فریم‌ها یک view بدون کپی روی audio_data هستند
+        with profile_stage('framing') as stage:
+            frames = frame_signal(audio_data, frame_length, frame_shift)
+            num_frames = len(frames)
+            frame_times = (start_frame + np.arange(num_frames)) * frame_shift / sample_rate
+            stage.frames = num_frames
+            stage.audio_s = num_frames * frame_shift / sample_rate
+
+        with profile_stage('energy_zcr', num_frames):
+            short_term_energy, short_term_amplitude, zcr_values = short_term_features(
+                audio_data, frame_length, frame_shift)
+
+        with profile_stage('autocorrelation', num_frames):
+            if self.pitch_search == 'multirate':
+                autocorr_strength, autocorr_peak_lag = multirate_autocorrelation_peaks(
+                    frames, min_lag, max_lag, sample_rate)
+            else:
+                autocorr_strength, autocorr_peak_lag = autocorrelation_peaks(frames, min_lag,
+                                                                             max_lag, plan.n_fft)
+            f0_values = lag_to_f0(autocorr_peak_lag, sample_rate)
+
+        # ویژگی‌های خروجی با دقت انتخاب‌شده (برای float64 بدون کپی)
+        short_term_energy, short_term_amplitude, zcr_values, autocorr_strength, f0_values = (
+            values.astype(self.feature_dtype, copy=False)
+            for values in (short_term_energy, short_term_amplitude, zcr_values,
+                           autocorr_strength, f0_values))
+
+        return AudioFeatures(
+            audio_data=audio_data,
+            sample_rate=sample_rate,
+            audio_file=audio_file,
+            frame_length=frame_length,
+            frame_shift=frame_shift,
+            min_lag=min_lag,
+            max_lag=max_lag,
+            frames=frames,
+            frame_times=frame_times,
+            short_term_energy=short_term_energy,
+            short_term_amplitude=short_term_amplitude,
+            zcr_values=zcr_values,
+            autocorr_strength=autocorr_strength,
+            autocorr_peak_lag=autocorr_peak_lag,
+            f0_values=f0_values,
+            start_frame=start_frame,
+        )
+
+    def extract_file(self, filenames=DEFAULT_AUDIO_FILES, cache=None):
+        """
+        خواندن فایل صوتی و محاسبه ویژگی‌ها
+        نتیجه برای هر فایل و مجموعه پارامتر در همین فرآیند نگه داشته می‌شود.
+        با cache (یک FeatureCache) نتیجه بین اجراها هم روی دیسک نگه داشته می‌شود.
+        """
+        key = (_file_signature(filenames), self.params())
+        with profile_stage('features') as stage:
+            if key not in _extracted_features:
+                if cache is not None:
+                    _extracted_features[key] = cache.extract_file(self, filenames)
+                else:
+                    audio_data, sample_rate, audio_file = load_audio(filenames, self.precision,
+                                                                     self.mono, self.target_rate)
+                    _extracted_features[key] = self.extract(audio_data, sample_rate, audio_file)
+            features = _extracted_features[key]
+            stage.frames = features.num_frames
+            stage.audio_s = len(features.audio_data) / features.sample_rate
+        return features
+
+
+def _file_signature(filenames):
+    """شناسه اولین فایل موجود (مسیر، زمان تغییر و اندازه)"""
+    for filename in filenames:
+        try:
+            stat = os.stat(filename)
+        except FileNotFoundError:
+            continue
+        return (os.path.abspath(filename), stat.st_mtime_ns, stat.st_size)
+    return None
@@ -0,0 +1,109 @@
+"""
+ذخیره‌سازی فریم‌ها بدون تکرار نمونه‌ها
+به جای ماتریس (تعداد فریم × طول فریم) که با همپوشانی 50% هر نمونه را دو بار ذخیره می‌کند،
+سیگنال فقط یک بار (signal.npy) همراه با اطلاعات فریم‌بندی (framing.json) ذخیره می‌شود.
+هنگام باز کردن، سیگنال به صورت memory-map خوانده و فریم‌ها به صورت view بدون کپی ساخته می‌شوند؛
+بنابراین زمان باز کردن به طول فایل بستگی ندارد.
+
+مثال:
+    save_frame_store('frames.store', audio_data, sample_rate, frame_length, frame_shift)
+    store = open_frame_store('frames.store')
+    store.frames[i], store.frame_times, store.num_frames
+"""
+
+import json
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+from feature_engine import pad_for_framing, strided_frames
+
+DEFAULT_FRAME_STORE = 'frames.store'
+FRAME_STORE_VERSION = 1
+
+_SIGNAL_FILE = 'signal.npy'
+_FRAMING_FILE = 'framing.json'
+
+
+@dataclass
+class FrameStore:
+    """
+    سیگنال ذخیره‌شده و اطلاعات فریم‌بندی آن
+    signal همان نمونه‌های لازم برای فریم‌بندی است (در صورت نیاز با صفرپر کردن انتها)
+    و num_samples طول سیگنال اصلی پیش از صفرپر کردن.
+    """
+    signal: np.ndarray
+    sample_rate: int
+    frame_length: int
+    frame_shift: int
+    num_frames: int
+    num_samples: int
+    pad_tail: bool = False
+
+    @property
+    def frames(self):
+        """view فقط‌خواندنی (تعداد فریم × طول فریم) روی signal بدون کپی"""
+        return strided_frames(self.signal, self.num_frames, self.frame_length, self.frame_shift)
+
+    @property
+    def frame_times(self):
+        """زمان شروع هر فریم (ثانیه)"""
+        return np.arange(self.num_frames) * self.frame_shift / self.sample_rate
+
+    @property
+    def audio_data(self):
+        """سیگنال اصلی بدون صفرهای انتها"""
+        return self.signal[:self.num_samples]
+
+    def framing(self):
+        """اطلاعات فریم‌بندی به شکل قابل ذخیره در JSON"""
+        return {
+            'version': FRAME_STORE_VERSION,
+            'sample_rate': int(self.sample_rate),
+            'frame_length': int(self.frame_length),
+            'frame_shift': int(self.frame_shift),
+            'num_frames': int(self.num_frames),
+            'num_samples': int(self.num_samples),
+            'pad_tail': bool(self.pad_tail),
+            'dtype': str(self.signal.dtype),
+        }
+
+
+def save_frame_store(path, audio_data, sample_rate, frame_length, frame_shift, pad_tail=False):
+    """
+    ذخیره سیگنال و اطلاعات فریم‌بندی در پوشه path
+    خروجی: FrameStore روی سیگنال ذخیره‌شده (memory-map)
+    """
+    samples, num_frames = pad_for_framing(audio_data, frame_length, frame_shift, pad_tail)
+    store = FrameStore(np.ascontiguousarray(samples), sample_rate, frame_length, frame_shift,
+                       num_frames, min(len(audio_data), len(samples)), pad_tail)
+
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, _SIGNAL_FILE), store.signal)
+    with open(os.path.join(path, _FRAMING_FILE), 'w', encoding='utf-8') as framing_file:
+        json.dump(store.framing(), framing_file, indent=1)
+    return open_frame_store(path)
+
+
+def open_frame_store(path):
+    """باز کردن پوشه ذخیره‌شده با save_frame_store؛ سیگنال memory-map و فقط‌خواندنی است"""
+    with open(os.path.join(path, _FRAMING_FILE), encoding='utf-8') as framing_file:
+        framing = json.load(framing_file)
+    if framing.get('version') != FRAME_STORE_VERSION:
+        raise ValueError(f"نسخه ناشناخته فایل فریم‌ها: {framing.get('version')}")
+
+    signal = np.load(os.path.join(path, _SIGNAL_FILE), mmap_mode='r')
+    needed = (framing['num_frames'] - 1) * framing['frame_shift'] + framing['frame_length']
+    if framing['num_frames'] > 0 and len(signal) < needed:
+        raise ValueError(f"سیگنال ذخیره‌شده کوتاه‌تر از فریم‌بندی است: {len(signal)} < {needed}")
+
+    return FrameStore(
+        signal=signal,
+        sample_rate=framing['sample_rate'],
+        frame_length=framing['frame_length'],
+        frame_shift=framing['frame_shift'],
+        num_frames=framing['num_frames'],
+        num_samples=framing['num_samples'],
+        pad_tail=framing['pad_tail'],
+    )
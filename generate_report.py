@@ -1,16 +1,42 @@
 """
 اسکریپت تولید گزارش Word برای استاد
 این فایل یک گزارش کامل با تمام مراحل و تصاویر ایجاد می‌کند.
+
+ساخت افزایشی: تصاویر یک بار به عرض نمایش در گزارش (EMBED_DPI) بازکدگذاری و با کلید هش
+فایل منبع در .report_cache نگه داشته می‌شوند. XML هر بخش گزارش هم با کلید متن کد، هش
+تصاویر آن بخش (و برای صفحه عنوان تاریخ) ذخیره می‌شود و بخش‌های بدون تغییر از همان XML
+ساخته می‌شوند. اگر هیچ بخشی تغییر نکرده و فایل گزارش دست نخورده باشد، گزارش دوباره ذخیره نمی‌شود.
+
+اجرا:
+    python generate_report.py
+    python generate_report.py --batch results/rec1 results/rec2 --workers 4
 """
 
 from docx import Document
 from docx.shared import Inches, Pt, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.oxml.ns import qn
-from docx.oxml import OxmlElement
+from docx.oxml import OxmlElement, parse_xml
+import argparse
+import hashlib
+import io
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 import arabic_reshaper
+from PIL import Image
+from feature_cache import file_hash
+from stage_profiler import profile_stage
+
+REPORT_FILE = 'گزارش_پروژه_پردازش_سیگنال_صوتی.docx'
+DEFAULT_REPORT_CACHE = '.report_cache'
+
+# وضوح تصاویر در گزارش: عرض 6 اینچ × 150 نقطه بر اینچ = 900 پیکسل به جای حدود 2100 پیکسل نمودار اصلی
+EMBED_DPI = 150
+
+# تعداد رنگ‌های پالت تصاویر بازکدگذاری‌شده (نمودارها رنگ‌های محدودی دارند)
+EMBED_COLORS = 256
 
 def reshape_arabic_text(text):
     """تبدیل متن فارسی/عربی برای نمایش صحیح در Word"""
@@ -71,18 +97,8 @@ def add_image_to_doc(doc, image_path, width=6, caption=""):
     else:
         add_paragraph_rtl(doc, f"⚠ تصویر یافت نشد: {image_path}", font_size=10)
 
-def create_report():
-    """ایجاد گزارش کامل"""
-    
-    # ایجاد سند
-    doc = Document()
-    
-    # تنظیم فونت پیش‌فرض
-    style = doc.styles['Normal']
-    font = style.font
-    font.name = 'B Nazanin'
-    font.size = Pt(12)
-    
+def _title_section(doc, images):
+    """صفحه عنوان و تاریخ"""
     # صفحه عنوان
     title_para = doc.add_paragraph()
     title_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
@@ -114,7 +130,9 @@ def create_report():
     date_run.font.size = Pt(11)
     
     doc.add_page_break()
-    
+
+def _contents_section(doc, images):
+    """فهرست مطالب"""
     # فهرست مطالب
     add_heading_rtl(doc, 'فهرست مطالب', level=1)
     add_paragraph_rtl(doc, '1. مقدمه', bold=True)
@@ -130,7 +148,9 @@ def create_report():
     add_paragraph_rtl(doc, '4. نتیجه‌گیری', bold=True)
     
     doc.add_page_break()
-    
+
+def _introduction_section(doc, images):
+    """مقدمه"""
     # مقدمه
     add_heading_rtl(doc, '1. مقدمه', level=1)
     add_paragraph_rtl(doc, 
@@ -147,7 +167,9 @@ def create_report():
     )
     
     doc.add_page_break()
-    
+
+def _part1_section(doc, images):
+    """بخش 1: خواندن سیگنال و انرژی کوتاه‌مدت"""
     # بخش 1
     add_heading_rtl(doc, '2. بخش 1: دریافت و پردازش اولیه سیگنال صوتی', level=1)
     
@@ -158,8 +180,8 @@ def create_report():
         'سیگنال در دو نمودار نمایش داده می‌شود: نمودار دامنه زمانی و نمودار طیف فرکانسی.'
     )
     
-    if os.path.exists('part1a_audio_display.png'):
-        add_image_to_doc(doc, 'part1a_audio_display.png', width=6, 
+    if images.get('part1a_audio_display.png'):
+        add_image_to_doc(doc, images['part1a_audio_display.png'], width=6, 
                         caption='شکل 1: نمایش سیگنال صوتی در دامنه زمانی و فرکانسی')
     else:
         add_paragraph_rtl(doc, '⚠ تصویر part1a_audio_display.png یافت نشد. لطفاً ابتدا فایل part1a_read_audio.py را اجرا کنید.', font_size=10)
@@ -188,14 +210,16 @@ def create_report():
         'و در بخش‌های گفتار، انرژی بالاتر است.'
     )
     
-    if os.path.exists('part1b_short_term_energy.png'):
-        add_image_to_doc(doc, 'part1b_short_term_energy.png', width=6,
+    if images.get('part1b_short_term_energy.png'):
+        add_image_to_doc(doc, images['part1b_short_term_energy.png'], width=6,
                         caption='شکل 2: انرژی کوتاه‌مدت و دامنه RMS')
     else:
         add_paragraph_rtl(doc, '⚠ تصویر part1b_short_term_energy.png یافت نشد.', font_size=10)
     
     doc.add_page_break()
-    
+
+def _part2_section(doc, images):
+    """بخش 2: فریم‌بندی، ZCR، طبقه‌بندی، اتوکرولیشن و روش ترکیبی"""
     # بخش 2
     add_heading_rtl(doc, '3. بخش 2: تشخیص بخش‌های واکدار و بی‌واک و سکوت', level=1)
     
@@ -208,8 +232,8 @@ def create_report():
     add_paragraph_rtl(doc, '• پردازش کارآمد: تحلیل فریم به فریم سریع‌تر و دقیق‌تر است', font_size=10)
     add_paragraph_rtl(doc, '• شناسایی دقیق: می‌توان تغییرات جزئی را در طول زمان تشخیص داد', font_size=10)
     
-    if os.path.exists('part2a_frame_segmentation.png'):
-        add_image_to_doc(doc, 'part2a_frame_segmentation.png', width=6,
+    if images.get('part2a_frame_segmentation.png'):
+        add_image_to_doc(doc, images['part2a_frame_segmentation.png'], width=6,
                         caption='شکل 3: تقسیم سیگنال به فریم‌های 20 میلی‌ثانیه‌ای')
     else:
         add_paragraph_rtl(doc, '⚠ تصویر part2a_frame_segmentation.png یافت نشد.', font_size=10)
@@ -227,8 +251,8 @@ def create_report():
     add_paragraph_rtl(doc, 
         '• بخش‌های سکوت: ZCR متوسط (به دلیل نویز پس‌زمینه)', font_size=10)
     
-    if os.path.exists('part2b_zcr_calculation.png'):
-        add_image_to_doc(doc, 'part2b_zcr_calculation.png', width=6,
+    if images.get('part2b_zcr_calculation.png'):
+        add_image_to_doc(doc, images['part2b_zcr_calculation.png'], width=6,
                         caption='شکل 4: تغییرات ZCR در طول زمان')
     else:
         add_paragraph_rtl(doc, '⚠ تصویر part2b_zcr_calculation.png یافت نشد.', font_size=10)
@@ -243,8 +267,8 @@ def create_report():
     add_paragraph_rtl(doc, '• واکدار: انرژی > آستانه واکدار و ZCR < آستانه واکدار', font_size=10)
     add_paragraph_rtl(doc, '• بی‌واک: در غیر این صورت', font_size=10)
     
-    if os.path.exists('part2c_classification.png'):
-        add_image_to_doc(doc, 'part2c_classification.png', width=6,
+    if images.get('part2c_classification.png'):
+        add_image_to_doc(doc, images['part2c_classification.png'], width=6,
                         caption='شکل 5: طبقه‌بندی فریم‌ها بر اساس ZCR و انرژی')
     else:
         add_paragraph_rtl(doc, '⚠ تصویر part2c_classification.png یافت نشد.', font_size=10)
@@ -260,8 +284,8 @@ def create_report():
         'فاصله بین قله‌های اصلی اتوکرولیشن معکوس فرکانس پایه است.'
     )
     
-    if os.path.exists('part2d_autocorrelation.png'):
-        add_image_to_doc(doc, 'part2d_autocorrelation.png', width=6,
+    if images.get('part2d_autocorrelation.png'):
+        add_image_to_doc(doc, images['part2d_autocorrelation.png'], width=6,
                         caption='شکل 6: استفاده از اتوکرولیشن برای تشخیص واکدار')
     else:
         add_paragraph_rtl(doc, '⚠ تصویر part2d_autocorrelation.png یافت نشد.', font_size=10)
@@ -273,20 +297,22 @@ def create_report():
         'این ترکیب منجر به دقت بالاتر و کاهش خطاهای تشخیص می‌شود.'
     )
     
-    if os.path.exists('part2e_combined_method.png'):
-        add_image_to_doc(doc, 'part2e_combined_method.png', width=6,
+    if images.get('part2e_combined_method.png'):
+        add_image_to_doc(doc, images['part2e_combined_method.png'], width=6,
                         caption='شکل 7: نتایج روش ترکیبی')
     else:
         add_paragraph_rtl(doc, '⚠ تصویر part2e_combined_method.png یافت نشد.', font_size=10)
     
-    if os.path.exists('part2e_final_result.png'):
-        add_image_to_doc(doc, 'part2e_final_result.png', width=6,
+    if images.get('part2e_final_result.png'):
+        add_image_to_doc(doc, images['part2e_final_result.png'], width=6,
                         caption='شکل 8: نتیجه نهایی - سیگنال با بخش‌های واکدار (سبز)، بی‌واک (نارنجی) و سکوت (خاکستری)')
     else:
         add_paragraph_rtl(doc, '⚠ تصویر part2e_final_result.png یافت نشد.', font_size=10)
     
     doc.add_page_break()
-    
+
+def _conclusion_section(doc, images):
+    """نتیجه‌گیری"""
     # نتیجه‌گیری
     add_heading_rtl(doc, '4. نتیجه‌گیری', level=1)
     add_paragraph_rtl(doc, 
@@ -298,17 +324,180 @@ def create_report():
         'این پروژه می‌تواند در کاربردهای مختلفی مانند بهبود کیفیت انتقال صوت، '
         'تشخیص گفتار، و تحلیل گفتار استفاده شود.'
     )
+
+# بخش‌های گزارش به ترتیب: (نام، تابع سازنده، تصاویر بخش)
+REPORT_SECTIONS = (
+    ('title', _title_section, ()),
+    ('contents', _contents_section, ()),
+    ('introduction', _introduction_section, ()),
+    ('part1', _part1_section, ('part1a_audio_display.png', 'part1b_short_term_energy.png')),
+    ('part2', _part2_section, ('part2a_frame_segmentation.png', 'part2b_zcr_calculation.png',
+                               'part2c_classification.png', 'part2d_autocorrelation.png',
+                               'part2e_combined_method.png', 'part2e_final_result.png')),
+    ('conclusion', _conclusion_section, ()),
+)
+
+def _sha256(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode('utf-8')).hexdigest()
+
+class ReportCache:
+    """حافظه نهان تصاویر بازکدگذاری‌شده و XML بخش‌های گزارش (کلید: هش محتوا)"""
+
+    def __init__(self, directory=DEFAULT_REPORT_CACHE, embed_dpi=EMBED_DPI):
+        self.directory = directory
+        self.embed_dpi = embed_dpi
+        os.makedirs(directory, exist_ok=True)
+        # هر تغییر در متن این فایل همه بخش‌های ذخیره‌شده را نامعتبر می‌کند
+        self.code_hash = file_hash(__file__)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _write(self, name, data):
+        # نوشتن اتمی تا فرآیندهای هم‌زمان حالت دسته‌ای فایل نیمه‌کاره نبینند
+        temporary = f"{self._path(name)}.{os.getpid()}.tmp"
+        with open(temporary, 'wb') as cache_file:
+            cache_file.write(data)
+        os.replace(temporary, self._path(name))
+
+    def _read_json(self, name):
+        try:
+            with open(self._path(name), encoding='utf-8') as cache_file:
+                return json.load(cache_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def embedded_image(self, path, width=6):
+        """
+        تصویر با عرض width اینچ در embed_dpi؛ فقط وقتی هش فایل منبع تغییر کند دوباره کدگذاری می‌شود
+        خروجی: (مسیر تصویر بازکدگذاری‌شده، هش منبع)
+        """
+        digest = file_hash(path)
+        name = f"image-{digest}-{width}-{self.embed_dpi}.png"
+        if not os.path.exists(self._path(name)):
+            target_width = int(round(width * self.embed_dpi))
+            with Image.open(path) as image:
+                image = image.convert('RGB')
+                if image.width > target_width:
+                    # کوچک‌سازی با میانگین مساحت (BOX)، کافی برای نمودار و چند برابر سریع‌تر از LANCZOS
+                    target_height = max(1, round(image.height * target_width / image.width))
+                    image = image.resize((target_width, target_height), Image.BOX)
+                image = image.quantize(EMBED_COLORS, method=Image.Quantize.FASTOCTREE)
+                buffer = io.BytesIO()
+                image.save(buffer, 'PNG', dpi=(self.embed_dpi, self.embed_dpi))
+            self._write(name, buffer.getvalue())
+        return self._path(name), digest
+
+    def section_key(self, name, image_digests, extra=None):
+        return _sha256({'code': self.code_hash, 'section': name, 'images': image_digests,
+                        'extra': extra})
+
+    def add_section(self, doc, key, builder, images):
+        """
+        افزودن یک بخش به doc؛ اگر XML آن با همین کلید ذخیره شده باشد بدون اجرای builder
+        images: نام تصویر -> مسیر تصویر بازکدگذاری‌شده (None برای تصویر موجود نبودن)
+        """
+        body = doc.element.body
+        start = len(body) - 1
+        cached = self._read_json(f"section-{key}.json")
+        if cached is not None:
+            for xml in cached['elements']:
+                body.sectPr.addprevious(parse_xml(xml))
+            self._relink_images(doc, start, cached['blips'], images)
+            return
+
+        builder(doc, images)
+        elements = list(body)[start:len(body) - 1]
+        image_names = {doc.part.get_or_add_image(path)[0]: image_name
+                       for image_name, path in images.items() if path}
+        blips = [image_names[blip.get(qn('r:embed'))]
+                 for element in elements for blip in element.iter(qn('a:blip'))]
+        self._write(f"section-{key}.json", json.dumps({
+            'elements': [element.xml for element in elements],
+            'blips': blips,
+        }, ensure_ascii=False).encode('utf-8'))
+
+    @staticmethod
+    def _relink_images(doc, start, blips, images):
+        """اتصال تصاویر بخش بازیابی‌شده به بخش‌های تصویر سند جدید و شناسه یکتای هر تصویر"""
+        elements = list(doc.element.body)[start:-1]
+        blip_elements = [blip for element in elements for blip in element.iter(qn('a:blip'))]
+        for blip, image_name in zip(blip_elements, blips):
+            blip.set(qn('r:embed'), doc.part.get_or_add_image(images[image_name])[0])
+        for element in elements:
+            for properties in element.iter(qn('wp:docPr')):
+                properties.set('id', str(doc.part.next_id))
+
+def create_report(image_dir='.', output_file=REPORT_FILE, cache_dir=DEFAULT_REPORT_CACHE):
+    """ایجاد گزارش کامل از تصاویر پوشه image_dir (ساخت افزایشی)"""
+    with profile_stage('report'):
+        return _build_report(image_dir, output_file, cache_dir)
+
+def _build_report(image_dir, output_file, cache_dir):
+    cache = ReportCache(cache_dir)
+
+    # تصاویر بازکدگذاری‌شده و کلید هر بخش
+    images, section_keys = {}, []
+    for name, builder, image_names in REPORT_SECTIONS:
+        digests = {}
+        for image_name in image_names:
+            source = os.path.join(image_dir, image_name)
+            if os.path.exists(source):
+                images[image_name], digests[image_name] = cache.embedded_image(source)
+            else:
+                images[image_name], digests[image_name] = None, None
+        extra = datetime.now().strftime("%Y/%m/%d") if name == 'title' else None
+        section_keys.append(cache.section_key(name, digests, extra))
+
+    # اگر هیچ بخشی تغییر نکرده و فایل گزارش همان فایل قبلی است، ذخیره دوباره لازم نیست
+    report_key = _sha256(section_keys)
+    record_name = f"report-{_sha256(os.path.abspath(output_file))}.json"
+    record = cache._read_json(record_name)
+    if (record is not None and record['key'] == report_key and os.path.exists(output_file)
+            and file_hash(output_file) == record['output']):
+        print(f"✅ گزارش '{output_file}' به‌روز است.")
+        return output_file
+
+    # ایجاد سند
+    doc = Document()
+    
+    # تنظیم فونت پیش‌فرض
+    style = doc.styles['Normal']
+    font = style.font
+    font.name = 'B Nazanin'
+    font.size = Pt(12)
+
+    for (name, builder, _), key in zip(REPORT_SECTIONS, section_keys):
+        cache.add_section(doc, key, builder, images)
     
     # ذخیره فایل
-    output_file = 'گزارش_پروژه_پردازش_سیگنال_صوتی.docx'
     doc.save(output_file)
+    cache._write(record_name, json.dumps({'key': report_key,
+                                          'output': file_hash(output_file)}).encode('utf-8'))
     print(f"✅ گزارش با موفقیت در فایل '{output_file}' ذخیره شد.")
     print("⚠ توجه: برای نمایش صحیح متن فارسی، فونت 'B Nazanin' باید در سیستم شما نصب باشد.")
     print("✅ از کتابخانه arabic-reshaper برای اتصال صحیح حروف فارسی استفاده شده است.")
     
     return output_file
 
+def create_reports(directories, workers=None, cache_dir=DEFAULT_REPORT_CACHE):
+    """ساخت هم‌زمان گزارش هر پوشه (تصاویر همان پوشه، گزارش در همان پوشه) با ProcessPool"""
+    outputs = [os.path.join(directory, REPORT_FILE) for directory in directories]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(create_report, directories, outputs,
+                             [cache_dir] * len(directories)))
+
 if __name__ == '__main__':
-    print("در حال ایجاد گزارش Word...")
-    create_report()
+    parser = argparse.ArgumentParser(description='تولید گزارش Word')
+    parser.add_argument('--batch', nargs='+', metavar='DIR',
+                        help='پوشه‌های حاوی تصاویر part*.png؛ برای هر پوشه یک گزارش ساخته می‌شود')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='تعداد فرآیندهای حالت دسته‌ای (پیش‌فرض: تعداد CPU)')
+    args = parser.parse_args()
 
+    if args.batch:
+        print(f"در حال ایجاد {len(args.batch)} گزارش Word...")
+        create_reports(args.batch, args.workers)
+    else:
+        print("در حال ایجاد گزارش Word...")
+        create_report()
@@ -0,0 +1,182 @@
+"""
+آمار برخط (یک‌گذره) برای تعیین آستانه‌ها و طبقه‌بندی جریانی
+میانگین و واریانس هر ویژگی با روش Welford (ادغام دسته‌ای Chan) یا با پنجره نمایی کاهنده
+به‌روز می‌شود و همان فرمول‌های آستانه موتور قواعد (mean + ضریب × std) روی آن اعمال می‌شود؛
+بنابراین برچسب هر تکه به محض رسیدن داده صادر می‌شود و نیازی به گذر دوم روی فایل نیست.
+ویژگی‌های (فریم × کانال) حالت channels='separate' آمار و آستانه جدای هر کانال دارند.
+
+اجرا (مقایسه برچسب‌های برخط با حالت دسته‌ای):
+    python online_stats.py audio.flac --update-frames 100
+    python online_stats.py audio.flac --half-life 500
+"""
+
+import argparse
+
+import numpy as np
+
+from classification_rules import COMBINED_RULES, ZCR_ENERGY_RULES
+from feature_engine import FeatureExtractor, load_audio
+from streaming import stream_features
+
+
+class RunningStats:
+    """
+    میانگین و انحراف معیار تجمعی (Welford) با به‌روزرسانی دسته‌ای
+    برای مقادیر (فریم × کانال) آمار هر کانال جدا (روی محور فریم) نگه داشته می‌شود.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, values):
+        """افزودن یک دسته مقدار (ادغام Chan برای آمار دو مجموعه)"""
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return
+        batch_mean = np.mean(values, axis=0)
+        batch_m2 = np.sum((values - batch_mean) ** 2, axis=0)
+        total = self.count + len(values)
+        delta = batch_mean - self.mean
+        self.mean += delta * len(values) / total
+        self._m2 += batch_m2 + delta ** 2 * self.count * len(values) / total
+        self.count = total
+
+    @property
+    def std(self):
+        """انحراف معیار جامعه (مانند np.std)"""
+        return np.sqrt(self._m2 / self.count) if self.count else 0.0
+
+
+class DecayingStats:
+    """
+    میانگین و انحراف معیار با پنجره نمایی کاهنده
+    وزن هر فریم پس از half_life فریم نصف می‌شود تا آستانه‌ها با تغییر شرایط ضبط همراه شوند.
+    """
+
+    def __init__(self, half_life):
+        self.decay = 0.5 ** (1.0 / half_life)
+        self.weight = 0.0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, values):
+        """افزودن یک دسته مقدار به ترتیب زمانی"""
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return
+        # وزن هر مقدار در پایان دسته: جدیدترین مقدار وزن 1 دارد
+        weights = self.decay ** np.arange(len(values) - 1, -1, -1)
+        batch_weight = np.sum(weights)
+        # وزن‌ها روی محور فریم؛ برای (فریم × کانال) آمار هر کانال جدا است
+        weights = weights.reshape((-1,) + (1,) * (values.ndim - 1))
+        batch_mean = np.sum(weights * values, axis=0) / batch_weight
+        batch_m2 = np.sum(weights * (values - batch_mean) ** 2, axis=0)
+
+        # کاهش وزن آمار قبلی به اندازه طول دسته و ادغام وزنی
+        previous_weight = self.weight * self.decay ** len(values)
+        previous_m2 = self._m2 * self.decay ** len(values)
+        total = previous_weight + batch_weight
+        delta = batch_mean - self.mean
+        self.mean += delta * batch_weight / total
+        self._m2 = previous_m2 + batch_m2 + delta ** 2 * previous_weight * batch_weight / total
+        self.weight = total
+
+    @property
+    def std(self):
+        return np.sqrt(self._m2 / self.weight) if self.weight else 0.0
+
+
+class OnlineClassifier:
+    """
+    طبقه‌بندی جریانی با یک مجموعه قواعد (RuleSet)
+    برای هر تکه ابتدا آمار ویژگی‌ها با داده همان تکه به‌روز و سپس تکه با آستانه‌های فعلی طبقه‌بندی می‌شود.
+    half_life=None یعنی آمار تجمعی از ابتدای فایل؛ در غیر این صورت پنجره نمایی کاهنده (بر حسب فریم).
+    """
+
+    def __init__(self, rule_set, half_life=None):
+        self.rule_set = rule_set
+        self.half_life = half_life
+        features = {feature for feature, _ in rule_set.thresholds.values()}
+        self.stats = {feature: self._new_stats() for feature in features}
+
+    def _new_stats(self):
+        if self.half_life is None:
+            return RunningStats()
+        return DecayingStats(self.half_life)
+
+    def thresholds(self):
+        """آستانه‌های فعلی بر اساس آمار دیده‌شده تا اینجا"""
+        return self.rule_set.compute_thresholds(
+            {feature: (stats.mean, stats.std) for feature, stats in self.stats.items()})
+
+    def update(self, feature_table):
+        """به‌روزرسانی آمار با یک تکه و برگرداندن برچسب فریم‌های آن"""
+        for feature, stats in self.stats.items():
+            stats.update(feature_table[feature])
+        return self.rule_set.classify(feature_table, self.thresholds())
+
+
+def stream_classify(filename, rule_set, extractor=None, frames_per_chunk=None, half_life=None,
+                    update_frames=None):
+    """
+    خواندن جریانی فایل و صدور برچسب‌ها تکه به تکه: خروجی (تکه ویژگی‌ها، برچسب‌ها)
+    update_frames تعداد فریم‌های هر به‌روزرسانی آمار است (پیش‌فرض: کل تکه خوانده‌شده)؛
+    مقدار کوچک‌تر یعنی آستانه‌ها زودتر با داده جدید همراه می‌شوند.
+    """
+    classifier = OnlineClassifier(rule_set, half_life)
+    for chunk in stream_features(filename, extractor, frames_per_chunk):
+        table = chunk.feature_table()
+        step = update_frames or max(1, chunk.num_frames)
+        labels = [classifier.update({name: values[start:start + step]
+                                     for name, values in table.items()})
+                  for start in range(0, chunk.num_frames, step)]
+        yield chunk, np.concatenate(labels) if labels else np.zeros(0, dtype=int)
+
+
+def label_divergence(online_labels, batch_labels, num_labels=3):
+    """
+    میزان اختلاف برچسب‌های برخط با برچسب‌های دسته‌ای
+    خروجی: نسبت توافق، تعداد فریم‌های متفاوت و ماتریس درهم‌ریختگی (سطر: دسته‌ای، ستون: برخط)
+    """
+    online_labels = np.asarray(online_labels)
+    batch_labels = np.asarray(batch_labels)
+    confusion = np.zeros((num_labels, num_labels), dtype=int)
+    np.add.at(confusion, (batch_labels, online_labels), 1)
+    differing = int(np.sum(online_labels != batch_labels))
+    return {
+        'agreement': 1 - differing / max(1, len(batch_labels)),
+        'differing_frames': differing,
+        'confusion': confusion,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='مقایسه طبقه‌بندی برخط و دسته‌ای')
+    parser.add_argument('filename', nargs='?', default='audio.flac')
+    parser.add_argument('--update-frames', type=int, default=None,
+                        help='تعداد فریم‌های هر به‌روزرسانی آمار (پیش‌فرض: هر تکه خوانده‌شده)')
+    parser.add_argument('--half-life', type=float, default=None,
+                        help='نیمه‌عمر پنجره کاهنده بر حسب فریم (پیش‌فرض: آمار تجمعی)')
+    args = parser.parse_args()
+
+    extractor = FeatureExtractor()
+    audio_data, sample_rate, _ = load_audio([args.filename])
+    batch_table = extractor.extract(audio_data, sample_rate).feature_table()
+
+    for name, rule_set in (('ZCR+energy (2c)', ZCR_ENERGY_RULES),
+                           ('combined (2e)', COMBINED_RULES)):
+        batch_labels = rule_set.classify(batch_table)
+        online_labels = np.concatenate([
+            labels for _, labels in stream_classify(args.filename, rule_set, extractor,
+                                                    half_life=args.half_life,
+                                                    update_frames=args.update_frames)])
+        report = label_divergence(online_labels, batch_labels)
+        print(f"{name}: توافق {report['agreement']*100:.2f}% "
+              f"({report['differing_frames']} فریم متفاوت از {len(batch_labels)})")
+        print(report['confusion'])
+
+
+if __name__ == '__main__':
+    main()
@@ -5,50 +5,28 @@
 
 import numpy as np
 import matplotlib.pyplot as plt
-import soundfile as sf
-import arabic_reshaper
-from bidi.algorithm import get_display
-
-def farsi_text(text):
-    """تبدیل متن فارسی برای نمایش صحیح در نمودارها"""
-    reshaped_text = arabic_reshaper.reshape(text)  # اصلاح شکل حروف
-    bidi_text = get_display(reshaped_text)  # راست‌چین کردن
-    return bidi_text
-
-# خواندن فایل صوتی
-audio_file = None
-audio_data = None
-sample_rate = None
-
-# تلاش برای خواندن فایل FLAC یا WAV
-for filename in ['audio.flac', 'audio.wav']:
-    try:
-        audio_data, sample_rate = sf.read(filename)
-        audio_file = filename
-        print(f"فایل صوتی با موفقیت خوانده شد: {audio_file}")
-        break
-    except FileNotFoundError:
-        continue
-
-if audio_file is None:
-    print("فایل صوتی یافت نشد. یک سیگنال نمونه ایجاد می‌شود...")
-    sample_rate = 16000
-    duration = 2
-    t = np.linspace(0, duration, sample_rate * duration)
-    audio_data = (np.sin(2 * np.pi * 440 * t) * 0.5 +
-                  np.sin(2 * np.pi * 880 * t) * 0.3 +
-                  np.random.normal(0, 0.1, len(t)))
-    audio_data = audio_data / np.max(np.abs(audio_data))
-
-# تبدیل به مونو در صورت استریو
-if len(audio_data.shape) > 1:
-    audio_data = np.mean(audio_data, axis=1)
+from feature_engine import FeatureExtractor
+from feature_cache import FeatureCache
+from frame_store import DEFAULT_FRAME_STORE, save_frame_store
+from plot_decimation import plot_waveform
+from plot_text import farsi_text
+from stage_profiler import profile_stage
 
 # پارامترهای فریم
 frame_length_ms = 20  # طول فریم به میلی‌ثانیه
-frame_length = int(sample_rate * frame_length_ms / 1000)  # طول فریم به نمونه
 frame_shift_ms = 10  # جابجایی فریم به میلی‌ثانیه (50% overlap)
-frame_shift = int(sample_rate * frame_shift_ms / 1000)  # جابجایی فریم به نمونه
+
+# خواندن فایل صوتی و تقسیم به فریم‌ها با موتور مشترک
+features = FeatureExtractor(frame_length_ms, frame_shift_ms).extract_file(cache=FeatureCache())
+if features.audio_file is not None:
+    print(f"فایل صوتی با موفقیت خوانده شد: {features.audio_file}")
+else:
+    print("فایل صوتی یافت نشد. یک سیگنال نمونه ایجاد شد.")
+
+audio_data = features.audio_data
+sample_rate = features.sample_rate
+frame_length = features.frame_length
+frame_shift = features.frame_shift
 
 print(f"\nپارامترهای فریم:")
 print(f"نرخ نمونه‌برداری: {sample_rate} Hz")
@@ -56,25 +34,9 @@ print(f"طول فریم: {frame_length_ms} ms ({frame_length} نمونه)")
 print(f"جابجایی فریم: {frame_shift_ms} ms ({frame_shift} نمونه)")
 print(f"درصد همپوشانی: {(1 - frame_shift/frame_length)*100:.1f}%")
 
-# تقسیم به فریم‌ها
-num_frames = int((len(audio_data) - frame_length) / frame_shift) + 1
-frames = []
-frame_starts = []
-
-for i in range(num_frames):
-    start = i * frame_shift
-    end = start + frame_length
-    if end > len(audio_data):
-        # padding برای آخرین فریم
-        frame = np.pad(audio_data[start:], (0, end - len(audio_data)), 'constant')
-    else:
-        frame = audio_data[start:end]
-    frames.append(frame)
-    frame_starts.append(start)
-
-frames = np.array(frames)
-frame_starts = np.array(frame_starts)
-frame_times = frame_starts / sample_rate
+frames = features.frames
+num_frames = features.num_frames
+frame_times = features.frame_times
 
 print(f"تعداد فریم‌ها: {num_frames}")
 print(f"مدت زمان کل: {len(audio_data)/sample_rate:.2f} ثانیه")
@@ -94,7 +56,7 @@ plt.figure(figsize=(14, 8))
 # نمودار سیگنال اصلی با نشان‌گذاری فریم‌ها
 time_axis = np.arange(len(audio_data)) / sample_rate
 plt.subplot(3, 1, 1)
-plt.plot(time_axis, audio_data, 'b-', linewidth=0.5, label=farsi_text('سیگنال اصلی'))
+plot_waveform(time_axis, audio_data, 'b-', linewidth=0.5, label=farsi_text('سیگنال اصلی'))
 
 # نمایش مرزهای فریم‌ها
 for i in range(0, num_frames, max(1, num_frames//20)):  # نمایش هر 20 فریم
@@ -129,13 +91,15 @@ plt.xlabel(farsi_text('طول فریم (تعداد نمونه)'), fontsize=12)
 plt.ylabel(farsi_text('تعداد فریم‌ها'), fontsize=12)
 plt.grid(True, alpha=0.3, axis='y')
 
-plt.tight_layout()
-plt.savefig('part2a_frame_segmentation.png', dpi=150, bbox_inches='tight')
+with profile_stage('figure'):
+    plt.tight_layout()
+    plt.savefig('part2a_frame_segmentation.png', dpi=150, bbox_inches='tight')
 print("\nنمودار در فایل 'part2a_frame_segmentation.png' ذخیره شد.")
 plt.show()
 
 # ذخیره اطلاعات فریم‌ها برای استفاده در بخش‌های بعدی
-np.save('frames.npy', frames)
+# سیگنال یک بار همراه با اطلاعات فریم‌بندی ذخیره می‌شود (بدون تکرار نمونه‌های همپوشان)
+save_frame_store(DEFAULT_FRAME_STORE, audio_data, sample_rate, frame_length, frame_shift)
 np.save('frame_times.npy', frame_times)
-print("\nاطلاعات فریم‌ها در فایل‌های 'frames.npy' و 'frame_times.npy' ذخیره شد.")
+print(f"\nاطلاعات فریم‌ها در '{DEFAULT_FRAME_STORE}' و فایل 'frame_times.npy' ذخیره شد.")
 
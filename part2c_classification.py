@@ -5,84 +5,40 @@
 
 import numpy as np
 import matplotlib.pyplot as plt
-import soundfile as sf
-import arabic_reshaper
-from bidi.algorithm import get_display
-
-def farsi_text(text):
-    """تبدیل متن فارسی برای نمایش صحیح در نمودارها"""
-    reshaped_text = arabic_reshaper.reshape(text)  # اصلاح شکل حروف
-    bidi_text = get_display(reshaped_text)  # راست‌چین کردن
-    return bidi_text
-
-# خواندن فایل صوتی
-audio_file = None
-audio_data = None
-sample_rate = None
-
-# تلاش برای خواندن فایل FLAC یا WAV
-for filename in ['audio.flac', 'audio.wav']:
-    try:
-        audio_data, sample_rate = sf.read(filename)
-        audio_file = filename
-        print(f"فایل صوتی با موفقیت خوانده شد: {audio_file}")
-        break
-    except FileNotFoundError:
-        continue
-
-if audio_file is None:
-    print("فایل صوتی یافت نشد. یک سیگنال نمونه ایجاد می‌شود...")
-    sample_rate = 16000
-    duration = 2
-    t = np.linspace(0, duration, sample_rate * duration)
-    audio_data = (np.sin(2 * np.pi * 440 * t) * 0.5 +
-                  np.sin(2 * np.pi * 880 * t) * 0.3 +
-                  np.random.normal(0, 0.1, len(t)))
-    audio_data = audio_data / np.max(np.abs(audio_data))
-
-# تبدیل به مونو در صورت استریو
-if len(audio_data.shape) > 1:
-    audio_data = np.mean(audio_data, axis=1)
+from feature_engine import FeatureExtractor
+from feature_cache import FeatureCache
+from classification_rules import ZCR_ENERGY_RULES, feature_stats
+from segments import Segments
+from plot_decimation import plot_curve, plot_segments, plot_waveform
+from plot_text import farsi_text
+from stage_profiler import profile_stage
 
 # پارامترهای فریم
 frame_length_ms = 20
-frame_length = int(sample_rate * frame_length_ms / 1000)
 frame_shift_ms = 10
-frame_shift = int(sample_rate * frame_shift_ms / 1000)
 
-# تقسیم به فریم‌ها
-num_frames = int((len(audio_data) - frame_length) / frame_shift) + 1
-frames = []
+# خواندن فایل صوتی، تقسیم به فریم‌ها و محاسبه ZCR و انرژی با موتور مشترک
+features = FeatureExtractor(frame_length_ms, frame_shift_ms).extract_file(cache=FeatureCache())
+if features.audio_file is not None:
+    print(f"فایل صوتی با موفقیت خوانده شد: {features.audio_file}")
+else:
+    print("فایل صوتی یافت نشد. یک سیگنال نمونه ایجاد شد.")
 
-for i in range(num_frames):
-    start = i * frame_shift
-    end = start + frame_length
-    if end > len(audio_data):
-        frame = np.pad(audio_data[start:], (0, end - len(audio_data)), 'constant')
-    else:
-        frame = audio_data[start:end]
-    frames.append(frame)
+audio_data = features.audio_data
+sample_rate = features.sample_rate
+frame_length = features.frame_length
+frame_shift = features.frame_shift
+num_frames = features.num_frames
+frame_times = features.frame_times
 
-frames = np.array(frames)
-frame_times = np.arange(num_frames) * frame_shift / sample_rate
-
-# محاسبه ZCR
-def calculate_zcr(frame):
-    signs = np.sign(frame)
-    zero_crossings = np.where(np.diff(signs) != 0)[0]
-    zcr = len(zero_crossings) / len(frame)
-    return zcr
-
-zcr_values = np.array([calculate_zcr(frame) for frame in frames])
-
-# محاسبه انرژی کوتاه‌مدت
-short_term_energy = np.array([np.sum(frame ** 2) for frame in frames])
+zcr_values = features.zcr_values
+short_term_energy = features.short_term_energy
 
 # محاسبه آمار برای تعیین آستانه‌ها
-energy_mean = np.mean(short_term_energy)
-energy_std = np.std(short_term_energy)
-zcr_mean = np.mean(zcr_values)
-zcr_std = np.std(zcr_values)
+feature_table = features.feature_table()
+stats = feature_stats(feature_table)
+energy_mean, energy_std = stats['energy']
+zcr_mean, zcr_std = stats['zcr']
 
 print(f"\nآمار انرژی:")
 print(f"میانگین: {energy_mean:.6f}")
@@ -92,16 +48,15 @@ print(f"\nآمار ZCR:")
 print(f"میانگین: {zcr_mean:.4f}")
 print(f"انحراف معیار: {zcr_std:.4f}")
 
-# تعیین آستانه‌ها
+# تعیین آستانه‌ها (تعریف قواعد در classification_rules.ZCR_ENERGY_RULES)
 # سکوت: انرژی پایین
-silence_energy_threshold = energy_mean - 0.5 * energy_std
-
 # واکدار: انرژی بالا و ZCR پایین
-voiced_energy_threshold = energy_mean + 0.3 * energy_std
-voiced_zcr_threshold = zcr_mean - 0.3 * zcr_std
-
 # بی‌واک: انرژی متوسط و ZCR بالا
-unvoiced_zcr_threshold = zcr_mean + 0.3 * zcr_std
+thresholds = ZCR_ENERGY_RULES.compute_thresholds(stats)
+silence_energy_threshold = thresholds['silence_energy']
+voiced_energy_threshold = thresholds['voiced_energy']
+voiced_zcr_threshold = thresholds['voiced_zcr']
+unvoiced_zcr_threshold = thresholds['unvoiced_zcr']
 
 print(f"\nآستانه‌های طبقه‌بندی:")
 print(f"آستانه انرژی سکوت: {silence_energy_threshold:.6f}")
@@ -111,21 +66,8 @@ print(f"آستانه ZCR بی‌واک: {unvoiced_zcr_threshold:.4f}")
 
 # طبقه‌بندی فریم‌ها
 # 0: سکوت, 1: بی‌واک, 2: واکدار
-classification = np.zeros(num_frames, dtype=int)
-
-for i in range(num_frames):
-    energy = short_term_energy[i]
-    zcr = zcr_values[i]
-    
-    # اول سکوت را بررسی می‌کنیم
-    if energy < silence_energy_threshold:
-        classification[i] = 0  # سکوت
-    # سپس واکدار را بررسی می‌کنیم
-    elif energy > voiced_energy_threshold and zcr < voiced_zcr_threshold:
-        classification[i] = 2  # واکدار
-    # در غیر این صورت بی‌واک
-    else:
-        classification[i] = 1  # بی‌واک
+# اول سکوت، سپس واکدار، و در غیر این صورت بی‌واک
+classification = ZCR_ENERGY_RULES.classify(feature_table, thresholds)
 
 # شمارش فریم‌های هر دسته
 silence_count = np.sum(classification == 0)
@@ -146,7 +88,7 @@ plt.figure(figsize=(14, 10))
 # نمودار سیگنال اصلی
 time_axis = np.arange(len(audio_data)) / sample_rate
 plt.subplot(5, 1, 1)
-plt.plot(time_axis, audio_data, 'b-', linewidth=0.5)
+plot_waveform(time_axis, audio_data, 'b-', linewidth=0.5)
 plt.title(farsi_text('سیگنال صوتی اصلی'), fontsize=14)
 plt.xlabel(farsi_text('زمان (ثانیه)'), fontsize=12)
 plt.ylabel(farsi_text('دامنه'), fontsize=12)
@@ -154,7 +96,7 @@ plt.grid(True, alpha=0.3)
 
 # نمودار انرژی
 plt.subplot(5, 1, 2)
-plt.plot(frame_times, short_term_energy, 'b-', linewidth=1.5, label=farsi_text('انرژی'))
+plot_curve(frame_times, short_term_energy, 'b-', linewidth=1.5, label=farsi_text('انرژی'))
 plt.axhline(y=silence_energy_threshold, color='r', linestyle='--', 
             label=farsi_text('آستانه سکوت'), alpha=0.7)
 plt.axhline(y=voiced_energy_threshold, color='g', linestyle='--', 
@@ -167,7 +109,7 @@ plt.grid(True, alpha=0.3)
 
 # نمودار ZCR
 plt.subplot(5, 1, 3)
-plt.plot(frame_times, zcr_values, 'r-', linewidth=1.5, label='ZCR')
+plot_curve(frame_times, zcr_values, 'r-', linewidth=1.5, label='ZCR')
 plt.axhline(y=voiced_zcr_threshold, color='g', linestyle='--', 
             label=farsi_text('آستانه واکدار'), alpha=0.7)
 plt.axhline(y=unvoiced_zcr_threshold, color='orange', linestyle='--', 
@@ -196,19 +138,10 @@ plt.grid(True, alpha=0.3, axis='y')
 
 # نمودار سیگنال با رنگ‌بندی بر اساس طبقه‌بندی
 plt.subplot(5, 1, 5)
-# ایجاد یک سیگنال رنگی بر اساس طبقه‌بندی
-colored_signal = np.zeros_like(audio_data)
-for i in range(num_frames):
-    start = i * frame_shift
-    end = min(start + frame_length, len(audio_data))
-    colored_signal[start:end] = classification[i]
-
-# رسم با رنگ‌بندی
-for i, (color, label) in enumerate(zip(colors, labels)):
-    mask = colored_signal == i
-    if np.any(mask):
-        plt.plot(time_axis[mask], audio_data[mask], 
-                color=color, linewidth=1, label=label, alpha=0.7)
+# رسم هر بازه با رنگ دسته‌اش (بدون بسط برچسب‌ها به نمونه‌ها)
+segments = Segments.from_frame_labels(classification, frame_length, frame_shift, sample_rate,
+                                      num_samples=len(audio_data))
+plot_segments(time_axis, audio_data, segments, colors, labels, linewidth=1, alpha=0.7)
 
 plt.title(farsi_text('سیگنال با رنگ‌بندی بر اساس طبقه‌بندی'), fontsize=14)
 plt.xlabel(farsi_text('زمان (ثانیه)'), fontsize=12)
@@ -216,8 +149,9 @@ plt.ylabel(farsi_text('دامنه'), fontsize=12)
 plt.legend()
 plt.grid(True, alpha=0.3)
 
-plt.tight_layout()
-plt.savefig('part2c_classification.png', dpi=150, bbox_inches='tight')
+with profile_stage('figure'):
+    plt.tight_layout()
+    plt.savefig('part2c_classification.png', dpi=150, bbox_inches='tight')
 print("\nنمودار در فایل 'part2c_classification.png' ذخیره شد.")
 plt.show()
 
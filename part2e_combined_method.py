@@ -5,124 +5,43 @@
 
 import numpy as np
 import matplotlib.pyplot as plt
-import soundfile as sf
-from scipy import signal
-import arabic_reshaper
-from bidi.algorithm import get_display
-
-def farsi_text(text):
-    """تبدیل متن فارسی برای نمایش صحیح در نمودارها"""
-    reshaped_text = arabic_reshaper.reshape(text)  # اصلاح شکل حروف
-    bidi_text = get_display(reshaped_text)  # راست‌چین کردن
-    return bidi_text
-
-# خواندن فایل صوتی
-audio_file = None
-audio_data = None
-sample_rate = None
-
-# تلاش برای خواندن فایل FLAC یا WAV
-for filename in ['audio.flac', 'audio.wav']:
-    try:
-        audio_data, sample_rate = sf.read(filename)
-        audio_file = filename
-        print(f"فایل صوتی با موفقیت خوانده شد: {audio_file}")
-        break
-    except FileNotFoundError:
-        continue
-
-if audio_file is None:
-    print("فایل صوتی یافت نشد. یک سیگنال نمونه ایجاد می‌شود...")
-    sample_rate = 16000
-    duration = 2
-    t = np.linspace(0, duration, sample_rate * duration)
-    audio_data = (np.sin(2 * np.pi * 440 * t) * 0.5 +
-                  np.sin(2 * np.pi * 880 * t) * 0.3 +
-                  np.random.normal(0, 0.1, len(t)))
-    audio_data = audio_data / np.max(np.abs(audio_data))
-
-# تبدیل به مونو در صورت استریو
-if len(audio_data.shape) > 1:
-    audio_data = np.mean(audio_data, axis=1)
+from feature_engine import FeatureExtractor
+from feature_cache import FeatureCache
+from classification_rules import COMBINED_RULES, feature_stats
+from segments import Segments
+from plot_decimation import plot_curve, plot_segments, plot_waveform
+from plot_text import farsi_text
+from stage_profiler import profile_stage
 
 # پارامترهای فریم
 frame_length_ms = 20
-frame_length = int(sample_rate * frame_length_ms / 1000)
 frame_shift_ms = 10
-frame_shift = int(sample_rate * frame_shift_ms / 1000)
-
-# تقسیم به فریم‌ها
-num_frames = int((len(audio_data) - frame_length) / frame_shift) + 1
-frames = []
-
-for i in range(num_frames):
-    start = i * frame_shift
-    end = start + frame_length
-    if end > len(audio_data):
-        frame = np.pad(audio_data[start:], (0, end - len(audio_data)), 'constant')
-    else:
-        frame = audio_data[start:end]
-    frames.append(frame)
-
-frames = np.array(frames)
-frame_times = np.arange(num_frames) * frame_shift / sample_rate
-
-# محاسبه ZCR
-def calculate_zcr(frame):
-    signs = np.sign(frame)
-    zero_crossings = np.where(np.diff(signs) != 0)[0]
-    zcr = len(zero_crossings) / len(frame)
-    return zcr
-
-zcr_values = np.array([calculate_zcr(frame) for frame in frames])
-
-# محاسبه انرژی کوتاه‌مدت
-short_term_energy = np.array([np.sum(frame ** 2) for frame in frames])
-
-# محاسبه اتوکرولیشن
-def calculate_autocorrelation(frame, max_lag=None):
-    if max_lag is None:
-        max_lag = len(frame) // 2
-    
-    frame_normalized = frame - np.mean(frame)
-    autocorr = np.correlate(frame_normalized, frame_normalized, mode='full')
-    autocorr = autocorr[len(autocorr)//2:]
-    autocorr = autocorr[:max_lag+1]
-    
-    if autocorr[0] > 0:
-        autocorr = autocorr / autocorr[0]
-    
-    return autocorr
-
-# محاسبه ویژگی‌های اتوکرولیشن
 min_f0 = 80
 max_f0 = 400
-min_lag = int(sample_rate / max_f0)
-max_lag = int(sample_rate / min_f0)
-
-autocorr_strength = []
-f0_values = []
-
-for frame in frames:
-    autocorr = calculate_autocorrelation(frame, max_lag=max_lag*2)
-    
-    search_range = autocorr[min_lag:max_lag+1]
-    if len(search_range) > 0:
-        peak_idx = np.argmax(search_range) + min_lag
-        peak_value = autocorr[peak_idx]
-        peak_lag = peak_idx
-    else:
-        peak_value = 0
-        peak_lag = 0
-    
-    autocorr_strength.append(peak_value)
-    if peak_lag > 0:
-        f0_values.append(sample_rate / peak_lag)
-    else:
-        f0_values.append(0)
-
-autocorr_strength = np.array(autocorr_strength)
-f0_values = np.array(f0_values)
+
+# جستجوی قله اتوکرولیشن: 'full' همه تاخیرها (نتایج مرجع)؛ 'multirate' درشت (حدود 4 kHz) به ریز،
+# سریع‌تر ولی تقریبی (تاخیر قله چند درصد فریم‌ها و در نتیجه چند برچسب تغییر می‌کند)
+pitch_search = 'full'
+
+# خواندن فایل صوتی، تقسیم به فریم‌ها و محاسبه ZCR، انرژی و اتوکرولیشن با موتور مشترک
+features = FeatureExtractor(frame_length_ms, frame_shift_ms, min_f0, max_f0,
+                            pitch_search=pitch_search).extract_file(cache=FeatureCache())
+if features.audio_file is not None:
+    print(f"فایل صوتی با موفقیت خوانده شد: {features.audio_file}")
+else:
+    print("فایل صوتی یافت نشد. یک سیگنال نمونه ایجاد شد.")
+
+audio_data = features.audio_data
+sample_rate = features.sample_rate
+frame_length = features.frame_length
+frame_shift = features.frame_shift
+num_frames = features.num_frames
+frame_times = features.frame_times
+
+zcr_values = features.zcr_values
+short_term_energy = features.short_term_energy
+autocorr_strength = features.autocorr_strength
+f0_values = features.f0_values
 
 # نرمال‌سازی ویژگی‌ها برای ترکیب
 energy_norm = (short_term_energy - np.min(short_term_energy)) / \
@@ -132,25 +51,21 @@ zcr_norm = (zcr_values - np.min(zcr_values)) / \
 autocorr_norm = (autocorr_strength - np.min(autocorr_strength)) / \
                 (np.max(autocorr_strength) - np.min(autocorr_strength) + 1e-10)
 
-# محاسبه آستانه‌ها
-energy_mean = np.mean(short_term_energy)
-energy_std = np.std(short_term_energy)
-zcr_mean = np.mean(zcr_values)
-zcr_std = np.std(zcr_values)
-autocorr_mean = np.mean(autocorr_strength)
-autocorr_std = np.std(autocorr_strength)
+# محاسبه آستانه‌ها (تعریف قواعد در classification_rules.COMBINED_RULES)
+feature_table = features.feature_table()
+thresholds = COMBINED_RULES.compute_thresholds(feature_stats(feature_table))
 
 # آستانه‌های بهبود یافته با ترکیب روش‌ها
-silence_energy_threshold = energy_mean - 0.5 * energy_std
+silence_energy_threshold = thresholds['silence_energy']
 
 # واکدار: انرژی بالا، ZCR پایین، و اتوکرولیشن قوی
-voiced_energy_threshold = energy_mean + 0.2 * energy_std
-voiced_zcr_threshold = zcr_mean - 0.2 * zcr_std
-voiced_autocorr_threshold = autocorr_mean + 0.2 * autocorr_std
+voiced_energy_threshold = thresholds['voiced_energy']
+voiced_zcr_threshold = thresholds['voiced_zcr']
+voiced_autocorr_threshold = thresholds['voiced_autocorr']
 
 # بی‌واک: انرژی متوسط، ZCR بالا، اتوکرولیشن ضعیف
-unvoiced_zcr_threshold = zcr_mean + 0.2 * zcr_std
-unvoiced_autocorr_threshold = autocorr_mean - 0.2 * autocorr_std
+unvoiced_zcr_threshold = thresholds['unvoiced_zcr']
+unvoiced_autocorr_threshold = thresholds['unvoiced_autocorr']
 
 print(f"\nآستانه‌های ترکیبی:")
 print(f"آستانه انرژی سکوت: {silence_energy_threshold:.6f}")
@@ -162,24 +77,8 @@ print(f"آستانه اتوکرولیشن بی‌واک: {unvoiced_autocorr_thre
 
 # طبقه‌بندی ترکیبی
 # 0: سکوت, 1: بی‌واک, 2: واکدار
-classification_combined = np.zeros(num_frames, dtype=int)
-
-for i in range(num_frames):
-    energy = short_term_energy[i]
-    zcr = zcr_values[i]
-    autocorr = autocorr_strength[i]
-    
-    # اول سکوت را بررسی می‌کنیم
-    if energy < silence_energy_threshold:
-        classification_combined[i] = 0  # سکوت
-    # سپس واکدار را بررسی می‌کنیم (باید همه شرایط را داشته باشد)
-    elif (energy > voiced_energy_threshold and 
-          zcr < voiced_zcr_threshold and 
-          autocorr > voiced_autocorr_threshold):
-        classification_combined[i] = 2  # واکدار
-    # در غیر این صورت بی‌واک
-    else:
-        classification_combined[i] = 1  # بی‌واک
+# اول سکوت، سپس واکدار (باید همه شرایط را داشته باشد)، و در غیر این صورت بی‌واک
+classification_combined = COMBINED_RULES.classify(feature_table, thresholds)
 
 # شمارش فریم‌های هر دسته
 silence_count = np.sum(classification_combined == 0)
@@ -191,6 +90,12 @@ print(f"سکوت: {silence_count} فریم ({silence_count/num_frames*100:.1f}%)
 print(f"بی‌واک: {unvoiced_count} فریم ({unvoiced_count/num_frames*100:.1f}%)")
 print(f"واکدار: {voiced_count} فریم ({voiced_count/num_frames*100:.1f}%)")
 
+# بازه‌های پیوسته هر دسته (به جای برچسب تک‌تک نمونه‌ها)
+segments = Segments.from_frame_labels(classification_combined, frame_length, frame_shift,
+                                      sample_rate, num_samples=len(audio_data))
+print(f"تعداد بازه‌ها: {len(segments)} (سکوت {segments.total_duration(0):.2f}s، "
+      f"بی‌واک {segments.total_duration(1):.2f}s، واکدار {segments.total_duration(2):.2f}s)")
+
 # ایجاد نمودار نهایی
 plt.figure(figsize=(16, 12))
 
@@ -200,7 +105,7 @@ plt.figure(figsize=(16, 12))
 # نمودار سیگنال اصلی
 time_axis = np.arange(len(audio_data)) / sample_rate
 plt.subplot(6, 1, 1)
-plt.plot(time_axis, audio_data, 'b-', linewidth=0.5)
+plot_waveform(time_axis, audio_data, 'b-', linewidth=0.5)
 plt.title(farsi_text('سیگنال صوتی اصلی'), fontsize=14)
 plt.xlabel(farsi_text('زمان (ثانیه)'), fontsize=12)
 plt.ylabel(farsi_text('دامنه'), fontsize=12)
@@ -208,7 +113,7 @@ plt.grid(True, alpha=0.3)
 
 # نمودار انرژی
 plt.subplot(6, 1, 2)
-plt.plot(frame_times, short_term_energy, 'b-', linewidth=1.5, label=farsi_text('انرژی'))
+plot_curve(frame_times, short_term_energy, 'b-', linewidth=1.5, label=farsi_text('انرژی'))
 plt.axhline(y=silence_energy_threshold, color='r', linestyle='--', 
             label=farsi_text('آستانه سکوت'), alpha=0.7)
 plt.axhline(y=voiced_energy_threshold, color='g', linestyle='--', 
@@ -221,7 +126,7 @@ plt.grid(True, alpha=0.3)
 
 # نمودار ZCR
 plt.subplot(6, 1, 3)
-plt.plot(frame_times, zcr_values, 'r-', linewidth=1.5, label='ZCR')
+plot_curve(frame_times, zcr_values, 'r-', linewidth=1.5, label='ZCR')
 plt.axhline(y=voiced_zcr_threshold, color='g', linestyle='--', 
             label=farsi_text('آستانه واکدار'), alpha=0.7)
 plt.axhline(y=unvoiced_zcr_threshold, color='orange', linestyle='--', 
@@ -234,7 +139,7 @@ plt.grid(True, alpha=0.3)
 
 # نمودار قدرت اتوکرولیشن
 plt.subplot(6, 1, 4)
-plt.plot(frame_times, autocorr_strength, 'g-', linewidth=1.5, 
+plot_curve(frame_times, autocorr_strength, 'g-', linewidth=1.5, 
          label=farsi_text('قدرت قله اتوکرولیشن'))
 plt.axhline(y=voiced_autocorr_threshold, color='g', linestyle='--', 
             label=farsi_text('آستانه واکدار'), alpha=0.7)
@@ -265,19 +170,8 @@ plt.grid(True, alpha=0.3, axis='y')
 
 # نمودار نهایی: سیگنال با رنگ‌بندی
 plt.subplot(6, 1, 6)
-# ایجاد یک سیگنال رنگی بر اساس طبقه‌بندی
-colored_signal = np.zeros_like(audio_data)
-for i in range(num_frames):
-    start = i * frame_shift
-    end = min(start + frame_length, len(audio_data))
-    colored_signal[start:end] = classification_combined[i]
-
-# رسم با رنگ‌بندی
-for i, (color, label) in enumerate(zip(colors, labels)):
-    mask = colored_signal == i
-    if np.any(mask):
-        plt.plot(time_axis[mask], audio_data[mask], 
-                color=color, linewidth=1.5, label=label, alpha=0.8)
+# رسم هر بازه با رنگ دسته‌اش (بدون بسط برچسب‌ها به نمونه‌ها)
+plot_segments(time_axis, audio_data, segments, colors, labels, linewidth=1.5, alpha=0.8)
 
 plt.title(farsi_text('سیگنال نهایی با بخش‌های واکدار، بی‌واک و سکوت مشخص‌شده'), 
           fontsize=14)
@@ -286,8 +180,9 @@ plt.ylabel(farsi_text('دامنه'), fontsize=12)
 plt.legend(loc='upper right')
 plt.grid(True, alpha=0.3)
 
-plt.tight_layout()
-plt.savefig('part2e_combined_method.png', dpi=150, bbox_inches='tight')
+with profile_stage('figure'):
+    plt.tight_layout()
+    plt.savefig('part2e_combined_method.png', dpi=150, bbox_inches='tight')
 print("\nنمودار نهایی در فایل 'part2e_combined_method.png' ذخیره شد.")
 plt.show()
 
@@ -296,11 +191,7 @@ plt.figure(figsize=(16, 8))
 
 # نمودار اصلی با رنگ‌بندی
 plt.subplot(2, 1, 1)
-for i, (color, label) in enumerate(zip(colors, labels)):
-    mask = colored_signal == i
-    if np.any(mask):
-        plt.plot(time_axis[mask], audio_data[mask], 
-                color=color, linewidth=2, label=label, alpha=0.9)
+plot_segments(time_axis, audio_data, segments, colors, labels, linewidth=2, alpha=0.9)
 
 plt.title(farsi_text('سیگنال صوتی با طبقه‌بندی: واکدار (سبز)، بی‌واک (نارنجی)، سکوت (خاکستری)'), 
           fontsize=16, fontweight='bold')
@@ -312,9 +203,9 @@ plt.grid(True, alpha=0.3)
 # نمودار ویژگی‌های ترکیبی
 plt.subplot(2, 1, 2)
 ax1 = plt.gca()
-ax1.plot(frame_times, energy_norm, 'b-', linewidth=1.5, label=farsi_text('انرژی (نرمال‌سازی)'), alpha=0.7)
-ax1.plot(frame_times, 1 - zcr_norm, 'r-', linewidth=1.5, label=farsi_text('1-ZCR (نرمال‌سازی)'), alpha=0.7)
-ax1.plot(frame_times, autocorr_norm, 'g-', linewidth=1.5, label=farsi_text('اتوکرولیشن (نرمال‌سازی)'), alpha=0.7)
+plot_curve(frame_times, energy_norm, 'b-', linewidth=1.5, label=farsi_text('انرژی (نرمال‌سازی)'), alpha=0.7, ax=ax1)
+plot_curve(frame_times, 1 - zcr_norm, 'r-', linewidth=1.5, label=farsi_text('1-ZCR (نرمال‌سازی)'), alpha=0.7, ax=ax1)
+plot_curve(frame_times, autocorr_norm, 'g-', linewidth=1.5, label=farsi_text('اتوکرولیشن (نرمال‌سازی)'), alpha=0.7, ax=ax1)
 ax1.set_xlabel(farsi_text('زمان (ثانیه)'), fontsize=14)
 ax1.set_ylabel(farsi_text('مقدار نرمال‌سازی شده'), fontsize=14)
 ax1.legend(loc='upper right', fontsize=11)
@@ -330,12 +221,15 @@ for i, (color, label) in enumerate(zip(colors, labels)):
 plt.title(farsi_text('ویژگی‌های ترکیبی و طبقه‌بندی نهایی'), 
           fontsize=16, fontweight='bold')
 
-plt.tight_layout()
-plt.savefig('part2e_final_result.png', dpi=150, bbox_inches='tight')
+with profile_stage('figure'):
+    plt.tight_layout()
+    plt.savefig('part2e_final_result.png', dpi=150, bbox_inches='tight')
 print("نمودار نهایی خلاصه در فایل 'part2e_final_result.png' ذخیره شد.")
 plt.show()
 
 # ذخیره نتایج نهایی
 np.save('classification_combined.npy', classification_combined)
-print("\nنتایج نهایی در فایل 'classification_combined.npy' ذخیره شد.")
+segments.write_label_track('part2e_segments.txt', COMBINED_RULES.label_names)
+print("\nنتایج نهایی در فایل‌های 'classification_combined.npy' و 'part2e_segments.txt' "
+      "(بازه‌ها با قالب برچسب Audacity) ذخیره شد.")
 
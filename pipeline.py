@@ -0,0 +1,274 @@
+"""
+اجرای افزایشی مراحل پروژه (part1a تا part2e و گزارش) بر اساس گراف وابستگی
+هر مرحله ورودی‌ها (فایل صوتی، اسکریپت، ماژول‌های محلی که import می‌کند و خروجی مراحل دیگر)
+و خروجی‌های مشخص دارد. اثر انگشت (SHA-256) ورودی‌ها و خروجی‌های هر اجرا در
+.pipeline_state.json ثبت می‌شود و فقط مراحلی دوباره اجرا می‌شوند که ورودی‌شان تغییر کرده
+یا خروجی‌شان حذف یا دستکاری شده است. مراحل مستقل با render_figures به صورت موازی و
+بدون نمایش اجرا می‌شوند؛ مرحله گزارش پس از همه نمودارها.
+
+مثلاً تغییر یک ضریب در part2e_combined_method.py فقط part2e و گزارش را دوباره اجرا می‌کند
+و سیگنال هم به لطف حافظه نهان ویژگی‌ها دوباره خوانده نمی‌شود.
+
+اجرا:
+    python pipeline.py                 # اجرای مراحل کهنه
+    python pipeline.py --dry-run       # فقط نمایش مراحلی که اجرا می‌شوند
+    python pipeline.py --force part2e  # اجرای اجباری یک مرحله
+    python pipeline.py --profile profile.jsonl
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+
+from feature_cache import file_hash
+from feature_engine import DEFAULT_AUDIO_FILES
+from frame_store import DEFAULT_FRAME_STORE
+from generate_report import REPORT_FILE
+from render_figures import (FIGURE_SCRIPTS, init_worker, render_script, use_headless_backend,
+                            warm_cache, worker_initargs)
+from stage_profiler import enable_profiling, flush_profile
+
+DEFAULT_STATE_FILE = '.pipeline_state.json'
+
+
+@dataclass
+class Stage:
+    """یک مرحله: اسکریپت، خروجی‌ها و ورودی‌های داده (فایل‌هایی غیر از کد)"""
+    name: str
+    script: str
+    outputs: tuple
+    inputs: tuple = DEFAULT_AUDIO_FILES
+    uses_features: bool = True
+
+
+STAGES = (
+    Stage('part1a', 'part1a_read_audio.py', FIGURE_SCRIPTS['part1a_read_audio.py'],
+          uses_features=False),
+    Stage('part1b', 'part1b_short_term_energy.py', FIGURE_SCRIPTS['part1b_short_term_energy.py']),
+    Stage('part2a', 'part2a_frame_segmentation.py',
+          FIGURE_SCRIPTS['part2a_frame_segmentation.py'] + (DEFAULT_FRAME_STORE, 'frame_times.npy')),
+    Stage('part2b', 'part2b_zcr_calculation.py',
+          FIGURE_SCRIPTS['part2b_zcr_calculation.py'] + ('zcr_values.npy',)),
+    Stage('part2c', 'part2c_classification.py',
+          FIGURE_SCRIPTS['part2c_classification.py'] + ('classification.npy',)),
+    Stage('part2d', 'part2d_autocorrelation.py',
+          FIGURE_SCRIPTS['part2d_autocorrelation.py'] +
+          ('autocorr_strength.npy', 'f0_values.npy', 'classification_autocorr.npy')),
+    Stage('part2e', 'part2e_combined_method.py',
+          FIGURE_SCRIPTS['part2e_combined_method.py'] +
+          ('classification_combined.npy', 'part2e_segments.txt')),
+    Stage('report', 'generate_report.py', (REPORT_FILE,),
+          inputs=tuple(figure for figures in FIGURE_SCRIPTS.values() for figure in figures),
+          uses_features=False),
+)
+
+
+def local_modules(script, directory='.'):
+    """فایل‌های ماژول‌های محلی که اسکریپت به طور مستقیم یا غیرمستقیم import می‌کند"""
+    found = []
+    pending = [script]
+    while pending:
+        path = pending.pop()
+        with open(path, encoding='utf-8') as source:
+            tree = ast.parse(source.read(), path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                module_path = os.path.join(directory, f"{name.split('.')[0]}.py")
+                if os.path.exists(module_path) and module_path not in found:
+                    found.append(module_path)
+                    pending.append(module_path)
+    return sorted(found)
+
+
+def stage_dependencies(stages=STAGES):
+    """وابستگی مراحل: مرحله‌ای که یکی از ورودی‌های مرحله دیگر را می‌سازد پیش از آن اجرا می‌شود"""
+    producers = {output: stage.name for stage in stages for output in stage.outputs}
+    return {stage.name: sorted({producers[name] for name in stage.inputs if name in producers})
+            for stage in stages}
+
+
+class Pipeline:
+    """
+    اجرای افزایشی و موازی مراحل با ثبت اثر انگشت در فایل وضعیت
+    ترتیب stages باید با وابستگی‌ها سازگار باشد (هر مرحله پس از سازنده ورودی‌هایش).
+    """
+
+    def __init__(self, stages=STAGES, state_file=DEFAULT_STATE_FILE):
+        self.stages = {stage.name: stage for stage in stages}
+        self.dependencies = stage_dependencies(stages)
+        self.state_file = state_file
+        self._state = self._read_state()
+        self._pending_inputs = {}
+
+    def _read_state(self):
+        try:
+            with open(self.state_file, encoding='utf-8') as state_file:
+                return json.load(state_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {'stages': {}, 'files': {}}
+
+    def _write_state(self):
+        temporary = f"{self.state_file}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as state_file:
+            json.dump(self._state, state_file, ensure_ascii=False, indent=1)
+        os.replace(temporary, self.state_file)
+
+    def digest(self, path):
+        """
+        هش محتوای فایل یا پوشه (None اگر وجود نداشته باشد)
+        اگر زمان تغییر و اندازه فایل عوض نشده باشد هش قبلی استفاده می‌شود.
+        """
+        if os.path.isdir(path):
+            combined = hashlib.sha256()
+            for root, _, names in sorted(os.walk(path)):
+                for name in sorted(names):
+                    child = os.path.join(root, name)
+                    combined.update(f"{os.path.relpath(child, path)}:{self.digest(child)};".encode())
+            return combined.hexdigest()
+        if not os.path.exists(path):
+            return None
+        stat = os.stat(path)
+        signature = [stat.st_mtime_ns, stat.st_size]
+        known = self._state['files'].get(os.path.abspath(path))
+        if known is not None and known[:2] == signature:
+            return known[2]
+        digest = file_hash(path)
+        self._state['files'][os.path.abspath(path)] = signature + [digest]
+        return digest
+
+    def input_fingerprint(self, stage):
+        """اثر انگشت ورودی‌های مرحله: اسکریپت، ماژول‌های محلی و ورودی‌های داده"""
+        paths = [stage.script] + local_modules(stage.script) + list(stage.inputs)
+        description = json.dumps([[path, self.digest(path)] for path in paths])
+        return hashlib.sha256(description.encode('utf-8')).hexdigest()
+
+    def stale_reason(self, stage):
+        """دلیل کهنه بودن مرحله یا None اگر خروجی‌هایش به‌روز باشند"""
+        record = self._state['stages'].get(stage.name)
+        if record is None:
+            return 'اجرا نشده'
+        if record['inputs'] != self.input_fingerprint(stage):
+            return 'ورودی تغییر کرده'
+        for output in stage.outputs:
+            if self.digest(output) != record['outputs'].get(output):
+                return f"خروجی {output} حذف یا تغییر کرده"
+        return None
+
+    def _record(self, stage, fingerprint):
+        self._state['stages'][stage.name] = {
+            'inputs': fingerprint,
+            'outputs': {output: self.digest(output) for output in stage.outputs},
+            'finished': time.time(),
+        }
+        self._write_state()
+
+    def run(self, workers=None, force=(), dry_run=False, log=print):
+        """
+        اجرای مراحل کهنه به ترتیب وابستگی؛ مراحل آماده هم‌زمان در ProcessPool اجرا می‌شوند
+        force: نام مراحلی که بدون توجه به اثر انگشت اجرا می‌شوند
+        مراحل وابسته به مرحله ناموفق اجرا نمی‌شوند.
+        خروجی: نتیجه render_script مراحل اجراشده
+        """
+        if dry_run:
+            self._dry_run(force, log)
+            return []
+
+        use_headless_backend()
+        warmed = False
+        done, failed, results, running = set(), set(), [], {}
+        workers = workers or min(len(self.stages), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=worker_initargs()) as pool:
+            while len(done) < len(self.stages):
+                for name, stage in self.stages.items():
+                    dependencies = self.dependencies[name]
+                    if (name in done or name in running.values() or
+                            not all(dependency in done for dependency in dependencies)):
+                        continue
+                    if any(dependency in failed for dependency in dependencies):
+                        log(f"{name}: اجرا نشد (مرحله پیشین ناموفق بود)")
+                        done.add(name)
+                        failed.add(name)
+                        continue
+                    # وضعیت پس از پایان مراحل پیشین بررسی می‌شود تا خروجی تازه آن‌ها دیده شود
+                    reason = 'اجرای اجباری' if name in force else self.stale_reason(stage)
+                    if reason is None:
+                        log(f"{name}: به‌روز")
+                        done.add(name)
+                        continue
+                    if stage.uses_features and not warmed:
+                        warm_cache()
+                        flush_profile('warm_cache')
+                        warmed = True
+                    log(f"{name}: اجرا ({reason})")
+                    future = pool.submit(render_script, stage.script)
+                    running[future] = name
+                    self._pending_inputs[name] = self.input_fingerprint(stage)
+                if not running:
+                    continue
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    result = future.result()
+                    results.append(result)
+                    done.add(name)
+                    if 'error' in result:
+                        failed.add(name)
+                        log(f"{name}: خطا\n{result['error']}")
+                    else:
+                        self._record(self.stages[name], self._pending_inputs.pop(name))
+                        log(f"{name}: پایان در {result['seconds']:.2f} ثانیه")
+        self._write_state()
+        return results
+
+    def _dry_run(self, force, log):
+        """نمایش وضعیت مراحل؛ مرحله‌ای که ورودی‌اش را مرحله کهنه دیگری می‌سازد نیز کهنه فرض می‌شود"""
+        reasons = {}
+        for name, stage in self.stages.items():
+            reason = 'اجرای اجباری' if name in force else self.stale_reason(stage)
+            stale_upstream = [dependency for dependency in self.dependencies[name]
+                              if reasons.get(dependency)]
+            if reason is None and stale_upstream:
+                reason = f"مرحله {stale_upstream[0]} اجرا می‌شود"
+            reasons[name] = reason
+            log(f"{name}: {reason or 'به‌روز'}")
+
+def main():
+    parser = argparse.ArgumentParser(description='اجرای افزایشی مراحل پروژه')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='تعداد فرآیندها (پیش‌فرض: تعداد CPU)')
+    parser.add_argument('--force', nargs='*', default=(), choices=[stage.name for stage in STAGES],
+                        help='مراحلی که بدون توجه به اثر انگشت اجرا می‌شوند')
+    parser.add_argument('--dry-run', action='store_true', help='فقط نمایش وضعیت مراحل')
+    parser.add_argument('--state', default=DEFAULT_STATE_FILE, help='فایل وضعیت اجرا')
+    parser.add_argument('--profile', default=None, metavar='TRACE',
+                        help='ثبت زمان و حافظه مراحل هر اسکریپت در فایل JSON Lines')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='اندازه‌گیری بیشینه حافظه هر مرحله با tracemalloc (کندتر)')
+    args = parser.parse_args()
+
+    if args.profile:
+        enable_profiling(args.profile, args.profile_memory)
+
+    start = time.perf_counter()
+    results = Pipeline(state_file=args.state).run(args.workers, set(args.force), args.dry_run)
+    if not args.dry_run:
+        failed = sum('error' in result for result in results)
+        print(f"مراحل اجراشده: {len(results)} (ناموفق: {failed}) در "
+              f"{time.perf_counter() - start:.2f} ثانیه")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+کاهش نقاط نمودار پیش از رسم با matplotlib
+برای شکل موج، کمینه و بیشینه نمونه‌ها در هر ستون پیکسل (پوش min/max) نگه داشته می‌شود
+و برای منحنی ویژگی‌ها نمونه‌برداری LTTB (Largest-Triangle-Three-Buckets) به کار می‌رود.
+شکل نمودار در عرض تصویر تغییری نمی‌کند ولی تعداد نقاط رسم‌شده به طول فایل بستگی ندارد.
+
+مثال:
+    plot_waveform(time_axis, audio_data, 'b-', linewidth=0.5)
+    plot_curve(frame_times, short_term_energy, 'b-', linewidth=1.5, ax=ax1)
+"""
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+# تعداد ستون‌های پوش min/max؛ بیشتر از عرض پیکسلی پهن‌ترین نمودار (16 اینچ × 150 dpi)
+DEFAULT_ENVELOPE_BINS = 2500
+
+# حداکثر نقاط منحنی‌های فریمی پس از LTTB
+DEFAULT_CURVE_POINTS = 4000
+
+
+def minmax_envelope(x, y, num_bins=DEFAULT_ENVELOPE_BINS):
+    """
+    پوش min/max: محور x (صعودی) به num_bins بازه هم‌عرض تقسیم و در هر بازه اولین و آخرین
+    نقطه به همراه نقطه کمینه و بیشینه به ترتیب زمانی نگه داشته می‌شوند (خط اتصال بازه‌های
+    مجاور مانند رسم کامل است). بازه‌های خالی (مثلاً پس از ماسک) حذف می‌شوند و بازه‌ای که همه
+    مقادیرش NaN است یک نقطه NaN می‌گیرد تا گسستگی خط حفظ شود.
+    خروجی: (x, y) با حداکثر 4 × num_bins نقطه؛ ورودی کوتاه بدون تغییر برمی‌گردد.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if len(y) <= 4 * num_bins:
+        return x, y
+
+    edges = np.linspace(x[0], x[-1], num_bins + 1)[:-1]
+    starts = np.unique(np.searchsorted(x, edges, side='left'))
+    ends = np.append(starts[1:], len(y))
+
+    # حلقه روی ستون‌ها (نه نمونه‌ها)؛ argmin/argmax هر ستون روی یک view بدون کپی
+    has_nan = np.issubdtype(y.dtype, np.floating) and np.isnan(y).any()
+    find_min, find_max = (np.nanargmin, np.nanargmax) if has_nan else (np.argmin, np.argmax)
+    keep = []
+    for start, end in zip(starts, ends):
+        column = y[start:end]
+        if has_nan and np.isnan(column).all():
+            keep.append(start)
+            continue
+        keep.extend((start, start + find_min(column), start + find_max(column), end - 1))
+
+    keep = np.unique(keep)
+    return x[keep], y[keep]
+
+
+def lttb(x, y, num_points=DEFAULT_CURVE_POINTS):
+    """
+    نمونه‌برداری LTTB: نقطه اول و آخر حفظ و بقیه به num_points - 2 سطل تقسیم می‌شوند؛ از هر سطل
+    نقطه‌ای انتخاب می‌شود که بزرگ‌ترین مثلث را با نقطه انتخابی قبلی و میانگین سطل بعدی بسازد.
+    حلقه روی سطل‌هاست (نه نمونه‌ها) و داخل هر سطل برداری است.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    num_samples = len(y)
+    if num_points >= num_samples or num_points < 3:
+        return x, y
+
+    bounds = np.linspace(1, num_samples - 1, num_points - 1).astype(int)
+    counts = np.diff(bounds)
+    x_float = x.astype(float)
+    y_float = y.astype(float)
+    # بدون نقطه آخر تا سطل آخر (مانند counts) در bounds[-1] تمام شود و x[-1] را شامل نشود
+    mean_x = np.add.reduceat(x_float[:-1], bounds[:-1]) / counts
+    mean_y = np.add.reduceat(y_float[:-1], bounds[:-1]) / counts
+    mean_x = np.append(mean_x[1:], x_float[-1])
+    mean_y = np.append(mean_y[1:], y_float[-1])
+
+    selected = np.empty(num_points, dtype=int)
+    selected[0] = 0
+    selected[-1] = num_samples - 1
+    previous = 0
+    for bucket in range(num_points - 2):
+        low, high = bounds[bucket], bounds[bucket + 1]
+        anchor_x, anchor_y = x_float[previous], y_float[previous]
+        area = np.abs((anchor_x - mean_x[bucket]) * (y_float[low:high] - anchor_y) -
+                      (anchor_x - x_float[low:high]) * (mean_y[bucket] - anchor_y))
+        previous = low + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return x[selected], y[selected]
+
+
+def plot_waveform(x, y, *args, ax=None, num_bins=DEFAULT_ENVELOPE_BINS, **kwargs):
+    """رسم شکل موج با پوش min/max (همان آرگومان‌های plt.plot)"""
+    ax = ax if ax is not None else plt.gca()
+    return ax.plot(*minmax_envelope(x, y, num_bins), *args, **kwargs)
+
+
+def plot_curve(x, y, *args, ax=None, max_points=DEFAULT_CURVE_POINTS, **kwargs):
+    """
+    رسم منحنی فریمی با LTTB؛ منحنی دارای NaN (مانند F0 فریم‌های بی‌واک) با پوش min/max
+    کاهش می‌یابد تا گسستگی‌ها حفظ شوند.
+    """
+    ax = ax if ax is not None else plt.gca()
+    y = np.asarray(y)
+    if np.issubdtype(y.dtype, np.floating) and not np.all(np.isfinite(y)):
+        points = minmax_envelope(x, y, max_points // 4)
+    else:
+        points = lttb(x, y, max_points)
+    return ax.plot(*points, *args, **kwargs)
+
+
+def plot_segments(x, y, segments, colors, labels, ax=None, num_bins=DEFAULT_ENVELOPE_BINS, **kwargs):
+    """
+    رسم شکل موج با رنگ هر دسته روی بازه‌های segments (starts/ends/labels برحسب نمونه)، بدون
+    بسط برچسب‌ها به نمونه‌ها: پوش min/max هر بازه جدا محاسبه می‌شود (ستون‌ها به نسبت طول بازه)
+    و بازه‌های هم‌دسته با NaN از هم جدا و با یک فراخوانی plot رسم می‌شوند.
+    colors و labels به ترتیب شماره دسته‌اند؛ دسته بدون بازه رسم نمی‌شود.
+    """
+    ax = ax if ax is not None else plt.gca()
+    x = np.asarray(x)
+    y = np.asarray(y)
+    total = max(len(y), 1)
+    lines = []
+    for value, (color, label) in enumerate(zip(colors, labels)):
+        runs = np.flatnonzero(segments.labels == value)
+        if len(runs) == 0:
+            continue
+        parts_x, parts_y = [], []
+        for run in runs:
+            start, end = segments.starts[run], segments.ends[run]
+            bins = max(1, round(num_bins * (end - start) / total))
+            run_x, run_y = minmax_envelope(x[start:end], y[start:end], bins)
+            parts_x += [run_x, [np.nan]]
+            parts_y += [run_y, [np.nan]]
+        lines += ax.plot(np.concatenate(parts_x), np.concatenate(parts_y), color=color, label=label,
+                         **kwargs)
+    return lines
@@ -0,0 +1,19 @@
+"""
+متن فارسی نمودارها
+شکل‌دهی حروف (arabic_reshaper) و ترتیب راست به چپ (bidi) برای هر متن فقط یک بار انجام
+و نتیجه در حافظه فرآیند نگه داشته می‌شود؛ برچسب‌های تکراری (محور زمان، دامنه، نام دسته‌ها)
+در همه نمودارهای یک فرآیند دوباره شکل‌دهی نمی‌شوند.
+"""
+
+from functools import lru_cache
+
+import arabic_reshaper
+from bidi.algorithm import get_display
+
+
+@lru_cache(maxsize=None)
+def farsi_text(text):
+    """تبدیل متن فارسی برای نمایش صحیح در نمودارها"""
+    reshaped_text = arabic_reshaper.reshape(text)  # اصلاح شکل حروف
+    bidi_text = get_display(reshaped_text)  # راست‌چین کردن
+    return bidi_text
@@ -0,0 +1,212 @@
+"""
+تشخیص فعالیت صوتی (VAD) بلادرنگ با طبقه‌بند ترکیبی بخش 2e
+بلوک‌های PCM با اندازه ثابت دریافت و برای هر جابجایی فریم (10 میلی‌ثانیه) یک برچسب
+سکوت/بی‌واک/واکدار صادر می‌شود. پیش‌نگری (lookahead) محدود به frame_length - frame_shift
+نمونه است و آستانه‌ها با آمار برخط (online_stats) به‌روز می‌شوند.
+زمان پردازش هر فریم ثبت و صدک‌های آن (p50/p95/p99) گزارش می‌شود.
+
+اجرا:
+    # ورودی خام PCM 16 بیتی مونو از stdin (مثلاً از arecord یا ffmpeg)
+    arecord -f S16_LE -r 16000 -c 1 -t raw | python realtime_vad.py --rate 16000
+    # بازپخش فایل با ساعت شبیه‌سازی‌شده برای آزمون بار بدون میکروفون
+    python realtime_vad.py --replay audio.flac --speed 20
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import soundfile as sf
+
+from classification_rules import COMBINED_RULES
+from feature_engine import FeatureExtractor
+from online_stats import OnlineClassifier
+
+# نیمه‌عمر پیش‌فرض آمار آستانه‌ها در حالت زنده (فریم؛ حدود 30 ثانیه با جابجایی 10 ms)
+DEFAULT_HALF_LIFE = 3000
+
+
+class RealtimeVAD:
+    """
+    طبقه‌بند جریانی فریم به فریم برای ورودی بلوکی
+    push(block) نمونه‌های جدید را می‌گیرد و برچسب همه فریم‌هایی را که کامل شده‌اند برمی‌گرداند.
+    """
+
+    def __init__(self, sample_rate, extractor=None, rule_set=COMBINED_RULES,
+                 half_life=DEFAULT_HALF_LIFE):
+        self.sample_rate = sample_rate
+        self.extractor = extractor or FeatureExtractor()
+        # ورودی بلوکی مونو است؛ آمار برخط برای ویژگی‌های جدای کانال‌ها اینجا پشتیبانی نمی‌شود
+        if not self.extractor.mono:
+            raise ValueError("RealtimeVAD فقط ورودی مونو می‌پذیرد "
+                             f"(channels={self.extractor.channels!r})")
+        self.frame_length, self.frame_shift, _, _ = self.extractor.frame_geometry(sample_rate)
+        self.classifier = OnlineClassifier(rule_set, half_life)
+        self.next_frame = 0
+        self.latencies = []
+        self._buffer = np.zeros(0)
+
+    @property
+    def lookahead(self):
+        """پیش‌نگری الگوریتم به ثانیه: نمونه‌های لازم پس از پایان هر جابجایی فریم"""
+        return (self.frame_length - self.frame_shift) / self.sample_rate
+
+    def push(self, block, arrival_time=None):
+        """
+        افزودن یک بلوک نمونه (مونو) و طبقه‌بندی فریم‌های کامل‌شده
+        arrival_time زمان رسیدن بلوک (perf_counter) است و تأخیر هر فریم از آن اندازه‌گیری می‌شود.
+        خروجی: (شماره فریم‌ها، زمان شروع فریم‌ها، برچسب‌ها)
+        """
+        if arrival_time is None:
+            arrival_time = time.perf_counter()
+        self._buffer = np.concatenate([self._buffer, block])
+
+        if len(self._buffer) < self.frame_length:
+            return np.zeros(0, dtype=int), np.zeros(0), np.zeros(0, dtype=int)
+
+        num_frames = (len(self._buffer) - self.frame_length) // self.frame_shift + 1
+        samples = self._buffer[:(num_frames - 1) * self.frame_shift + self.frame_length]
+        features = self.extractor.extract(samples, self.sample_rate, start_frame=self.next_frame)
+        labels = self.classifier.update(features.feature_table())
+
+        # نگه داشتن نمونه‌های لازم برای فریم‌های بعدی
+        self._buffer = self._buffer[num_frames * self.frame_shift:]
+        frame_indices = self.next_frame + np.arange(num_frames)
+        self.next_frame += num_frames
+
+        latency = time.perf_counter() - arrival_time
+        self.latencies.extend([latency] * num_frames)
+        return frame_indices, features.frame_times, labels
+
+
+def latency_percentiles(latencies):
+    """صدک‌های تأخیر به میلی‌ثانیه"""
+    if len(latencies) == 0:
+        return {}
+    latencies = np.asarray(latencies) * 1000
+    return {
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'max_ms': float(np.max(latencies)),
+    }
+
+
+class SimulatedClock:
+    """
+    ساعت شبیه‌سازی‌شده برای بازپخش فایل
+    بلوک k در زمان مجازی (k+1) × مدت بلوک / speed می‌رسد؛ اگر پردازش بلوک قبلی هنوز تمام نشده باشد
+    بلوک در صف می‌ماند و زمان انتظار در تأخیر فریم‌ها حساب می‌شود.
+    """
+
+    def __init__(self, block_duration, speed=1.0):
+        self.interval = block_duration / speed
+        self.now = 0.0
+        self.blocks = 0
+
+    def next_arrival(self):
+        """زمان رسیدن بلوک بعدی؛ ساعت تا آن زمان (یا پایان پردازش قبلی) جلو می‌رود"""
+        self.blocks += 1
+        arrival = self.blocks * self.interval
+        self.now = max(self.now, arrival)
+        return arrival
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def replay_file(filename, block_ms=10, speed=1.0, rule_set=COMBINED_RULES,
+                half_life=DEFAULT_HALF_LIFE, on_labels=None):
+    """
+    بازپخش فایل صوتی به صورت بلوک‌های block_ms میلی‌ثانیه‌ای با ساعت شبیه‌سازی‌شده
+    تأخیر هر فریم = زمان انتظار در صف + زمان پردازش واقعی بلوک
+    خروجی: گزارش صدک‌های تأخیر، تعداد بلوک‌های دیرکرده و ضریب بلادرنگ
+    """
+    sample_rate = sf.info(filename).samplerate
+    blocksize = max(1, int(sample_rate * block_ms / 1000))
+    vad = RealtimeVAD(sample_rate, rule_set=rule_set, half_life=half_life)
+    clock = SimulatedClock(blocksize / sample_rate, speed)
+
+    latencies = []
+    missed_deadlines = 0
+    processing_time = 0.0
+    for block in sf.blocks(filename, blocksize=blocksize):
+        if block.ndim > 1:
+            block = np.mean(block, axis=1)
+        arrival = clock.next_arrival()
+        start = time.perf_counter()
+        frame_indices, frame_times, labels = vad.push(block, arrival_time=start)
+        elapsed = time.perf_counter() - start
+
+        processing_time += elapsed
+        clock.advance(elapsed)
+        latency = clock.now - arrival
+        if latency > clock.interval:
+            missed_deadlines += 1
+        latencies.extend([latency] * len(labels))
+        if on_labels is not None and len(labels):
+            on_labels(frame_times, labels)
+
+    audio_duration = clock.blocks * blocksize / sample_rate
+    report = latency_percentiles(latencies)
+    report.update({
+        'frames': len(latencies),
+        'blocks': clock.blocks,
+        'missed_deadlines': missed_deadlines,
+        'lookahead_ms': vad.lookahead * 1000,
+        'processing_ms_per_frame': processing_time / max(1, len(latencies)) * 1000,
+        'real_time_factor': processing_time / audio_duration if audio_duration else 0.0,
+    })
+    return report
+
+
+def run_stdin(sample_rate, block_ms=10, channels=1, rule_set=COMBINED_RULES,
+              half_life=DEFAULT_HALF_LIFE, output=sys.stdout):
+    """خواندن PCM خام 16 بیتی از stdin و چاپ برچسب هر فریم (زمان، برچسب)"""
+    blocksize = max(1, int(sample_rate * block_ms / 1000))
+    block_bytes = blocksize * channels * 2
+    vad = RealtimeVAD(sample_rate, rule_set=rule_set, half_life=half_life)
+    names = rule_set.label_names
+
+    stream = sys.stdin.buffer
+    while True:
+        data = stream.read(block_bytes)
+        if not data:
+            break
+        arrival = time.perf_counter()
+        # تبدیل مانند soundfile: PCM_16 تقسیم بر 32768
+        block = np.frombuffer(data[:len(data) - len(data) % (2 * channels)], dtype='<i2')
+        block = block.reshape(-1, channels).mean(axis=1) / 32768.0
+        _, frame_times, labels = vad.push(block, arrival_time=arrival)
+        for frame_time, label in zip(frame_times, labels):
+            output.write(f"{frame_time:.2f}\t{names.get(label, label)}\n")
+        output.flush()
+
+    return latency_percentiles(vad.latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='تشخیص فعالیت صوتی بلادرنگ')
+    parser.add_argument('--rate', type=int, default=16000, help='نرخ نمونه‌برداری ورودی stdin')
+    parser.add_argument('--channels', type=int, default=1, help='تعداد کانال‌های ورودی stdin')
+    parser.add_argument('--block-ms', type=float, default=10, help='اندازه بلوک ورودی (ms)')
+    parser.add_argument('--half-life', type=float, default=DEFAULT_HALF_LIFE,
+                        help='نیمه‌عمر آمار آستانه‌ها بر حسب فریم')
+    parser.add_argument('--replay', help='بازپخش فایل با ساعت شبیه‌سازی‌شده به جای stdin')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='سرعت بازپخش نسبت به زمان واقعی (برای آزمون بار)')
+    args = parser.parse_args()
+
+    if args.replay:
+        report = replay_file(args.replay, args.block_ms, args.speed, half_life=args.half_life)
+    else:
+        report = run_stdin(args.rate, args.block_ms, args.channels, half_life=args.half_life)
+
+    summary = ', '.join(f"{key}={value:.3f}" if isinstance(value, float) else f"{key}={value}"
+                        for key, value in report.items())
+    print(summary, file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+ساخت همه نمودارهای part*.png بدون نمایش (headless) و به صورت موازی
+هر اسکریپت در یک فرآیند کارگر با backend غیرتعاملی Agg اجرا می‌شود، پس plt.show() چیزی
+نمایش نمی‌دهد و اجرا متوقف نمی‌شود. اسکریپت‌ها مستقل‌اند و هم‌زمان اجرا می‌شوند، بنابراین
+زمان کل تقریباً برابر کندترین نمودار است نه مجموع همه. ویژگی‌ها پیش از شروع یک بار در
+حافظه نهان ساخته می‌شوند تا کارگرها همه از همان مدخل بخوانند. فرآیندهای کارگر بین
+اسکریپت‌ها باقی می‌مانند و متن‌های فارسی شکل‌دهی‌شده (farsi_text) را دوباره محاسبه نمی‌کنند.
+خروجی چاپی هر اسکریپت در فایل <نام اسکریپت>.log ذخیره می‌شود.
+با --profile زمان و حافظه مراحل هر اسکریپت (stage_profiler) در یک فایل JSON Lines ثبت می‌شود.
+
+اجرا:
+    python render_figures.py
+    python render_figures.py --workers 4
+    python render_figures.py part2d_autocorrelation.py part2e_combined_method.py
+    python render_figures.py --profile profile.jsonl
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import runpy
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+
+from feature_cache import FeatureCache
+from feature_engine import FeatureExtractor
+from stage_profiler import active_profiler, enable_profiling, flush_profile, profile_stage
+
+# اسکریپت‌ها و نمودارهایی که هر کدام می‌سازد (به ترتیب اجرای معمول)
+FIGURE_SCRIPTS = {
+    'part1a_read_audio.py': ('part1a_audio_display.png',),
+    'part1b_short_term_energy.py': ('part1b_short_term_energy.png',),
+    'part2a_frame_segmentation.py': ('part2a_frame_segmentation.png',),
+    'part2b_zcr_calculation.py': ('part2b_zcr_calculation.png',),
+    'part2c_classification.py': ('part2c_classification.png',),
+    'part2d_autocorrelation.py': ('part2d_autocorrelation.png',),
+    'part2e_combined_method.py': ('part2e_combined_method.png', 'part2e_final_result.png'),
+}
+
+# پیکربندی‌های استخراج ویژگی اسکریپت‌ها (همه با پارامترهای پیش‌فرض)
+WARM_EXTRACTORS = (FeatureExtractor(),)
+
+
+def use_headless_backend():
+    """backend غیرتعاملی Agg؛ باید پیش از اولین import از matplotlib.pyplot فراخوانی شود"""
+    matplotlib.use('Agg')
+
+
+def init_worker(trace_file=None, memory=False):
+    """مقداردهی فرآیند کارگر: backend بدون نمایش و در صورت نیاز اندازه‌گیری مراحل"""
+    use_headless_backend()
+    if trace_file:
+        enable_profiling(trace_file, memory)
+
+
+def worker_initargs():
+    """آرگومان‌های init_worker؛ کارگرها همان فایل trace فرآیند اصلی را ادامه می‌دهند"""
+    profiler = active_profiler()
+    return (profiler.trace_file, profiler.memory) if profiler else ()
+
+
+def warm_cache(cache=None):
+    """ساخت مدخل‌های حافظه نهان پیش از اجرای موازی تا کارگرها هم‌زمان آن‌ها را ننویسند"""
+    cache = cache or FeatureCache()
+    for extractor in WARM_EXTRACTORS:
+        extractor.extract_file(cache=cache)
+    return cache
+
+
+def render_script(script):
+    """
+    اجرای یک اسکریپت نمودار در فرآیند فعلی با خروجی چاپی در <script>.log
+    خطای اسکریپت در نتیجه ثبت می‌شود و بقیه نمودارها ساخته می‌شوند.
+    """
+    import matplotlib.pyplot as plt
+
+    start = time.perf_counter()
+    output = io.StringIO()
+    result = {'script': script, 'figures': list(FIGURE_SCRIPTS.get(script, ()))}
+    # آرگومان‌های خط فرمان فرآیند اصلی به argparse اسکریپت (مثلاً generate_report) نمی‌رسند
+    argv = sys.argv
+    sys.argv = [script]
+    try:
+        with contextlib.redirect_stdout(output), profile_stage('script'):
+            runpy.run_path(script, run_name='__main__')
+    except Exception:
+        result['error'] = traceback.format_exc()
+    finally:
+        sys.argv = argv
+        plt.close('all')
+    with open(f"{os.path.splitext(script)[0]}.log", 'w', encoding='utf-8') as log_file:
+        log_file.write(output.getvalue())
+    result['seconds'] = time.perf_counter() - start
+    flush_profile(script)
+    return result
+
+
+def render_figures(scripts=tuple(FIGURE_SCRIPTS), workers=None, warm=True):
+    """
+    ساخت نمودارهای همه اسکریپت‌ها با ProcessPoolExecutor
+    خروجی: (نتیجه هر اسکریپت به ترتیب ورودی، زمان کل به ثانیه)
+    """
+    use_headless_backend()
+    start = time.perf_counter()
+    if warm:
+        warm_cache()
+        flush_profile('warm_cache')
+    workers = workers or min(len(scripts), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=worker_initargs()) as pool:
+        results = list(pool.map(render_script, scripts))
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ساخت موازی نمودارها بدون نمایش')
+    parser.add_argument('scripts', nargs='*', default=list(FIGURE_SCRIPTS),
+                        help='اسکریپت‌های نمودار (پیش‌فرض: همه)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='تعداد فرآیندها (پیش‌فرض: تعداد اسکریپت‌ها، حداکثر تعداد CPU)')
+    parser.add_argument('--no-warm', action='store_true',
+                        help='بدون ساخت حافظه نهان ویژگی‌ها پیش از اجرای موازی')
+    parser.add_argument('--profile', default=None, metavar='TRACE',
+                        help='ثبت زمان و حافظه مراحل هر اسکریپت در فایل JSON Lines')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='اندازه‌گیری بیشینه حافظه هر مرحله با tracemalloc (کندتر)')
+    args = parser.parse_args()
+
+    if args.profile:
+        enable_profiling(args.profile, args.profile_memory)
+
+    results, elapsed = render_figures(args.scripts, args.workers, warm=not args.no_warm)
+    for result in results:
+        if 'error' in result:
+            print(f"خطا در {result['script']}:\n{result['error']}")
+        else:
+            print(f"{result['script']}: {result['seconds']:.2f} ثانیه -> "
+                  f"{', '.join(result['figures'])}")
+    slowest = max(result['seconds'] for result in results)
+    total = sum(result['seconds'] for result in results)
+    print(f"زمان کل: {elapsed:.2f} ثانیه (کندترین نمودار {slowest:.2f}، مجموع {total:.2f} ثانیه)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+تبدیل برچسب فریم‌ها به بازه‌های پیوسته (run-length) و بسط برداری به برچسب نمونه‌ها
+به جای آرایه‌ای به طول سیگنال، خروجی طبقه‌بندی چند صد بازه (شروع، پایان، برچسب) است و
+برچسب هر نمونه فقط در صورت نیاز (مثلاً برای رسم) با یک np.repeat ساخته می‌شود.
+هموارسازی اختیاری: حذف بازه‌های کوتاه‌تر از حداقل مدت و تأخیر در پایان بخش‌های غیرسکوت (hangover).
+
+مثال:
+    segments = Segments.from_frame_labels(labels, frame_length, frame_shift, sample_rate,
+                                          num_samples=len(audio_data))
+    segments.intervals()                  # [(start_s, end_s, label), ...]
+    segments.sample_labels()              # برچسب هر نمونه
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from classification_rules import SILENCE
+
+
+def run_lengths(labels):
+    """بازه‌های پیوسته برچسب یکسان: (شروع، پایان (غیرشامل)، برچسب) به صورت سه آرایه"""
+    labels = np.asarray(labels)
+    if len(labels) == 0:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int), labels[:0]
+    changes = np.flatnonzero(labels[1:] != labels[:-1]) + 1
+    starts = np.concatenate(([0], changes))
+    ends = np.concatenate((changes, [len(labels)]))
+    return starts, ends, labels[starts]
+
+
+def smooth_labels(labels, min_frames=0, hangover_frames=0, background=SILENCE):
+    """
+    هموارسازی برچسب فریم‌ها
+    min_frames: بازه‌های کوتاه‌تر برچسب آخرین بازه بلند قبلی (یا برای ابتدای فایل، اولین بازه بلند بعدی) را می‌گیرند
+    hangover_frames: ابتدای هر بازه background پس از یک بازه دیگر تا این تعداد فریم برچسب بازه قبلی را می‌گیرد
+    """
+    labels = np.asarray(labels)
+    if len(labels) == 0:
+        return labels.copy()
+
+    if min_frames > 1:
+        starts, ends, values = run_lengths(labels)
+        long_runs = (ends - starts) >= min_frames
+        if np.any(long_runs):
+            run_index = np.arange(len(starts))
+            previous_long = np.maximum.accumulate(np.where(long_runs, run_index, -1))
+            next_long = np.minimum.accumulate(
+                np.where(long_runs, run_index, len(starts))[::-1])[::-1]
+            source = np.where(previous_long >= 0, previous_long, next_long)
+            labels = np.repeat(values[source], ends - starts)
+
+    if hangover_frames > 0:
+        starts, ends, values = run_lengths(labels)
+        lengths = ends - starts
+        run_of_frame = np.repeat(np.arange(len(starts)), lengths)
+        offset = np.arange(len(labels)) - starts[run_of_frame]
+        previous = np.concatenate(([background], values[:-1]))[run_of_frame]
+        extend = ((labels == background) & (previous != background) &
+                  (offset < hangover_frames))
+        labels = np.where(extend, previous, labels)
+
+    return labels
+
+
+@dataclass
+class Segments:
+    """بازه‌های برچسب‌دار بر حسب نمونه (پایان غیرشامل)"""
+    starts: np.ndarray
+    ends: np.ndarray
+    labels: np.ndarray
+    sample_rate: int
+    num_samples: int
+
+    @classmethod
+    def from_frame_labels(cls, labels, frame_length, frame_shift, sample_rate, num_samples=None,
+                          min_duration=0.0, hangover=0.0):
+        """
+        ساخت بازه‌ها از برچسب فریم‌ها
+        هر نمونه برچسب آخرین فریمی را می‌گیرد که آن را پوشش می‌دهد (مانند نوشتن فریم به فریم
+        روی آرایه نمونه‌ها)، پس فریم i نمونه‌های [i × shift, (i + 1) × shift) را دارد و آخرین فریم
+        تا انتهای خودش. min_duration و hangover بر حسب ثانیه‌اند.
+        """
+        labels = np.asarray(labels)
+        shift_s = frame_shift / sample_rate
+        labels = smooth_labels(labels, int(np.ceil(min_duration / shift_s - 1e-9)),
+                               int(np.ceil(hangover / shift_s - 1e-9)))
+        starts, ends, values = run_lengths(labels)
+
+        covered = (len(labels) - 1) * frame_shift + frame_length if len(labels) else 0
+        if num_samples is None:
+            num_samples = covered
+        sample_starts = np.minimum(starts * frame_shift, num_samples)
+        sample_ends = np.minimum(ends * frame_shift, num_samples)
+        if len(ends):
+            sample_ends[-1] = min(covered, num_samples)
+        return cls(sample_starts, sample_ends, values, sample_rate, num_samples)
+
+    def __len__(self):
+        return len(self.labels)
+
+    @property
+    def durations(self):
+        """مدت هر بازه (ثانیه)"""
+        return (self.ends - self.starts) / self.sample_rate
+
+    def intervals(self):
+        """فهرست (شروع به ثانیه، پایان به ثانیه، برچسب)"""
+        return [(start / self.sample_rate, end / self.sample_rate, int(label))
+                for start, end, label in zip(self.starts, self.ends, self.labels)]
+
+    def total_duration(self, label):
+        """مجموع مدت بازه‌های یک برچسب (ثانیه)"""
+        return float(np.sum(self.durations[self.labels == label]))
+
+    def sample_labels(self, fill=SILENCE):
+        """برچسب هر نمونه (برداری)؛ نمونه‌های پس از آخرین فریم مقدار fill دارند"""
+        lengths = self.ends - self.starts
+        sample_labels = np.full(self.num_samples, fill, dtype=self.labels.dtype)
+        if len(lengths):
+            covered = self.ends[-1]
+            sample_labels[self.starts[0]:covered] = np.repeat(self.labels, lengths)
+        return sample_labels
+
+    def write_label_track(self, path, label_names=None):
+        """ذخیره به صورت فایل برچسب Audacity (شروع، پایان و نام برچسب جداشده با tab)"""
+        label_names = label_names or {}
+        with open(path, 'w', encoding='utf-8') as label_file:
+            for start_s, end_s, label in self.intervals():
+                label_file.write(f"{start_s:.6f}\t{end_s:.6f}\t{label_names.get(label, label)}\n")
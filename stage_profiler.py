@@ -0,0 +1,181 @@
+"""
+اندازه‌گیری اختیاری زمان و حافظه مراحل پردازش
+مراحل اصلی (خواندن صوت، فریم‌بندی، انرژی/ZCR، اتوکرولیشن، طبقه‌بندی، ذخیره نمودار و ساخت گزارش)
+با profile_stage علامت‌گذاری شده‌اند. برای هر مرحله زمان واقعی، زمان CPU، تعداد فریم‌ها و
+در صورت فعال بودن حافظه، بیشینه حافظه اضافه (tracemalloc) ثبت می‌شود.
+
+پیش‌فرض خاموش است و profile_stage فقط یک nullcontext برمی‌گرداند. با متغیر محیطی
+AUDIO_PROFILE=<فایل> فعال می‌شود (در فرآیندهای فرزند هم به ارث می‌رسد). در پایان هر اجرا یک سطر
+JSON (همه مراحل و جمع‌ها) به فایل اضافه و یک خلاصه یک‌خطی با ضریب بلادرنگ چاپ می‌شود.
+AUDIO_PROFILE_MEMORY=1 اندازه‌گیری حافظه را هم فعال می‌کند؛ tracemalloc هر تخصیص را ردیابی
+می‌کند و هزینه‌اش بیشتر از زمان‌سنجی است.
+
+اجرا:
+    AUDIO_PROFILE=profile.jsonl python part2e_combined_method.py
+    AUDIO_PROFILE=profile.jsonl AUDIO_PROFILE_MEMORY=1 python pipeline.py --force part2d
+    python render_figures.py --profile profile.jsonl
+"""
+
+import atexit
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass
+
+PROFILE_ENV = 'AUDIO_PROFILE'
+PROFILE_MEMORY_ENV = 'AUDIO_PROFILE_MEMORY'
+
+
+@dataclass
+class StageRecord:
+    """نتیجه یک مرحله؛ depth عمق تودرتویی است و فقط مراحل بیرونی در جمع کل شمرده می‌شوند"""
+    name: str
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    peak_bytes: int = None
+    frames: int = 0
+    audio_s: float = 0.0
+    depth: int = 0
+
+
+class StageProfiler:
+    """
+    ثبت مراحل یک اجرا
+    بیشینه حافظه هر مرحله نسبت به حافظه ردیابی‌شده در شروع همان مرحله است؛ برای مراحل تودرتو
+    بیشینه مرحله درونی در مرحله بیرونی هم منظور می‌شود.
+    """
+
+    def __init__(self, trace_file=None, memory=False):
+        self.trace_file = trace_file
+        self.memory = memory
+        self.records = []
+        self._open = []
+        self._started = time.time()
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name, frames=0, audio_s=0.0):
+        """
+        اندازه‌گیری بلوک with؛ frames و audio_s را می‌توان داخل بلوک روی رکورد برگشتی تنظیم کرد
+        """
+        record = StageRecord(name, frames=frames, audio_s=audio_s, depth=len(self._open))
+        # [رکورد، حافظه در شروع، بیشینه دیده‌شده]
+        entry = [record, 0, 0]
+        if self.memory:
+            self._update_peaks()
+            tracemalloc.reset_peak()
+            entry[1] = tracemalloc.get_traced_memory()[0]
+        self._open.append(entry)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record.cpu_s = time.process_time() - cpu
+            record.wall_s = time.perf_counter() - wall
+            if self.memory:
+                self._update_peaks()
+                record.peak_bytes = entry[2] - entry[1]
+            self._open.pop()
+            self.records.append(record)
+
+    def _update_peaks(self):
+        """انتقال بیشینه فعلی tracemalloc به همه مراحل باز پیش از reset_peak"""
+        peak = tracemalloc.get_traced_memory()[1]
+        for entry in self._open:
+            entry[2] = max(entry[2], peak)
+
+    def summary(self):
+        """
+        جمع زمان‌ها و ضریب بلادرنگ
+        مدت صوت برای هر نام مرحله جمع و بیشینه آن‌ها برداشته می‌شود، چون خواندن و فریم‌بندی یک
+        سیگنال (یا فریم‌بندی تکه‌های یک جریان) هر دو مدت همان صوت را گزارش می‌کنند.
+        """
+        outer = [record for record in self.records if record.depth == 0]
+        wall = sum(record.wall_s for record in outer)
+        audio = {}
+        for record in self.records:
+            audio[record.name] = audio.get(record.name, 0.0) + record.audio_s
+        audio_s = max(audio.values(), default=0.0)
+        peaks = [record.peak_bytes for record in self.records if record.peak_bytes is not None]
+        return {
+            'wall_s': wall,
+            'cpu_s': sum(record.cpu_s for record in outer),
+            'peak_bytes': max(peaks) if peaks else None,
+            'frames': max((record.frames for record in self.records), default=0),
+            'audio_s': audio_s,
+            'real_time_factor': wall / audio_s if audio_s else None,
+        }
+
+    def summary_line(self, label):
+        """خلاصه یک‌خطی؛ زمان هر نام مرحله جمع می‌شود (مراحل درونی هم جداگانه آمده‌اند)"""
+        summary = self.summary()
+        stages = {}
+        for record in self.records:
+            stages[record.name] = stages.get(record.name, 0.0) + record.wall_s
+        parts = ' '.join(f"{name}={seconds:.3f}" for name, seconds in stages.items())
+        line = f"[profile] {label}: {summary['wall_s']:.3f} ثانیه ({parts})"
+        if summary['real_time_factor'] is not None:
+            line += f"، ضریب بلادرنگ {summary['real_time_factor']:.5f}"
+        if summary['peak_bytes'] is not None:
+            line += f"، بیشینه حافظه {summary['peak_bytes'] / 2**20:.1f} MB"
+        return line
+
+    def flush(self, label=None):
+        """افزودن یک سطر JSON به trace_file، چاپ خلاصه یک‌خطی و شروع ثبت تازه"""
+        if not self.records:
+            return None
+        label = label or os.path.basename(sys.argv[0]) or 'python'
+        entry = {
+            'label': label,
+            'pid': os.getpid(),
+            'started': self._started,
+            'memory': self.memory,
+            'summary': self.summary(),
+            'stages': [asdict(record) for record in self.records],
+        }
+        if self.trace_file:
+            with open(self.trace_file, 'a', encoding='utf-8') as trace:
+                trace.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        print(self.summary_line(label), file=sys.stderr)
+        self.records = []
+        self._started = time.time()
+        return entry
+
+
+_profiler = None
+
+
+def enable_profiling(trace_file=None, memory=False):
+    """فعال‌سازی در فرآیند فعلی؛ نتایج هنگام خروج یا با flush_profile نوشته می‌شوند"""
+    global _profiler
+    if _profiler is None:
+        atexit.register(flush_profile)
+    _profiler = StageProfiler(trace_file, memory)
+    return _profiler
+
+
+def active_profiler():
+    """اندازه‌گیر فعال فرآیند فعلی یا None"""
+    return _profiler
+
+
+def profile_stage(name, frames=0, audio_s=0.0):
+    """context manager اندازه‌گیری یک مرحله (در حالت خاموش nullcontext)"""
+    if _profiler is None:
+        return nullcontext(StageRecord(name))
+    return _profiler.stage(name, frames, audio_s)
+
+
+def flush_profile(label=None):
+    """نوشتن نتایج مراحل ثبت‌شده تا اینجا (برای فرآیندهایی که چند اسکریپت اجرا می‌کنند)"""
+    if _profiler is not None:
+        return _profiler.flush(label)
+    return None
+
+
+if os.environ.get(PROFILE_ENV):
+    enable_profiling(os.environ[PROFILE_ENV], os.environ.get(PROFILE_MEMORY_ENV) == '1')
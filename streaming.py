@@ -0,0 +1,136 @@
+"""
+پردازش جریانی (تکه به تکه) فایل‌های صوتی بزرگ‌تر از حافظه
+فایل با soundfile به صورت بلوکی خوانده می‌شود و بین بلوک‌ها frame_length - frame_shift
+نمونه همپوشانی نگه داشته می‌شود تا فریم‌ها دقیقاً همان فریم‌های حالت درون‌حافظه باشند.
+حافظه مصرفی به اندازه یک بلوک محدود است و نتایج با FeatureExtractor.extract یکسان است.
+
+مثال:
+    for chunk in stream_features('audio.flac'):
+        chunk.start_frame, chunk.short_term_energy, chunk.zcr_values, ...
+"""
+
+import numpy as np
+import soundfile as sf
+
+from feature_engine import FeatureExtractor, frame_count, prefix_block_length, to_mono
+
+# تعداد پیش‌فرض بلوک‌های جمع تجمعی در هر تکه (هر بلوک حدود 4 ثانیه در 16 kHz)
+DEFAULT_PREFIX_BLOCKS_PER_CHUNK = 8
+
+# ویژگی‌های هر فریم که در merge_chunks به هم چسبانده می‌شوند
+FRAME_FEATURES = ('frame_times', 'short_term_energy', 'short_term_amplitude', 'zcr_values',
+                  'autocorr_strength', 'autocorr_peak_lag', 'f0_values')
+
+
+def chunk_frames(frame_length, frame_shift, frames_per_chunk=None):
+    """
+    تعداد فریم‌های هر تکه
+    به مضربی از طول بلوک جمع تجمعی گرد می‌شود تا نتایج با حالت درون‌حافظه بیت به بیت یکسان بماند.
+    """
+    unit = prefix_block_length(frame_length, frame_shift) // frame_shift
+    if frames_per_chunk is None:
+        return unit * DEFAULT_PREFIX_BLOCKS_PER_CHUNK
+    return unit * max(1, -(-frames_per_chunk // unit))
+
+
+def frame_blocks(pieces, frame_length, frame_shift, frames_per_chunk):
+    """
+    تکه‌بندی فریمی یک جریان نمونه
+    pieces تکه‌های پشت سر هم سیگنال با هر طولی است (بلوک‌های فایل یا سیگنال ساخته‌شده در حافظه).
+    هر خروجی (شماره اولین فریم، نمونه‌ها) است و نمونه‌ها دقیقاً فریم‌های کامل همان تکه را پوشش می‌دهند؛
+    frame_length - frame_shift نمونه آخر هر تکه در ابتدای تکه بعد تکرار می‌شود.
+    """
+    overlap = frame_length - frame_shift
+    blocksize = frames_per_chunk * frame_shift + overlap
+    pieces = iter(pieces)
+    pending = []
+    pending_length = 0
+    exhausted = False
+    start_frame = 0
+
+    while True:
+        while pending_length < blocksize and not exhausted:
+            piece = next(pieces, None)
+            if piece is None:
+                exhausted = True
+            elif len(piece):
+                pending.append(piece)
+                pending_length += len(piece)
+        if pending_length == 0:
+            break
+        buffer = pending[0] if len(pending) == 1 else np.concatenate(pending)
+
+        block = buffer[:blocksize]
+        if start_frame == 0:
+            # اولین تکه همان قاعده فریم‌بندی کل سیگنال را دارد (سیگنال کوتاه یک فریم صفرپرشده دارد)
+            num_frames = frame_count(len(block), frame_length, frame_shift)
+        else:
+            num_frames = max(0, (len(block) - frame_length) // frame_shift + 1)
+        num_frames = min(num_frames, frames_per_chunk)
+        if num_frames == 0:
+            break
+
+        if num_frames == frames_per_chunk or start_frame > 0:
+            block = block[:(num_frames - 1) * frame_shift + frame_length]
+        yield start_frame, block
+        start_frame += num_frames
+        pending = [buffer[num_frames * frame_shift:]]
+        pending_length = len(pending[0])
+
+
+def iter_frame_blocks(filename, frame_length, frame_shift, frames_per_chunk, dtype='float64',
+                      mono=True):
+    """
+    خواندن بلوکی فایل صوتی با قرارداد frame_blocks
+    در هر مرحله فقط نمونه‌های تازه یک تکه (frames_per_chunk × frame_shift) خوانده می‌شود.
+    mono=False یعنی بلوک‌ها (نمونه × کانال) می‌مانند؛ در حالت مونو میانگین کانال‌ها فقط برای
+    همان بلوک ساخته می‌شود، نه برای کل فایل.
+    """
+    blocks = sf.blocks(filename, blocksize=frames_per_chunk * frame_shift, dtype=dtype)
+    if mono:
+        blocks = (to_mono(block) for block in blocks)
+    return frame_blocks(blocks, frame_length, frame_shift, frames_per_chunk)
+
+
+def stream_features(filename, extractor=None, frames_per_chunk=None):
+    """
+    محاسبه ویژگی‌ها تکه به تکه؛ هر خروجی یک AudioFeatures برای فریم‌های همان تکه است
+    (audio_data و frames فقط نمونه‌های همان تکه را دارند و start_frame جایگاه تکه در فایل است).
+    تبدیل نرخ تکه به تکه با لبه‌های فیلتر در مرز تکه‌ها همان نتیجه کل فایل را نمی‌دهد، پس
+    extractor با target_rate متفاوت از نرخ فایل پذیرفته نمی‌شود.
+    """
+    if extractor is None:
+        extractor = FeatureExtractor()
+
+    sample_rate = sf.info(filename).samplerate
+    if extractor.target_rate and extractor.target_rate != sample_rate:
+        raise ValueError(f"پردازش جریانی با تبدیل نرخ پشتیبانی نمی‌شود: {filename} "
+                         f"({sample_rate} Hz، target_rate={extractor.target_rate})")
+    frame_length, frame_shift, _, _ = extractor.frame_geometry(sample_rate)
+    frames_per_chunk = chunk_frames(frame_length, frame_shift, frames_per_chunk)
+
+    for start_frame, samples in iter_frame_blocks(filename, frame_length, frame_shift,
+                                                  frames_per_chunk,
+                                                  np.dtype(extractor.sample_dtype).name,
+                                                  extractor.mono):
+        yield extractor.extract(samples, sample_rate, audio_file=filename,
+                                start_frame=start_frame)
+
+
+def merge_chunks(chunks, num_channels=None):
+    """
+    چسباندن ویژگی‌های فریمی تکه‌ها به هم: {نام ویژگی: آرایه کل فایل}
+    بدون هیچ تکه، آرایه‌های خالی با num_channels (حالت channels='separate') ابعاد (0 × کانال)
+    دارند تا با خروجی غیرخالی همان حالت سازگار باشند؛ frame_times همیشه یک‌بعدی است.
+    """
+    merged = {name: [] for name in FRAME_FEATURES}
+    for chunk in chunks:
+        for name in FRAME_FEATURES:
+            merged[name].append(getattr(chunk, name))
+    return {name: np.concatenate(values) if values else _empty_feature(name, num_channels)
+            for name, values in merged.items()}
+
+
+def _empty_feature(name, num_channels=None):
+    shape = (0,) if num_channels is None or name == 'frame_times' else (0, num_channels)
+    return np.zeros(shape, dtype=int if name == 'autocorr_peak_lag' else float)
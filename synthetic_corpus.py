@@ -0,0 +1,248 @@
+"""
+ساخت مجموعه صوتی مصنوعی با برچسب واقعی برای آزمون بار و دقت
+هر فایل دنباله‌ای تصادفی (با seed ثابت) از سه نوع بازه است:
+- واکدار: قطار پالس چاکنایی (Rosenberg) با F0 معلوم که در طول بازه به آرامی تغییر می‌کند،
+  مشتق‌شده (تابش لب) و از دو تشدیدگر سازند عبور داده‌شده
+- بی‌واک: نویز سفید بالاگذر (شبیه سایشی‌ها) با انرژی کمتر و ZCR بالا
+- سکوت: نویز زمینه بسیار ضعیف
+
+نمونه‌ها بازه به بازه در فایل صوتی نوشته می‌شوند و برچسب و F0 واقعی هر فریم (با هندسه فریم
+FeatureExtractor) در فایل‌های npy نگاشت‌شده در حافظه (memmap)، پس طول فایل به حافظه بستگی ندارد.
+برای هر فایل <نام>.flac این خروجی‌ها ساخته می‌شوند:
+    <نام>.labels.npy    برچسب هر فریم (0 سکوت، 1 بی‌واک، 2 واکدار)
+    <نام>.f0.npy        F0 واقعی هر فریم (صفر برای فریم‌های غیرواکدار)
+    <نام>.segments.txt  بازه‌ها در قالب برچسب Audacity
+    <نام>.json          پارامترهای ساخت، هندسه فریم و مدت هر دسته
+و فهرست فایل‌ها در manifest.txt (ورودی batch_process.py).
+
+اجرا:
+    python synthetic_corpus.py corpus/ --files 4 --duration 3600
+    python synthetic_corpus.py corpus/ --duration 600 --sample-rate 48000 --seed 7
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import soundfile as sf
+from scipy import signal
+
+from classification_rules import SILENCE, UNVOICED, VOICED
+from feature_engine import FeatureExtractor, frame_count
+
+LABEL_NAMES = {SILENCE: 'silence', UNVOICED: 'unvoiced', VOICED: 'voiced'}
+
+# بازه مدت هر نوع بخش (ثانیه)
+SEGMENT_DURATIONS = {SILENCE: (0.15, 0.8), UNVOICED: (0.05, 0.25), VOICED: (0.1, 0.5)}
+
+# دامنه RMS هر نوع بخش
+SEGMENT_LEVELS = {SILENCE: 0.001, UNVOICED: 0.05, VOICED: 0.25}
+
+# محدوده F0 بخش‌های واکدار (درون محدوده پیش‌فرض جستجو 80 تا 400 هرتز)
+DEFAULT_F0_RANGE = (90, 300)
+
+# سازندهای مسیر صوتی (فرکانس، پهنای باند به هرتز) برای بخش‌های واکدار
+FORMANTS = ((600, 80), (1200, 120))
+
+# شیب لبه ابتدا و انتهای هر بخش (ثانیه) برای جلوگیری از کلیک
+RAMP_S = 0.005
+
+
+def segment_plan(num_samples, sample_rate, rng, f0_range=DEFAULT_F0_RANGE):
+    """
+    دنباله بخش‌ها تا num_samples نمونه: (برچسب، تعداد نمونه، F0 ابتدا، F0 انتها)
+    نوع هر بخش با نوع بخش قبلی متفاوت است؛ آخرین بخش به طول باقی‌مانده کوتاه می‌شود.
+    """
+    position = 0
+    label = SILENCE
+    while position < num_samples:
+        low, high = SEGMENT_DURATIONS[label]
+        length = min(int(rng.uniform(low, high) * sample_rate), num_samples - position)
+        if label == VOICED:
+            f0_start = rng.uniform(*f0_range)
+            f0_end = float(np.clip(f0_start * rng.uniform(0.85, 1.15), *f0_range))
+        else:
+            f0_start = f0_end = 0.0
+        yield label, length, f0_start, f0_end
+        position += length
+        label = rng.choice([other for other in LABEL_NAMES if other != label])
+
+
+def glottal_pulses(f0, sample_rate, open_quotient=0.6, speed_quotient=2.0):
+    """
+    قطار پالس چاکنایی Rosenberg برای F0 لحظه‌ای هر نمونه (برداری با انباشت فاز)
+    بخش باز هر دوره (open_quotient) به بازشدن (کسینوس بالارونده) و بسته‌شدن تقسیم می‌شود.
+    """
+    phase = np.cumsum(f0 / sample_rate) % 1.0
+    opening = open_quotient * speed_quotient / (1 + speed_quotient)
+    closing = open_quotient - opening
+    pulses = np.zeros(len(f0))
+    rising = phase < opening
+    pulses[rising] = 0.5 * (1 - np.cos(np.pi * phase[rising] / opening))
+    falling = (phase >= opening) & (phase < open_quotient)
+    pulses[falling] = np.cos(0.5 * np.pi * (phase[falling] - opening) / closing)
+    return pulses
+
+
+def formant_filter(sample_rate, formants=FORMANTS):
+    """ضرایب (b, a) زنجیره تشدیدگرهای دوقطبی سازندها"""
+    b, a = np.array([1.0]), np.array([1.0])
+    for frequency, bandwidth in formants:
+        radius = np.exp(-np.pi * bandwidth / sample_rate)
+        theta = 2 * np.pi * frequency / sample_rate
+        a = np.convolve(a, [1, -2 * radius * np.cos(theta), radius ** 2])
+        b = b * (1 - radius)
+    return b, a
+
+
+def _ramp(segment, sample_rate):
+    length = min(int(RAMP_S * sample_rate), len(segment) // 2)
+    if length > 0:
+        window = 0.5 * (1 - np.cos(np.pi * np.arange(length) / length))
+        segment[:length] *= window
+        segment[len(segment) - length:] *= window[::-1]
+    return segment
+
+
+def synthesize_segment(label, length, f0_start, f0_end, sample_rate, rng, formants):
+    """
+    نمونه‌های یک بخش با RMS برابر SEGMENT_LEVELS
+    خروجی: (نمونه‌ها، F0 لحظه‌ای هر نمونه)
+    """
+    if label == VOICED:
+        f0 = np.linspace(f0_start, f0_end, length)
+        excitation = np.diff(glottal_pulses(f0, sample_rate), prepend=0.0)
+        samples = signal.lfilter(*formants, excitation)
+        samples += rng.normal(0, 0.01 * np.std(samples), length)
+    else:
+        f0 = np.zeros(length)
+        samples = rng.normal(0, 1, length)
+        if label == UNVOICED:
+            samples = np.diff(samples, prepend=0.0)
+    rms = np.sqrt(np.mean(samples ** 2)) if length else 0.0
+    if rms > 0:
+        samples *= SEGMENT_LEVELS[label] / rms
+    return _ramp(samples, sample_rate), f0
+
+
+def generate_file(path, duration, sample_rate=16000, seed=0, extractor=None,
+                  f0_range=DEFAULT_F0_RANGE, subtype='PCM_16'):
+    """
+    ساخت یک فایل صوتی مصنوعی با برچسب واقعی هر فریم (بازه به بازه، با حافظه ثابت)
+    برچسب فریم برچسب بخشی است که نمونه وسط فریم در آن قرار دارد و F0 فریم‌های واکدار
+    F0 لحظه‌ای همان نمونه است.
+    خروجی: دیکشنری مشخصات (همان محتوای فایل json)
+    """
+    extractor = extractor or FeatureExtractor()
+    frame_length, frame_shift, _, _ = extractor.frame_geometry(sample_rate)
+    num_samples = int(duration * sample_rate)
+    num_frames = frame_count(num_samples, frame_length, frame_shift)
+    base = os.path.splitext(path)[0]
+
+    rng = np.random.default_rng(seed)
+    formants = formant_filter(sample_rate)
+    labels = np.lib.format.open_memmap(f"{base}.labels.npy", mode='w+', dtype=np.int8,
+                                       shape=(num_frames,))
+    f0_values = np.lib.format.open_memmap(f"{base}.f0.npy", mode='w+', dtype=np.float32,
+                                          shape=(num_frames,))
+    totals = {name: 0.0 for name in LABEL_NAMES.values()}
+    num_segments = 0
+    position = 0
+    with sf.SoundFile(path, 'w', samplerate=sample_rate, channels=1, subtype=subtype) as audio, \
+            open(f"{base}.segments.txt", 'w', encoding='utf-8') as segments_file:
+        for label, length, f0_start, f0_end in segment_plan(num_samples, sample_rate, rng,
+                                                            f0_range):
+            samples, f0 = synthesize_segment(label, length, f0_start, f0_end, sample_rate, rng,
+                                             formants)
+            audio.write(np.clip(samples, -1, 1))
+
+            # فریم‌هایی که نمونه وسطشان در این بخش است
+            first = max(0, -(-(position - frame_length // 2) // frame_shift))
+            last = min(num_frames, -(-(position + length - frame_length // 2) // frame_shift))
+            if last > first:
+                centers = np.arange(first, last) * frame_shift + frame_length // 2 - position
+                labels[first:last] = label
+                f0_values[first:last] = f0[centers]
+
+            segments_file.write(f"{position / sample_rate:.6f}\t"
+                                f"{(position + length) / sample_rate:.6f}\t"
+                                f"{LABEL_NAMES[label]}\n")
+            totals[LABEL_NAMES[label]] += length / sample_rate
+            num_segments += 1
+            position += length
+    labels.flush()
+    f0_values.flush()
+    del labels, f0_values
+
+    description = {
+        'audio_file': os.path.basename(path),
+        'seed': seed,
+        'sample_rate': sample_rate,
+        'duration_s': num_samples / sample_rate,
+        'num_frames': num_frames,
+        'num_segments': num_segments,
+        'frame_length': frame_length,
+        'frame_shift': frame_shift,
+        'extractor': list(extractor.params()),
+        'f0_range': list(f0_range),
+        'label_durations_s': totals,
+    }
+    with open(f"{base}.json", 'w', encoding='utf-8') as description_file:
+        json.dump(description, description_file, ensure_ascii=False, indent=1)
+    return description
+
+
+def load_ground_truth(path):
+    """
+    برچسب و F0 واقعی فایل ساخته‌شده با generate_file
+    خروجی: (برچسب فریم‌ها، F0 فریم‌ها، مشخصات) که آرایه‌ها memmap فقط‌خواندنی‌اند
+    """
+    base = os.path.splitext(path)[0]
+    with open(f"{base}.json", encoding='utf-8') as description_file:
+        description = json.load(description_file)
+    return (np.load(f"{base}.labels.npy", mmap_mode='r'),
+            np.load(f"{base}.f0.npy", mmap_mode='r'), description)
+
+
+def generate_corpus(directory, num_files=1, duration=60, sample_rate=16000, seed=0,
+                    extension='flac', log=print):
+    """
+    ساخت num_files فایل در directory با seed های seed, seed + 1, ... و نوشتن manifest.txt
+    خروجی: مشخصات فایل‌ها
+    """
+    os.makedirs(directory, exist_ok=True)
+    descriptions = []
+    for index in range(num_files):
+        name = f"synthetic_{sample_rate}_{seed + index:04d}.{extension}"
+        start = time.perf_counter()
+        description = generate_file(os.path.join(directory, name), duration, sample_rate,
+                                    seed + index)
+        descriptions.append(description)
+        log(f"{name}: {description['duration_s']:.0f} ثانیه، {description['num_segments']} بخش، "
+            f"{time.perf_counter() - start:.2f} ثانیه")
+    with open(os.path.join(directory, 'manifest.txt'), 'w', encoding='utf-8') as manifest:
+        for description in descriptions:
+            manifest.write(description['audio_file'] + '\n')
+    return descriptions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ساخت مجموعه صوتی مصنوعی با برچسب واقعی')
+    parser.add_argument('directory', help='پوشه خروجی')
+    parser.add_argument('--files', type=int, default=1, help='تعداد فایل‌ها')
+    parser.add_argument('--duration', type=float, default=60, help='مدت هر فایل به ثانیه')
+    parser.add_argument('--sample-rate', type=int, default=16000)
+    parser.add_argument('--seed', type=int, default=0, help='seed اولین فایل (بعدی‌ها +1)')
+    parser.add_argument('--format', choices=('flac', 'wav'), default='flac')
+    args = parser.parse_args()
+
+    descriptions = generate_corpus(args.directory, args.files, args.duration, args.sample_rate,
+                                   args.seed, args.format)
+    total = sum(description['duration_s'] for description in descriptions)
+    print(f"{len(descriptions)} فایل ({total / 3600:.2f} ساعت) در پوشه '{args.directory}' ساخته شد.")
+
+
+if __name__ == '__main__':
+    main()
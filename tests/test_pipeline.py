@@ -0,0 +1,40 @@
+"""
+آزمون اجرای افزایشی pipeline: تغییر کد موتور ویژگی باید به خروجی‌ها برسد
+(مراحل وابسته دوباره اجرا شوند و حافظه نهان ویژگی‌ها نتیجه کد قدیمی را برنگرداند).
+پروژه در یک پوشه موقت کپی و pipeline.py دو بار (پیش و پس از ویرایش feature_engine.py) اجرا می‌شود.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+REPO = Path(__file__).resolve().parent.parent
+
+F0_LINE = 'f0_values[peak_lag > 0] = sample_rate / peak_lag[peak_lag > 0]'
+
+
+def run_pipeline(directory):
+    subprocess.run([sys.executable, 'pipeline.py', '--workers', '1'], cwd=directory, check=True,
+                   capture_output=True, env={**os.environ, 'MPLBACKEND': 'Agg'})
+
+
+def test_engine_change_reaches_outputs(tmp_path):
+    for path in REPO.glob('*.py'):
+        shutil.copy(path, tmp_path)
+    shutil.copy(REPO / 'audio.flac', tmp_path)
+    run_pipeline(tmp_path)
+    before = np.load(tmp_path / 'f0_values.npy')
+
+    # تغییر تبدیل تاخیر به F0 در موتور: F0 همه فریم‌ها باید دو برابر شود
+    engine = tmp_path / 'feature_engine.py'
+    source = engine.read_text(encoding='utf-8')
+    assert F0_LINE in source
+    engine.write_text(source.replace(F0_LINE, F0_LINE.replace('= sample_rate', '= 2 * sample_rate')),
+                      encoding='utf-8')
+    run_pipeline(tmp_path)
+
+    np.testing.assert_allclose(np.load(tmp_path / 'f0_values.npy'), 2 * before)